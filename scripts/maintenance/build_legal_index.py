@@ -0,0 +1,18 @@
+"""
+Builds the memory-mapped legal index (LEGAL_INDEX_PATH) from the BOE XML files
+in LEGAL_CORPUS_DIR. Does nothing if the index is up to date.
+
+Usage: python scripts/maintenance/build_legal_index.py
+"""
+import logging
+
+from src.config import LEGAL_CORPUS_DIR, LEGAL_INDEX_PATH
+from src.legal import ensure_legal_index
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    if ensure_legal_index():
+        print(f"Legal index built from {LEGAL_CORPUS_DIR} -> {LEGAL_INDEX_PATH}")
+    else:
+        print(f"Legal index {LEGAL_INDEX_PATH} is up to date")
@@ -29,15 +29,17 @@ def share_folders():
     print(f"Sharing folders with {admin_email}...")
 
     for name, folder_id in folders.items():
-        if folder_id:
-            print(f"Sharing {name} ({folder_id})...")
-            success = drive.share_file(folder_id, admin_email, role="writer")
-            if success:
-                print(f"✅ Shared {name}")
-            else:
-                print(f"❌ Failed to share {name}")
-        else:
+        if not folder_id:
             print(f"⚠️ {name} ID not found in env")
 
+    # One batch round trip for all folders
+    to_share = {name: folder_id for name, folder_id in folders.items() if folder_id}
+    shared = drive.share_files(list(to_share.values()), admin_email, role="writer")
+    for name, folder_id in to_share.items():
+        if shared.get(folder_id):
+            print(f"✅ Shared {name} ({folder_id})")
+        else:
+            print(f"❌ Failed to share {name} ({folder_id})")
+
 if __name__ == "__main__":
     share_folders()
@@ -2,10 +2,16 @@ import os
 import logging
 import json
 from abc import ABC, abstractmethod
+from typing import List, Optional
 from src.integrations.openrouter_client import OpenRouterClient
 from src.integrations.perplexity_client import PerplexityClient
 from src.integrations.notion_client import DelegadoNotionClient
-from src.config import SAVE_RAW_LLM_RESPONSES
+from src.legal.citations import verify_citations
+from src.utils.executor import run_blocking
+from src.utils.doc_edits import DocEdit, DocParagraph, format_numbered, parse_edits
+from src.utils.json_repair import repair_json
+from src.utils.monitoring import json_repair_metrics
+from src.config import SAVE_RAW_LLM_RESPONSES, LOCAL_CITATION_CHECK_ENABLED
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +60,11 @@ class AgentBase(ABC):
         """
         Generates a draft, verifies it with Perplexity (Sonar LLM), and refines it.
         Returns a dict with 'summary', 'content', and 'verification_status'.
+
+        Citations are checked offline first (src/legal/citations.py). If every
+        citation is verified against a text held locally, the Perplexity call
+        and the refinement pass are skipped ('Verified (Local)'); otherwise the
+        unresolved citations are added to the refinement instruction.
         """
         # 1. Generate Initial Draft (includes metadata: thesis, specific_point, area)
         initial_data = await self.generate_structured_draft_with_retry(context)
@@ -76,6 +87,20 @@ class AgentBase(ABC):
             initial_data["verification_status"] = "Skipped (No Content)"
             return initial_data
 
+        citation_report = None
+        if LOCAL_CITATION_CHECK_ENABLED:
+            citation_report = await run_blocking('legal', verify_citations, initial_content)
+            initial_data["citation_report"] = citation_report.to_dict()
+            if not citation_report.needs_remote:
+                logger.info(f"All {len(citation_report.citations)} citations verified locally. Skipping Perplexity.")
+                if notion_page_id:
+                    await run_blocking(
+                        'notion', self.notion_client.append_verification_report,
+                        notion_page_id, citation_report.to_markdown()
+                    )
+                initial_data["verification_status"] = "Verified (Local)"
+                return initial_data
+
         logger.info(f"Verifying draft with Perplexity...")
         
         # 2. Verify (Grounding) using extracted metadata
@@ -110,6 +135,11 @@ class AgentBase(ABC):
 
             # 4. Refine
             refinement_instruction = f"VERIFICACIÓN LEGAL OBLIGATORIA:\n{verification_feedback}"
+            if citation_report and citation_report.unresolved:
+                unresolved = "\n".join(
+                    f"- {c.text} ({c.status}{': ' + c.detail if c.detail else ''})" for c in citation_report.unresolved
+                )
+                refinement_instruction += f"\n\nCITAS NO VERIFICADAS LOCALMENTE (corrígelas o elimínalas):\n{unresolved}"
             refined_content = await self.refine_draft(initial_content, refinement_instruction)
             
             # DEBUG: Save raw response to Notion
@@ -173,24 +203,14 @@ class AgentBase(ABC):
             )
             
             try:
-                # Clean potential markdown code blocks if the LLM ignores instructions
-                cleaned_response = raw_response.strip()
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[7:]
-                if cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[3:]
-                if cleaned_response.endswith("```"):
-                    cleaned_response = cleaned_response[:-3]
-                
-                cleaned_response = cleaned_response.strip()
-                
-                # Additional cleanup: find first { and last }
-                first_brace = cleaned_response.find("{")
-                last_brace = cleaned_response.rfind("}")
-                if first_brace != -1 and last_brace != -1:
-                    cleaned_response = cleaned_response[first_brace:last_brace+1]
-                
-                data = json.loads(cleaned_response, strict=False)
+                # Fences, <think> reasoning, literal newlines... are fixed locally;
+                # a truncated draft is incomplete, so it is regenerated instead
+                repaired = repair_json(raw_response)
+                if "truncated" in repaired.fixes:
+                    raise ValueError("Draft response is truncated")
+                data = repaired.value
+                if not isinstance(data, dict):
+                    raise ValueError("Draft response is not a JSON object")
                 
                 # Ensure keys exist
                 if "summary" not in data:
@@ -213,12 +233,14 @@ class AgentBase(ABC):
                     
                 return data
                 
-            except (json.JSONDecodeError, ValueError) as e:
+            except ValueError as e:
+                # JSONRepairError is a ValueError: the response is discarded and regenerated
                 logger.warning(f"Validation failed on attempt {attempt + 1}: {e}")
                 logger.debug(f"Raw response snippet: {raw_response[:200]}...")
                 if attempt == max_retries - 1:
                     logger.error("All validation attempts failed.")
                     raise ValueError("Failed to generate valid draft after multiple attempts.")
+                json_repair_metrics.record('regenerate')
                 # Continue to next iteration/retry
         
         raise ValueError("Unexpected error in retry loop.")
@@ -249,3 +271,58 @@ class AgentBase(ABC):
         
         logger.info(f"Refining draft with {self.__class__.__name__}...")
         return await self.llm_client.completion(messages, task_type="REFINEMENT")
+
+    async def propose_draft_edits(self, paragraphs: List[DocParagraph], new_info: str) -> Optional[List[DocEdit]]:
+        """
+        Asks for targeted edits to a draft instead of a full rewrite.
+
+        The draft is shown as numbered paragraphs; the model answers with edit
+        operations (see src/utils/doc_edits.py), so output size follows the
+        size of the change.
+
+        Returns:
+            Validated edits (possibly empty), or None if the response could not
+            be used and the caller should fall back to refine_draft().
+        """
+        system_prompt = self.get_system_prompt()
+        edit_prompt = f"""
+        Has generado previamente este borrador (un párrafo por línea, con su número entre corchetes):
+        {format_numbered(paragraphs)}
+
+        El usuario te proporciona nueva información:
+        {new_info}
+
+        TAREA:
+        1. Identifica qué párrafos o secciones del documento deben actualizarse.
+        2. Integra la nueva información manteniendo la coherencia estructural.
+        3. Si la información contradice algo previamente escrito, prioriza lo más reciente.
+        4. NO regeneres el documento: devuelve SOLO los cambios mínimos como JSON:
+        {{"edits": [
+            {{"action": "replace", "paragraph": 5, "end_paragraph": 7, "text": "nuevo texto de los párrafos 5 a 7"}},
+            {{"action": "insert_after", "paragraph": 12, "text": "párrafo nuevo"}},
+            {{"action": "delete", "paragraph": 20}}
+        ]}}
+        - "end_paragraph" es opcional (por defecto, un solo párrafo). "insert_after" con "paragraph": 0 inserta al principio.
+        - "text" no lleva los números entre corchetes; separa varios párrafos con saltos de línea.
+        - Los cambios no pueden solaparse. Si no hay nada que cambiar, devuelve {{"edits": []}}.
+        """
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": edit_prompt}
+        ]
+
+        logger.info(f"Proposing draft edits with {self.__class__.__name__}...")
+        # A cut-off edit would still parse once closed (and replace whole sections): never repair it
+        response = await self.llm_client.completion(
+            messages, response_format={"type": "json_object"}, task_type="REFINEMENT", allow_truncated=False
+        )
+        try:
+            repaired = repair_json(response)
+            if "truncated" in repaired.fixes:
+                raise ValueError("Edit response is truncated")
+            return parse_edits(repaired.value, len(paragraphs))
+        except ValueError as e:
+            # JSONRepairError and EditError are ValueErrors
+            logger.warning(f"Unusable draft edits, falling back to full refinement: {e}")
+            return None
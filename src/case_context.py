@@ -0,0 +1,139 @@
+"""
+Per-case context cache for private editing mode.
+
+Every message in editing mode needs the case's Drive folder and draft Doc.
+Resolving them means a Notion lookup (get_case_links) plus a Drive files.list
+(find_doc_in_folder) before any real work. CaseContextCache keeps them per case:
+
+- Filled when /start case_<ID> binds the session (prefetch, in the background)
+- Stale-while-revalidate: entries older than CASE_CONTEXT_TTL are served and
+  refreshed in the background
+- Invalidated by the handlers when a cached ID misses (upload or Doc access
+  fails), so the next message resolves it again
+- An entry without a draft Doc (not created yet) is re-resolved on access
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from src.utils.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Case ID prefix -> command of the agent that drafts that case type
+CASE_TYPE_COMMANDS = {"D": "/denuncia", "J": "/demanda", "E": "/email"}
+
+
+@dataclass
+class CaseContext:
+    """IDs needed to work on a case from private chat."""
+    case_id: str
+    page_id: Optional[str]
+    folder_id: Optional[str]
+    doc_id: Optional[str]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def case_type(self) -> str:
+        return self.case_id.split("-")[0]
+
+    @property
+    def command(self) -> str:
+        """Agent command for the case type (defaults to /denuncia)."""
+        return CASE_TYPE_COMMANDS.get(self.case_type, "/denuncia")
+
+
+def folder_id_from_url(drive_url: Optional[str]) -> Optional[str]:
+    """Extracts the folder ID from a Drive folder URL."""
+    if drive_url:
+        match = re.search(r"folders/([a-zA-Z0-9-_]+)", drive_url)
+        if match:
+            return match.group(1)
+    return None
+
+
+class CaseContextCache:
+    """
+    In-memory cache of CaseContext by case ID.
+
+    Lookups go through the Notion and Drive thread pools; concurrent loads of
+    the same case share one task.
+    """
+
+    def __init__(self, notion, drive, ttl: float = 600.0, max_entries: int = 256):
+        self.notion = notion
+        self.drive = drive
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._contexts: "OrderedDict[str, CaseContext]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def get(self, case_id: str) -> Optional[CaseContext]:
+        """Cached context, even if stale (no I/O)."""
+        return self._contexts.get(case_id)
+
+    def invalidate(self, case_id: str):
+        self._contexts.pop(case_id, None)
+
+    async def _fetch(self, case_id: str) -> Optional[CaseContext]:
+        links = await run_blocking('notion', self.notion.get_case_links, case_id)
+        folder_id = folder_id_from_url(links.get("drive_url"))
+        if not folder_id:
+            return None
+        doc_id = await run_blocking('drive', self.drive.find_doc_in_folder, folder_id)
+        return CaseContext(case_id, links.get("page_id"), folder_id, doc_id)
+
+    async def _load_and_store(self, case_id: str) -> Optional[CaseContext]:
+        try:
+            context = await self._fetch(case_id)
+        except Exception as e:
+            logger.error(f"Error loading case context for {case_id}: {e}")
+            return self._contexts.get(case_id)
+        finally:
+            self._loading.pop(case_id, None)
+
+        if context is None:
+            self.invalidate(case_id)
+            return None
+        self._contexts[case_id] = context
+        self._contexts.move_to_end(case_id)
+        while len(self._contexts) > self.max_entries:
+            self._contexts.popitem(last=False)
+        return context
+
+    def _start_load(self, case_id: str) -> asyncio.Task:
+        task = self._loading.get(case_id)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load_and_store(case_id))
+            self._loading[case_id] = task
+        return task
+
+    async def load(self, case_id: str) -> Optional[CaseContext]:
+        """Resolves the context from Notion and Drive and caches it."""
+        return await asyncio.shield(self._start_load(case_id))
+
+    def prefetch(self, case_id: str):
+        """Starts loading the context in the background (e.g., when a session binds to the case)."""
+        self._start_load(case_id)
+
+    async def resolve(self, case_id: str) -> Optional[CaseContext]:
+        """
+        Context for a case, from the cache when possible.
+
+        Returns:
+            CaseContext, or None if the case has no Drive folder
+        """
+        context = self._contexts.get(case_id)
+        if context is None or context.doc_id is None:
+            return await self.load(case_id)
+        if time.monotonic() - context.loaded_at > self.ttl:
+            self.prefetch(case_id)
+        return context
+
+
+__all__ = ['CaseContext', 'CaseContextCache', 'CASE_TYPE_COMMANDS', 'folder_id_from_url']
@@ -11,6 +11,17 @@ APP_NAME = "Marxnager"
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Update ingress: "polling" (getUpdates) or "webhook" (src/webhook.py)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # Public base URL, e.g. https://bot.example.org
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+# Only one worker behind the proxy should register the webhook with Telegram
+WEBHOOK_SET_ON_STARTUP = os.getenv("WEBHOOK_SET_ON_STARTUP", "True").lower() in ('true', '1', 't')
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "60"))
+
 # Authorization
 def get_authorized_users():
     """Retrieves the list of authorized user IDs from environment variables."""
@@ -37,6 +48,70 @@ PRIMARY_DRAFT_MODEL = os.getenv("PRIMARY_DRAFT_MODEL", "deepseek/deepseek-r1-052
 FALLBACK_DRAFT_MODEL = os.getenv("FALLBACK_DRAFT_MODEL", "google/gemma-3-27b-it:free")
 REPAIR_MODEL = os.getenv("REPAIR_MODEL", "qwen/qwen3-4b:free")
 
+# Retry engine (src/utils/retry.py)
+# Process-wide retry budget: at most RETRY_BUDGET_CAPACITY retries in a burst,
+# refilled at RETRY_BUDGET_REFILL_PER_SECOND tokens per second.
+RETRY_BUDGET_CAPACITY = float(os.getenv("RETRY_BUDGET_CAPACITY", "20"))
+RETRY_BUDGET_REFILL_PER_SECOND = float(os.getenv("RETRY_BUDGET_REFILL_PER_SECOND", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+RETRY_MAX_RETRY_AFTER = float(os.getenv("RETRY_MAX_RETRY_AFTER", "60"))
+
+# Hedged LLM requests (src/integrations/openrouter_client.py)
+# When enabled, the fallback model is started in parallel if the primary has not
+# answered within its recent p95 latency (clamped to [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY]).
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "False").lower() in ('true', '1', 't')
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "45"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "5"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "120"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))
+
+# Streaming OpenRouter completions (live draft preview and early abort)
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "True").lower() in ('true', '1', 't')
+STREAM_PROGRESS_INTERVAL = float(os.getenv("STREAM_PROGRESS_INTERVAL", "3"))
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "90"))
+# Abort if a model emits this much reasoning without any document content
+STREAM_MAX_REASONING_CHARS = int(os.getenv("STREAM_MAX_REASONING_CHARS", "60000"))
+
+# Concurrent update processing (src/utils/update_processor.py)
+# Updates from the same user in the same chat stay ordered; pipeline commands
+# are capped at PIPELINE_MAX_CONCURRENT and never delay other commands.
+UPDATE_MAX_CONCURRENT = int(os.getenv("UPDATE_MAX_CONCURRENT", "32"))
+PIPELINE_MAX_CONCURRENT = int(os.getenv("PIPELINE_MAX_CONCURRENT", "3"))
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", "1024"))
+
+# API metrics (src/utils/monitoring.py): longest /metrics window kept in memory
+METRICS_RETENTION_MINUTES = int(os.getenv("METRICS_RETENTION_MINUTES", "1440"))
+# OpenMetrics/Prometheus exporter (src/utils/metrics_exporter.py), served at /metrics
+METRICS_EXPORTER_ENABLED = os.getenv("METRICS_EXPORTER_ENABLED", "False").lower() in ('true', '1', 't')
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9090"))
+
+# Per-case tracing (src/utils/tracing.py): spans are appended to a rotating JSONL file
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "True").lower() in ('true', '1', 't')
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("logs", "traces.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+
+# Progress message rendering (src/utils/progress_renderer.py)
+# State changes within PROGRESS_COALESCE_WINDOW seconds are merged into one edit;
+# edits are budgeted per chat (Telegram allows ~20/minute in groups) and per bot.
+PROGRESS_COALESCE_WINDOW = float(os.getenv("PROGRESS_COALESCE_WINDOW", "1.0"))
+PROGRESS_CHAT_EDITS_PER_MINUTE = float(os.getenv("PROGRESS_CHAT_EDITS_PER_MINUTE", "20"))
+PROGRESS_CHAT_EDIT_BURST = float(os.getenv("PROGRESS_CHAT_EDIT_BURST", "3"))
+PROGRESS_GLOBAL_EDITS_PER_SECOND = float(os.getenv("PROGRESS_GLOBAL_EDITS_PER_SECOND", "25"))
+# Maximum seconds the final reply waits for the last progress edit
+PROGRESS_FLUSH_TIMEOUT = float(os.getenv("PROGRESS_FLUSH_TIMEOUT", "10"))
+
+# Pooled HTTP clients for LLM providers (src/integrations/http_pool.py)
+# Connections are kept alive and reused across calls, retries and fallback models.
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))
+HTTP_POOL_MAX_PER_HOST = int(os.getenv("HTTP_POOL_MAX_PER_HOST", "10"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() in ('true', '1', 't')
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "300"))
+PERPLEXITY_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "60"))
+
 # Debugging
 SAVE_RAW_LLM_RESPONSES = os.getenv("SAVE_RAW_LLM_RESPONSES", "False").lower() in ('true', '1', 't')
 
@@ -49,4 +124,85 @@ PERPLEXITY_API_KEY_FALLBACK = os.getenv("PERPLEXITY_API_KEY_FALLBACK")
 DRIVE_FOLDER_DENUNCIAS = os.getenv("DRIVE_FOLDER_DENUNCIAS")
 DRIVE_FOLDER_DEMANDAS = os.getenv("DRIVE_FOLDER_DEMANDAS")
 DRIVE_FOLDER_EMAILS = os.getenv("DRIVE_FOLDER_EMAILS")
-ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
\ No newline at end of file
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
+
+# Local cache directory (SQLite indexes and other derived artifacts)
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+
+# Case ID sequences (src/utils/case_ids.py), reconciled from Notion at startup
+CASE_ID_DB_PATH = os.getenv("CASE_ID_DB_PATH", os.path.join(CACHE_DIR, "case_ids.sqlite3"))
+
+# Local mirror of the Notion cases database (src/integrations/case_index.py)
+# Reads are served from the mirror if it was synced within CASE_INDEX_MAX_STALENESS
+# seconds; a background task resyncs every CASE_INDEX_SYNC_INTERVAL seconds.
+CASE_INDEX_ENABLED = os.getenv("CASE_INDEX_ENABLED", "True").lower() in ('true', '1', 't')
+CASE_INDEX_MAX_STALENESS = float(os.getenv("CASE_INDEX_MAX_STALENESS", "60"))
+CASE_INDEX_SYNC_INTERVAL = float(os.getenv("CASE_INDEX_SYNC_INTERVAL", "30"))
+CASE_INDEX_FULL_SYNC_INTERVAL = float(os.getenv("CASE_INDEX_FULL_SYNC_INTERVAL", "3600"))
+# Per-case Drive folder / draft Doc cache for private editing mode (src/case_context.py);
+# entries older than CASE_CONTEXT_TTL seconds are refreshed in the background
+CASE_CONTEXT_TTL = float(os.getenv("CASE_CONTEXT_TTL", "600"))
+
+# Streaming evidence uploads (src/utils/uploads.py): attachments are spooled to
+# UPLOAD_SPOOL_DIR and sent to Drive as chunked resumable uploads, so memory use
+# does not grow with file size. UPLOAD_CHUNK_SIZE must be a multiple of 256 KiB.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(CACHE_DIR, "uploads"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2000 * 1024 * 1024)))
+UPLOAD_DOWNLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_CHUNK_RETRIES = int(os.getenv("UPLOAD_CHUNK_RETRIES", "5"))
+UPLOAD_READ_TIMEOUT = float(os.getenv("UPLOAD_READ_TIMEOUT", "60"))
+# Albums (src/utils/evidence.py): items are collected by media_group_id until none
+# arrives for MEDIA_GROUP_WAIT seconds, then uploaded MEDIA_GROUP_MAX_CONCURRENT
+# at a time. EVIDENCE_DB_PATH records uploaded file_unique_ids per case (dedupe).
+MEDIA_GROUP_WAIT = float(os.getenv("MEDIA_GROUP_WAIT", "1.5"))
+MEDIA_GROUP_MAX_CONCURRENT = int(os.getenv("MEDIA_GROUP_MAX_CONCURRENT", "4"))
+EVIDENCE_DB_PATH = os.getenv("EVIDENCE_DB_PATH", os.path.join(CACHE_DIR, "evidence.sqlite3"))
+# Drive batch requests (src/integrations/drive_batch.py): sub-requests per multipart
+# round trip (Drive accepts up to 100)
+DRIVE_BATCH_MAX_SIZE = int(os.getenv("DRIVE_BATCH_MAX_SIZE", "100"))
+
+# Perplexity research cache (src/integrations/research_cache.py)
+RESEARCH_CACHE_ENABLED = os.getenv("RESEARCH_CACHE_ENABLED", "True").lower() in ('true', '1', 't')
+RESEARCH_CACHE_DB_PATH = os.getenv("RESEARCH_CACHE_DB_PATH", os.path.join(CACHE_DIR, "research_cache.sqlite3"))
+RESEARCH_CACHE_TTL_HOURS = float(os.getenv("RESEARCH_CACHE_TTL_HOURS", "168"))
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "500"))
+# Minimum token-set similarity (0-1) to reuse research from a similar case
+# without asking (kept strict: the reuse is only reported in the final reply)
+RESEARCH_CACHE_SIMILARITY = float(os.getenv("RESEARCH_CACHE_SIMILARITY", "0.9"))
+
+# Local legal index (src/legal/): the BOE XML files in LEGAL_CORPUS_DIR are
+# compiled into LEGAL_INDEX_PATH (memory-mapped, rebuilt when a source changes).
+# The top LEGAL_TOP_K articles (BM25 score >= LEGAL_MIN_SCORE) are quoted
+# verbatim in the generation prompt. If the best hit scores at least
+# LEGAL_SKIP_RESEARCH_SCORE, Perplexity is skipped (0 = always run Perplexity).
+LEGAL_INDEX_ENABLED = os.getenv("LEGAL_INDEX_ENABLED", "True").lower() in ('true', '1', 't')
+LEGAL_CORPUS_DIR = os.getenv("LEGAL_CORPUS_DIR", os.path.join(os.path.dirname(__file__), "data"))
+LEGAL_INDEX_PATH = os.getenv("LEGAL_INDEX_PATH", os.path.join(CACHE_DIR, "legal_index.bin"))
+LEGAL_TOP_K = int(os.getenv("LEGAL_TOP_K", "4"))
+LEGAL_MIN_SCORE = float(os.getenv("LEGAL_MIN_SCORE", "5.0"))
+LEGAL_MAX_EXCERPT_CHARS = int(os.getenv("LEGAL_MAX_EXCERPT_CHARS", "2500"))
+LEGAL_SKIP_RESEARCH_SCORE = float(os.getenv("LEGAL_SKIP_RESEARCH_SCORE", "0"))
+# Offline citation check of agent drafts (src/legal/citations.py): Perplexity
+# verify_draft and the refinement pass only run for unresolved/suspicious citations
+LOCAL_CITATION_CHECK_ENABLED = os.getenv("LOCAL_CITATION_CHECK_ENABLED", "True").lower() in ('true', '1', 't')
+# Refinement in the editing loop returns paragraph edits applied as minimal Docs
+# batchUpdate requests (src/utils/doc_edits.py) instead of rewriting the whole draft
+STRUCTURED_EDITS_ENABLED = os.getenv("STRUCTURED_EDITS_ENABLED", "True").lower() in ('true', '1', 't')
+# Create draft Docs with one Drive import of the Markdown rendered as HTML (real
+# headings/bold); falls back to the Docs API create + insert + move path
+DOCS_IMPORT_ENABLED = os.getenv("DOCS_IMPORT_ENABLED", "True").lower() in ('true', '1', 't')
+
+# Blocking integration thread pools
+# The Notion, Google and Supabase SDKs are synchronous; their calls run in a
+# bounded thread pool per integration so they never block the event loop.
+NOTION_POOL_SIZE = int(os.getenv("NOTION_POOL_SIZE", "3"))
+DRIVE_POOL_SIZE = int(os.getenv("DRIVE_POOL_SIZE", "4"))
+DOCS_POOL_SIZE = int(os.getenv("DOCS_POOL_SIZE", "4"))
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "2"))
+INTEGRATION_POOL_SIZES = {
+    "notion": NOTION_POOL_SIZE,
+    "drive": DRIVE_POOL_SIZE,
+    "docs": DOCS_POOL_SIZE,
+    "supabase": SUPABASE_POOL_SIZE,
+}
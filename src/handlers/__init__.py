@@ -6,7 +6,7 @@ The monolithic handlers.py (951 lines) has been refactored into modular componen
 
 Module Structure:
 - base: Shared utilities, client initialization, and common helper functions
-- admin: Administrative commands (/log, /start, /help)
+- admin: Administrative commands (/log, /research_cache, /start, /help)
 - denuncia: /denuncia command handler for ITSS labor complaints
 - demanda: /demanda command handler for judicial labor demands
 - email: /email command handler for corporate HR communications
@@ -16,7 +16,7 @@ Module Structure:
 """
 
 from src.handlers.base import notion, drive, docs
-from src.handlers.admin import metrics_command, log_command, start, help_command
+from src.handlers.admin import metrics_command, log_command, research_cache_command, trace_command, start, help_command
 from src.handlers.denuncia import denuncia_handler
 from src.handlers.demanda import demanda_handler
 from src.handlers.email import email_handler
@@ -29,7 +29,7 @@ __all__ = [
     'notion', 'drive', 'docs',
 
     # Admin commands
-    'metrics_command', 'log_command', 'start', 'help_command',
+    'metrics_command', 'log_command', 'research_cache_command', 'trace_command', 'start', 'help_command',
 
     # Document generation commands
     'denuncia_handler', 'demanda_handler', 'email_handler',
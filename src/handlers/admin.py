@@ -6,6 +6,8 @@ and bot management functionality.
 
 Commands:
 - /log: Download system logs (admin only)
+- /research_cache: Inspect or clear the Perplexity research cache (admin only)
+- /trace: Show the timing waterfall of a case (admin only)
 - /start: Initialize bot or handle deep linking for case editing
 - /help: Display help message with all available commands
 """
@@ -16,8 +18,12 @@ from telegram.ext import ContextTypes
 from src.middleware import restricted
 from src.utils import get_logs
 from src.session_manager import session_manager
+from src.handlers.base import case_contexts
 from src.middleware import logger
 from src.utils.monitoring import api_metrics
+from src.integrations.research_cache import get_research_cache
+from src.utils.tracing import load_trace, render_waterfall
+from src.utils.executor import run_blocking
 
 
 @restricted
@@ -64,6 +70,10 @@ async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             avg_latency = api_metrics_data['avg_latency_ms']
             if avg_latency is not None:
                 response_lines.append(f"  ⏱️ Latencia media: {avg_latency:.0f}ms")
+                response_lines.append(
+                    f"  📈 p50/p95/p99: {api_metrics_data['p50_latency_ms']:.0f}/"
+                    f"{api_metrics_data['p95_latency_ms']:.0f}/{api_metrics_data['p99_latency_ms']:.0f}ms"
+                )
 
             # Errors
             error_summary = api_metrics_data['error_summary']
@@ -117,6 +127,81 @@ async def log_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@restricted
+async def research_cache_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handler for the /research_cache command.
+    Shows research cache statistics or clears cached Perplexity research.
+
+    Usage:
+    - /research_cache (statistics)
+    - /research_cache clear [denuncia|demanda|email]
+
+    This command is restricted to authorized users only.
+    """
+    cache = get_research_cache()
+    args = context.args or []
+
+    if args and args[0].lower() == "clear":
+        document_type = args[1].lower() if len(args) > 1 else None
+        removed = cache.invalidate(document_type)
+        scope = f" de tipo *{document_type}*" if document_type else ""
+        await update.message.reply_text(
+            f"🧹 Caché de investigación vaciada{scope}: {removed} entradas eliminadas.",
+            parse_mode='Markdown'
+        )
+        return
+
+    stats = cache.stats()
+    response_lines = ["🧠 *CACHÉ DE INVESTIGACIÓN*\n"]
+    response_lines.append(f"📦 Entradas: {stats['entries']}")
+    for document_type, count in sorted(stats['per_type'].items()):
+        response_lines.append(f"   • {document_type}: {count}")
+    response_lines.append(f"♻️ Reutilizaciones: {stats['hits']}")
+    if stats['oldest_age_hours'] is not None:
+        response_lines.append(f"⏳ Entrada más antigua: {stats['oldest_age_hours']:.1f} h")
+    response_lines.append("\nUsa `/research_cache clear [tipo]` para invalidarla.")
+
+    await update.message.reply_text("\n".join(response_lines), parse_mode='Markdown')
+
+
+@restricted
+async def trace_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handler for the /trace command.
+    Renders the span waterfall of the latest pipeline run of a case.
+
+    Usage: /trace <case_id>
+
+    This command is restricted to authorized users only.
+    """
+    if not context.args:
+        await update.message.reply_text("Uso: `/trace <ID>` (ej. `/trace D-2026-001`)", parse_mode='Markdown')
+        return
+
+    case_id = context.args[0].upper()
+    # Scans TRACE_FILE and its rotated backups: keep it off the event loop
+    records = await run_blocking('trace', load_trace, case_id)
+    if not records:
+        await update.message.reply_text(f"🔎 No hay traza registrada para `{case_id}`.", parse_mode='Markdown')
+        return
+
+    root = records[0]
+    # ~70 chars per line keeps the reply under Telegram's 4096-character limit
+    waterfall = render_waterfall(records, max_lines=50).replace("`", "'")
+    slowest = max(
+        (r for r in records if r["kind"] in ("call", "backoff")),
+        key=lambda r: r["duration_ms"], default=None
+    )
+
+    response_lines = [f"🔎 *TRAZA {case_id}* · {root['duration_ms'] / 1000:.1f}s\n"]
+    if slowest:
+        response_lines.append(f"🐢 Más lenta: `{slowest['name']}` ({slowest['duration_ms'] / 1000:.1f}s)\n")
+    response_lines.append(f"```\n{waterfall}\n```")
+
+    await update.message.reply_text("\n".join(response_lines), parse_mode='Markdown')
+
+
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -137,6 +222,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if args and args[0].startswith("case_"):
         case_id = args[0].replace("case_", "")
         session_manager.set_active_case(user_id, case_id)
+        # Resolve folder and draft while the delegate reads the reply
+        case_contexts.prefetch(case_id)
 
         await update.message.reply_text(
             f"🎯 *MODO EDICIÓN ACTIVO*\n"
@@ -177,7 +264,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "• `/update` → (Privado) Lista casos activos para editar.\n"
         "• `/stop` → (Privado) Sale del modo edición.\n"
         "• `/metrics [minutos]` → (Admin) Métricas de rendimiento de la API.\n"
-        "• `/log` → (Admin) Descarga logs del sistema.\n\n"
+        "• `/log` → (Admin) Descarga logs del sistema.\n"
+        "• `/research_cache [clear]` → (Admin) Estado o limpieza de la caché de investigación.\n"
+        "• `/trace [ID]` → (Admin) Cronología detallada de un caso.\n\n"
         "🔒 *MODO PRIVADO (EDICIÓN)*\n"
         "Cuando inicias un caso o usas `/update` en privado, entras en 'Modo Edición'.\n"
         "• Envíame *audios* con explicaciones extra.\n"
@@ -197,4 +286,4 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-__all__ = ['metrics_command', 'log_command', 'start', 'help_command']
+__all__ = ['metrics_command', 'log_command', 'research_cache_command', 'trace_command', 'start', 'help_command']
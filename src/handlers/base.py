@@ -8,6 +8,7 @@ Client Instances:
 - notion: DelegadoNotionClient - Notion database integration for case management
 - drive: DelegadoDriveClient - Google Drive integration for file storage
 - docs: DelegadoDocsClient - Google Docs integration for document editing
+- case_contexts: CaseContextCache - Drive folder / draft Doc IDs per case for editing mode
 """
 
 import logging
@@ -15,6 +16,8 @@ import logging
 from src.integrations.notion_client import DelegadoNotionClient
 from src.integrations.drive_client import DelegadoDriveClient
 from src.integrations.docs_client import DelegadoDocsClient
+from src.case_context import CaseContextCache
+from src.config import CASE_CONTEXT_TTL
 
 logger = logging.getLogger(__name__)
 
@@ -23,5 +26,6 @@ logger = logging.getLogger(__name__)
 notion = DelegadoNotionClient()
 drive = DelegadoDriveClient()
 docs = DelegadoDocsClient()
+case_contexts = CaseContextCache(notion, drive, ttl=CASE_CONTEXT_TTL)
 
-__all__ = ['notion', 'drive', 'docs', 'logger']
+__all__ = ['notion', 'drive', 'docs', 'case_contexts', 'logger']
@@ -17,6 +17,7 @@ from telegram.ext import ContextTypes
 
 from src.integrations.supabase_client import DelegadoSupabaseClient
 from src.middleware import restricted
+from src.utils.executor import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +59,7 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     try:
         if not args:
             # No arguments: show last 30 days
-            events = supabase.get_recent_events(user_id, days=30)
+            events = await run_blocking('supabase', supabase.get_recent_events, user_id, days=30)
             date_range_text = "últimos 30 días"
 
         elif len(args) == 1:
@@ -68,7 +69,7 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 if days <= 0:
                     raise ValueError("Days must be positive")
 
-                events = supabase.get_recent_events(user_id, days=days)
+                events = await run_blocking('supabase', supabase.get_recent_events, user_id, days=days)
                 date_range_text = f"últimos {days} días"
 
             except ValueError:
@@ -92,7 +93,9 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 if start_date > end_date:
                     raise ValueError("Start date must be before end date")
 
-                events = supabase.get_events_by_date_range(start_date, end_date, user_id)
+                events = await run_blocking(
+                    'supabase', supabase.get_events_by_date_range, start_date, end_date, user_id
+                )
 
                 # Format date range
                 start_str = start_date.strftime("%d/%m/%Y")
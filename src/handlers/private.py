@@ -9,29 +9,57 @@ Handlers:
 - private_message_handler: Processes text and file uploads when in EDITING_CASE state
 - stop_editing_handler: Exits editing mode and clears session state
 
-Supported file types:
+Supported file types (streamed to disk and uploaded in resumable chunks, see
+src/utils/uploads.py):
 - Photos: Uploaded to Drive Pruebas folder
 - Documents: Uploaded to Drive Pruebas folder
 - Voice messages: Uploaded as audio files
 - Audio files: Uploaded to Drive
+Albums are collected by media_group_id and uploaded concurrently with one
+summary reply; files already uploaded to the case (same file_unique_id) are
+not uploaded again (see src/utils/evidence.py).
 
 Text refinement workflow:
 1. User sends text feedback in private chat while in EDITING_CASE state
 2. Handler identifies appropriate agent based on case ID prefix
-3. Agent reads current document content from Google Docs
-4. Agent refines content based on user feedback
-5. Handler updates Google Doc with new content
+3. Handler reads the Google Doc as numbered paragraphs
+4. Agent proposes targeted edits (replace/insert/delete paragraphs)
+5. Handler applies them as minimal batchUpdate requests; if the edits are
+   unusable or the Doc changed meanwhile, the whole draft is regenerated and
+   rewritten as before
 """
 
-import re
+import asyncio
+import functools
+import logging
+import os
 from datetime import datetime
+from typing import List
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.middleware import restricted
 from src.session_manager import session_manager, SessionState
 from src.agents.orchestrator import agent_orchestrator
-from src.handlers.base import notion, drive, docs
+from src.handlers.base import drive, docs, case_contexts
+from src.utils.executor import run_blocking
+from src.utils.doc_edits import build_batch_requests
+from src.utils.progress_renderer import ProgressRenderer
+from src.utils.uploads import (
+    UploadTooLargeError,
+    format_upload_progress,
+    redact_bot_token,
+    spool_telegram_file,
+    threadsafe_progress
+)
+from src.utils.evidence import EvidenceItem, MediaGroupCollector, get_evidence_ledger
+from src.config import STRUCTURED_EDITS_ENABLED, MEDIA_GROUP_MAX_CONCURRENT
+
+logger = logging.getLogger(__name__)
+
+# Album items waiting for the rest of their media group
+media_groups = MediaGroupCollector()
 
 
 @restricted
@@ -47,7 +75,7 @@ async def private_message_handler(update: Update, context: ContextTypes.DEFAULT_
 
     The workflow:
     - Gets active case ID from session
-    - Extracts Drive folder ID from Notion case links
+    - Resolves the case's Drive folder and draft Doc (cached per case)
     - Routes files to Drive upload handler
     - Routes text to agent refinement handler
 
@@ -61,14 +89,9 @@ async def private_message_handler(update: Update, context: ContextTypes.DEFAULT_
 
     case_id = session["active_case_id"]
 
-    # 1. Get Folder ID from Notion
-    links = notion.get_case_links(case_id)
-    drive_url = links.get("drive_url")
-    folder_id = None
-    if drive_url:
-        match = re.search(r"folders/([a-zA-Z0-9-_]+)", drive_url)
-        if match:
-            folder_id = match.group(1)
+    # 1. Get Folder / Doc IDs (cached per case, see src/case_context.py)
+    case_context = await case_contexts.resolve(case_id)
+    folder_id = case_context.folder_id if case_context else None
 
     if not folder_id:
         await update.message.reply_text(
@@ -88,57 +111,93 @@ async def private_message_handler(update: Update, context: ContextTypes.DEFAULT_
         attachment = update.message.audio
 
     if attachment:
-        try:
-            await update.message.reply_text("⏳ Procesando archivo...")
-            file_obj = await attachment.get_file()
-
-            # Determine filename
-            original_name = getattr(attachment, 'file_name', None)
-            if not original_name:
-                ext = ".jpg" if update.message.photo else ".ogg" if update.message.voice else ""
-                original_name = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+        # Determine filename
+        original_name = getattr(attachment, 'file_name', None)
+        if not original_name:
+            ext = ".jpg" if update.message.photo else ".ogg" if update.message.voice else ""
+            original_name = f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{update.message.message_id}{ext}"
+        mime_type = getattr(attachment, 'mime_type', None) or ("image/jpeg" if update.message.photo else None)
+        item = EvidenceItem(attachment, original_name, mime_type)
+
+        # Albums: one update per item; collect them and upload the group at once
+        if update.message.media_group_id:
+            media_groups.add(
+                (update.effective_chat.id, update.message.media_group_id),
+                item,
+                functools.partial(_ingest_media_group, update, context, case_id, folder_id)
+            )
+            return
 
-            byte_array = await file_obj.download_as_bytearray()
+        ledger = get_evidence_ledger()
+        if not ledger.reserve(case_id, item.unique_id):
+            existing_link = ledger.get(case_id, item.unique_id)
+            if existing_link:
+                await update.message.reply_text(f"♻️ Este archivo ya estaba guardado en el caso: {existing_link}")
+            else:
+                await update.message.reply_text("⏳ Este archivo ya se está subiendo al caso.")
+            return
 
-            # Upload to Drive
-            link = drive.upload_file(byte_array, original_name, folder_id)
+        try:
+            status_message = await update.message.reply_text("⏳ Procesando archivo...")
+            renderer = ProgressRenderer(context.bot, status_message.chat_id, status_message.message_id,
+                                        initial_text=status_message.text)
+            try:
+                link = await _upload_evidence(
+                    item, folder_id,
+                    on_download=lambda done, total: renderer.request_text(
+                        format_upload_progress("Descargando de Telegram", done, total)),
+                    on_upload=lambda done, total: renderer.request_text(
+                        format_upload_progress("Subiendo a Drive", done, total))
+                )
+            finally:
+                await renderer.flush(timeout=2)
 
             if link:
+                ledger.record(case_id, item.unique_id, item.file_name, link)
                 await update.message.reply_text(f"✅ Archivo guardado: {link}")
             else:
+                # The cached folder may be gone: resolve it again next time
+                case_contexts.invalidate(case_id)
                 await update.message.reply_text("❌ Error al subir archivo a Drive.")
+        except UploadTooLargeError as e:
+            await update.message.reply_text(f"❌ {e}")
         except Exception as e:
-            await update.message.reply_text(f"❌ Error procesando archivo: {e}")
+            logger.error(f"Error processing file for case {case_id}: {redact_bot_token(str(e))}")
+            await update.message.reply_text("❌ Error procesando archivo. Inténtalo de nuevo.")
+        finally:
+            ledger.release(case_id, item.unique_id)
         return
 
     # 3. Handle Text (Refinement)
     text = update.message.text
     if text:
         await update.message.reply_text("⏳ Analizando nueva información y refinando borrador...")
-        doc_id = drive.find_doc_in_folder(folder_id)
+        doc_id = case_context.doc_id
 
         if doc_id:
-            # Identify Agent based on Case ID prefix
-            prefix = case_id.split("-")[0]
-            command_map = {"D": "/denuncia", "J": "/demanda", "E": "/email"}
-            command = command_map.get(prefix, "/denuncia")
+            # Identify Agent based on the case type (Case ID prefix)
+            agent = agent_orchestrator.get_agent_for_command(case_context.command)
 
-            agent = agent_orchestrator.get_agent_for_command(command)
+            if STRUCTURED_EDITS_ENABLED:
+                if await _refine_with_edits(update, agent, doc_id, text):
+                    return
 
-            # Read current content
-            current_content = docs.read_document_content(doc_id)
-            if not current_content:
-                current_content = ""  # Should not happen if doc exists
+            # Full rewrite: read, regenerate and replace the whole document
+            current_content = await run_blocking('docs', docs.read_document_content, doc_id)
+            if current_content is None:
+                # The cached Doc may have been deleted or replaced: resolve it again next time
+                case_contexts.invalidate(case_id)
+                await update.message.reply_text("❌ No pude leer el documento borrador. Inténtalo de nuevo.")
+                return
 
-            # Refine
-            new_content = agent.refine_draft(current_content, text)
+            new_content = await agent.refine_draft(current_content, text)
 
-            # Update Doc
-            success = docs.update_document_content(doc_id, new_content)
+            success = await run_blocking('docs', docs.update_document_content, doc_id, new_content)
 
             if success:
                 await update.message.reply_text("✅ Borrador actualizado con éxito.")
             else:
+                case_contexts.invalidate(case_id)
                 await update.message.reply_text("❌ Error escribiendo en el documento.")
         else:
             await update.message.reply_text(
@@ -146,6 +205,124 @@ async def private_message_handler(update: Update, context: ContextTypes.DEFAULT_
             )
 
 
+async def _upload_evidence(item: EvidenceItem, folder_id: str, on_download=None, on_upload=None):
+    """
+    Spools a Telegram attachment to disk and uploads it to Drive in resumable chunks.
+
+    Args:
+        item: Attachment with its Drive file name and MIME type
+        folder_id: Destination Drive folder
+        on_download / on_upload: Progress callbacks (bytes done, total bytes)
+
+    Returns:
+        The Drive link, or None if the upload failed
+    """
+    file_obj = await item.attachment.get_file()
+    path = await spool_telegram_file(file_obj, on_progress=on_download)
+    try:
+        return await run_blocking(
+            'drive', drive.upload_file_resumable, path, item.file_name, folder_id, item.mime_type,
+            progress=threadsafe_progress(on_upload) if on_upload else None
+        )
+    finally:
+        os.unlink(path)
+
+
+async def _ingest_media_group(update: Update, context: ContextTypes.DEFAULT_TYPE, case_id: str,
+                              folder_id: str, items: List[EvidenceItem]):
+    """
+    Uploads the items of an album concurrently (MEDIA_GROUP_MAX_CONCURRENT at a
+    time) and sends one summary reply. Files already in the case (or being
+    uploaded to it) are skipped.
+    """
+    ledger = get_evidence_ledger()
+    unique, duplicates = [], []
+    seen = set()
+    for item in items:
+        if item.unique_id and item.unique_id in seen:
+            continue
+        seen.add(item.unique_id)
+        (unique if ledger.reserve(case_id, item.unique_id) else duplicates).append(item)
+
+    try:
+        await _upload_media_group(update, context, case_id, folder_id, len(items), unique, duplicates)
+    finally:
+        for item in unique:
+            ledger.release(case_id, item.unique_id)
+
+
+async def _upload_media_group(update: Update, context: ContextTypes.DEFAULT_TYPE, case_id: str, folder_id: str,
+                              total: int, unique: List[EvidenceItem], duplicates: List[EvidenceItem]):
+    """Uploads the reserved items of an album and sends the summary reply."""
+    ledger = get_evidence_ledger()
+    status_message = await update.message.reply_text(f"⏳ Procesando álbum de {total} archivo(s)...")
+    renderer = ProgressRenderer(context.bot, status_message.chat_id, status_message.message_id,
+                                initial_text=status_message.text)
+    semaphore = asyncio.Semaphore(MEDIA_GROUP_MAX_CONCURRENT)
+    done = 0
+
+    async def upload(item: EvidenceItem):
+        nonlocal done
+        async with semaphore:
+            try:
+                link = await _upload_evidence(item, folder_id)
+            except Exception as e:
+                logger.error(f"Error uploading album item {item.file_name}: {redact_bot_token(str(e))}")
+                link = None
+        done += 1
+        renderer.request_text(f"⏳ Subiendo álbum a Drive... {done}/{len(unique)} archivo(s)")
+        if link:
+            ledger.record(case_id, item.unique_id, item.file_name, link)
+        return item, link
+
+    results = await asyncio.gather(*(upload(item) for item in unique))
+    await renderer.flush(timeout=2)
+
+    saved = [(item, link) for item, link in results if link]
+    failed = [item for item, link in results if not link]
+    if failed:
+        case_contexts.invalidate(case_id)
+
+    lines = [f"{'✅' if not failed else '⚠️'} Álbum procesado: {len(saved)} archivo(s) guardado(s)"]
+    if duplicates:
+        lines.append(f"♻️ {len(duplicates)} ya estaba(n) guardado(s) o subiéndose en el caso")
+    if failed:
+        lines.append(f"❌ {len(failed)} no se pudo/pudieron subir: {', '.join(item.file_name for item in failed)}")
+    lines.extend(f"• {item.file_name}: {link}" for item, link in saved)
+    await update.message.reply_text("\n".join(lines))
+
+
+async def _refine_with_edits(update: Update, agent, doc_id: str, text: str) -> bool:
+    """
+    Refines the draft with targeted paragraph edits.
+
+    Returns:
+        True if the draft was handled (edits applied or nothing to change),
+        False if the caller should fall back to a full rewrite.
+    """
+    snapshot = await run_blocking('docs', docs.read_document_paragraphs, doc_id)
+    if snapshot is None or not snapshot.text.strip():
+        return False
+
+    edits = await agent.propose_draft_edits(snapshot.paragraphs, text)
+    if edits is None:
+        return False
+    if not edits:
+        await update.message.reply_text("ℹ️ La nueva información no requiere cambios en el borrador.")
+        return True
+
+    requests = build_batch_requests(snapshot.paragraphs, edits)
+    success = await run_blocking(
+        'docs', docs.apply_edit_requests, snapshot.document_id, requests, snapshot.revision_id
+    )
+    if not success:
+        # Usually the Doc changed since it was read: its indexes no longer match
+        return False
+
+    await update.message.reply_text(f"✅ Borrador actualizado con éxito ({len(edits)} cambio(s)).")
+    return True
+
+
 @restricted
 async def stop_editing_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -12,6 +12,7 @@ from telegram.ext import ContextTypes
 from src.middleware import restricted
 from src.handlers.base import notion
 from src.integrations.supabase_client import DelegadoSupabaseClient
+from src.utils.executor import run_blocking
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,7 +42,7 @@ async def update_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.message.reply_text("🔄 Consultando expedientes activos...")
 
-    cases = notion.get_active_cases()
+    cases = await run_blocking('notion', notion.get_active_cases)
 
     if not cases:
         await update.message.reply_text("📂 No tienes expedientes activos para editar.")
@@ -95,7 +96,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"🔄 Actualizando {case_id} a '{new_status}'...")
 
     if notion.client:
-        success = notion.update_case_status(case_id, new_status)
+        success = await run_blocking('notion', notion.update_case_status, case_id, new_status)
         if success:
             await update.message.reply_text("✅ Estado actualizado correctamente en Notion.")
 
@@ -104,7 +105,9 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 try:
                     user_id = update.effective_user.id
                     event_text = f"Estado de caso {case_id} actualizado a '{new_status}'"
-                    supabase.log_event(
+                    await run_blocking(
+                        'supabase',
+                        supabase.log_event,
                         user_id=user_id,
                         event_text=event_text,
                         case_id=case_id,
@@ -1,6 +1,10 @@
 import os
 import json
 import logging
+import threading
+import httplib2
+import google_auth_httplib2
+from googleapiclient.http import HttpRequest
 from google.oauth2.credentials import Credentials
 from google.oauth2.service_account import Credentials as ServiceAccountCredentials
 
@@ -48,3 +52,24 @@ def get_google_creds(scopes):
 
     logger.error("No valid Google credentials found.")
     return None
+
+
+def thread_safe_request_builder(creds):
+    """
+    Returns a googleapiclient requestBuilder that gives every thread its own transport.
+
+    httplib2.Http objects are not thread-safe, so a service built with the default
+    transport cannot be shared by the integration thread pools. Passing this as
+    build(..., requestBuilder=...) keeps one shared service object while each
+    worker thread lazily gets (and reuses) its own authorized Http connection.
+    """
+    local = threading.local()
+
+    def build_request(http, *args, **kwargs):
+        thread_http = getattr(local, "http", None)
+        if thread_http is None:
+            thread_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            local.http = thread_http
+        return HttpRequest(thread_http, *args, **kwargs)
+
+    return build_request
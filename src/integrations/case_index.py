@@ -0,0 +1,283 @@
+"""
+Local SQLite mirror of the Notion cases database.
+
+Every /status, /update, private message and new case used to query Notion live,
+so Notion's ~3 req/s limit capped the bot's throughput and each lookup cost a
+300-800 ms round trip. CaseIndex keeps one row per case page:
+
+- Incremental sync: only pages with last_edited_time >= the last cursor are fetched
+- Periodic full sync: catches pages archived/deleted outside the bot
+- Write-through: DelegadoNotionClient updates the index on its own writes
+- Staleness bound: readers check is_fresh() and resync (or fall back to a live
+  query) when the last successful sync is older than CASE_INDEX_MAX_STALENESS
+
+The index is safe to use from the Notion thread pool (one connection guarded
+by a lock; sqlite3 runs with check_same_thread=False).
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    page_id TEXT PRIMARY KEY,
+    case_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    status TEXT,
+    drive_url TEXT,
+    doc_url TEXT,
+    last_edited_time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cases_case_id ON cases(case_id);
+CREATE INDEX IF NOT EXISTS idx_cases_status ON cases(status);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def case_id_from_title(title: str) -> str:
+    """Extracts the Case ID from a "ID - Context" page title."""
+    return title.split(" - ")[0] if " - " in title else title
+
+
+def page_to_row(page: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a Notion page object into an index row.
+
+    Args:
+        page: Page object as returned by pages.create/retrieve or a database query
+
+    Returns:
+        Dict with page_id, case_id, title, status, drive_url, doc_url and last_edited_time
+    """
+    props = page.get("properties", {})
+    title_prop = props.get("Name", {}).get("title", [])
+    title = title_prop[0]["text"]["content"] if title_prop else "Sin Título"
+
+    return {
+        "page_id": page["id"],
+        "case_id": case_id_from_title(title),
+        "title": title,
+        "status": (props.get("Estado", {}).get("status") or {}).get("name"),
+        "drive_url": props.get("Gdrive folder", {}).get("url"),
+        # Note: 'Perplexity' property holds the Doc link (see update_page_links)
+        "doc_url": props.get("Perplexity", {}).get("url"),
+        "last_edited_time": page.get("last_edited_time"),
+    }
+
+
+class CaseIndex:
+    """
+    SQLite-backed mirror of the Notion cases database.
+    """
+
+    def __init__(self, db_path: str, max_staleness: float = 60.0):
+        """
+        Args:
+            db_path: Path of the SQLite file (':memory:' for an in-process index)
+            max_staleness: Seconds after the last sync before reads must resync
+        """
+        self.db_path = db_path
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        # Serializes syncs so concurrent stale readers trigger a single Notion query
+        self.sync_lock = threading.Lock()
+        self._last_sync = 0.0  # time.monotonic() of the last successful sync
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ---------- Sync state ----------
+
+    def is_fresh(self) -> bool:
+        """True if the last successful sync is within the staleness bound."""
+        return self._last_sync > 0 and (time.monotonic() - self._last_sync) <= self.max_staleness
+
+    def invalidate(self):
+        """Forces the next reader to resync."""
+        self._last_sync = 0.0
+
+    def get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def mark_synced(self, cursor: Optional[str] = None, full: bool = False):
+        """
+        Records a successful sync.
+
+        Args:
+            cursor: Highest last_edited_time seen (next incremental sync starts there)
+            full: Whether this was a full sync
+        """
+        if cursor:
+            self.set_state("cursor", cursor)
+        if full:
+            self.set_state("last_full_sync", str(time.time()))
+        self._last_sync = time.monotonic()
+
+    def seconds_since_full_sync(self) -> float:
+        """Wall-clock seconds since the last full sync (infinity if never)."""
+        value = self.get_state("last_full_sync")
+        return time.time() - float(value) if value else float("inf")
+
+    # ---------- Writes ----------
+
+    def upsert_pages(self, pages: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Inserts or updates rows from Notion page objects. Archived pages are removed.
+
+        Returns:
+            The highest last_edited_time among the pages (or None)
+        """
+        return self._write_pages(pages, replace=False)
+
+    def replace_all(self, pages: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Atomically replaces the whole index with the given pages (full sync).
+
+        Returns:
+            The highest last_edited_time among the pages (or None)
+        """
+        return self._write_pages(pages, replace=True)
+
+    def _write_pages(self, pages: List[Dict[str, Any]], replace: bool) -> Optional[str]:
+        max_edited = None
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if replace:
+                    self._conn.execute("DELETE FROM cases")
+                for page in pages:
+                    if page.get("archived") or page.get("in_trash"):
+                        self._conn.execute("DELETE FROM cases WHERE page_id = ?", (page["id"],))
+                        continue
+                    row = page_to_row(page)
+                    self._conn.execute(
+                        "INSERT INTO cases (page_id, case_id, title, status, drive_url, doc_url, last_edited_time) "
+                        "VALUES (:page_id, :case_id, :title, :status, :drive_url, :doc_url, :last_edited_time) "
+                        "ON CONFLICT(page_id) DO UPDATE SET case_id = excluded.case_id, title = excluded.title, "
+                        "status = excluded.status, drive_url = excluded.drive_url, doc_url = excluded.doc_url, "
+                        "last_edited_time = excluded.last_edited_time",
+                        row
+                    )
+                    edited = row["last_edited_time"]
+                    if edited and (max_edited is None or edited > max_edited):
+                        max_edited = edited
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return max_edited
+
+    def update_fields(self, page_id: str, **fields):
+        """
+        Write-through update of selected columns for an indexed page.
+
+        Args:
+            page_id: Notion page ID
+            **fields: Columns to update (status, drive_url, doc_url, title...)
+        """
+        allowed = {"case_id", "title", "status", "drive_url", "doc_url", "last_edited_time"}
+        fields = {k: v for k, v in fields.items() if k in allowed}
+        if not fields:
+            return
+        assignments = ", ".join(f"{column} = :{column}" for column in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE cases SET {assignments} WHERE page_id = :page_id",
+                {**fields, "page_id": page_id}
+            )
+
+    def remove(self, page_id: str):
+        """Removes a page from the index (e.g., after archiving it)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cases WHERE page_id = ?", (page_id,))
+
+    # ---------- Reads ----------
+
+    def get_by_case_id(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the row of the page whose title starts with case_id."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM cases WHERE case_id = ? OR title LIKE ? ESCAPE '\\' "
+                "ORDER BY case_id = ? DESC LIMIT 1",
+                (case_id, _like_prefix(case_id), case_id)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_by_statuses(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Returns all rows whose status is in statuses, ordered by case ID."""
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM cases WHERE status IN ({placeholders}) ORDER BY case_id",
+                list(statuses)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_last_case_id(self, search_prefix: str) -> Optional[str]:
+        """Returns the highest Case ID starting with search_prefix (e.g., 'D-2026')."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT case_id FROM cases WHERE case_id LIKE ? ESCAPE '\\' ORDER BY case_id DESC LIMIT 1",
+                (_like_prefix(search_prefix),)
+            ).fetchone()
+        return row["case_id"] if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+async def case_index_sync_loop(notion_client, interval: float):
+    """
+    Keeps the case index warm so readers rarely have to wait for a sync.
+
+    Args:
+        notion_client: DelegadoNotionClient owning the index
+        interval: Seconds between incremental syncs
+    """
+    from src.utils.executor import run_blocking
+
+    while True:
+        try:
+            await run_blocking('notion', notion_client.sync_case_index)
+        except Exception as e:
+            logger.error(f"Background case index sync failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def _like_prefix(prefix: str) -> str:
+    """Escapes a string for use as a LIKE prefix pattern."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+__all__ = ['CaseIndex', 'page_to_row', 'case_id_from_title', 'case_index_sync_loop']
@@ -2,10 +2,17 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import os
 import logging
-from typing import Optional
-from src.integrations.auth_helper import get_google_creds
+import io
+from googleapiclient.http import MediaIoBaseUpload
+from typing import Dict, List, Optional
+from src.integrations.auth_helper import get_google_creds, thread_safe_request_builder
 from src.utils.retry import sync_retry
 from src.utils.monitoring import track_api_call
+from src.utils.doc_edits import DocParagraph, DocSnapshot
+from src.utils.markdown_html import markdown_to_html
+from src.config import DOCS_IMPORT_ENABLED
+
+GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
 
 logger = logging.getLogger(__name__)
 
@@ -38,13 +45,58 @@ class DelegadoDocsClient:
 
         if creds:
             try:
-                self.service = build('docs', 'v1', credentials=creds)
-                self.drive_service = build('drive', 'v3', credentials=creds)
+                request_builder = thread_safe_request_builder(creds)
+                self.service = build('docs', 'v1', credentials=creds, requestBuilder=request_builder)
+                self.drive_service = build('drive', 'v3', credentials=creds, requestBuilder=request_builder)
             except Exception as e:
                 logger.error(f"Error initializing Docs client: {e}")
         else:
             logger.warning("Docs integration disabled: No valid credentials.")
 
+    def import_draft_document(self, title: str, content: str, parent_folder_id: str) -> Optional[str]:
+        """
+        Creates the draft Doc in one Drive call by importing it as HTML.
+
+        The Markdown draft is rendered to HTML and uploaded with files.create
+        and a Google Docs target MIME type, directly into the case folder, so
+        headings, bold and lists become real Docs formatting.
+
+        Args:
+            title (str): Document title.
+            content (str): Draft content (Markdown).
+            parent_folder_id (str): The case folder ID.
+
+        Returns:
+            Optional[str]: The Doc URL, or None if the import or the conversion failed.
+        """
+        if not self.drive_service: return None
+
+        try:
+            media = MediaIoBaseUpload(
+                io.BytesIO(markdown_to_html(content or "(Contenido vacío)", title).encode("utf-8")),
+                mimetype='text/html',
+                resumable=False
+            )
+            file = self.drive_service.files().create(
+                body={'name': title, 'mimeType': GOOGLE_DOC_MIME_TYPE, 'parents': [parent_folder_id]},
+                media_body=media,
+                fields='id, mimeType'
+            ).execute()
+
+            doc_id = file.get('id')
+            if file.get('mimeType') != GOOGLE_DOC_MIME_TYPE:
+                # Stored as a plain HTML file: not a usable draft
+                logger.warning(f"Draft import was not converted to a Google Doc (got {file.get('mimeType')})")
+                if doc_id:
+                    self.drive_service.files().delete(fileId=doc_id).execute()
+                return None
+
+            logger.info(f"Document imported into folder: {doc_id}")
+            return f"https://docs.google.com/document/d/{doc_id}/edit"
+        except Exception as e:
+            logger.warning(f"Error importing draft document: {e}")
+            return None
+
     @sync_retry(
         max_retries=3,
         initial_delay=1.0,
@@ -56,10 +108,20 @@ class DelegadoDocsClient:
         """
         Creates a Google Doc with content and moves it to the specified folder.
 
+        With DOCS_IMPORT_ENABLED the Doc is created with a single Drive import
+        (see import_draft_document); if that fails, it is created, filled and
+        moved with the Docs API (four calls, plain text).
+
         Includes retry logic for transient API failures.
         """
         if not self.service or not self.drive_service: return None
 
+        if DOCS_IMPORT_ENABLED:
+            doc_link = self.import_draft_document(title, content, parent_folder_id)
+            if doc_link:
+                return doc_link
+            logger.warning("Falling back to Docs API document creation")
+
         try:
             # 1. Create Doc
             doc = self.service.documents().create(body={'title': title}).execute()
@@ -131,7 +193,8 @@ class DelegadoDocsClient:
                         if 'textRun' in run:
                             full_text += run['textRun']['content']
             
-            return full_text
+            # Line breaks inside a paragraph (e.g., from imported HTML) come as vertical tabs
+            return full_text.replace("\x0b", "\n")
         except Exception as e:
             logger.error(f"Error reading document content: {e}")
             return None
@@ -210,6 +273,79 @@ class DelegadoDocsClient:
             logger.error(f"Error updating document content: {e}")
             return False
 
+    def read_document_paragraphs(self, document_id: str) -> Optional[DocSnapshot]:
+        """
+        Reads a Google Doc as numbered paragraphs with their API indexes.
+
+        Used for structured refinement: edits reference paragraph numbers and
+        are translated into index ranges with build_batch_requests().
+
+        Args:
+            document_id (str): The Google Doc ID or URL.
+
+        Returns:
+            Optional[DocSnapshot]: Paragraphs and revision ID, or None on error.
+        """
+        if not self.service: return None
+
+        try:
+            if "docs.google.com" in document_id:
+                import re
+                match = re.search(r"/d/([a-zA-Z0-9-_]+)", document_id)
+                if match:
+                    document_id = match.group(1)
+
+            doc = self.service.documents().get(documentId=document_id).execute()
+            paragraphs = []
+            for element in doc.get('body').get('content'):
+                if 'paragraph' not in element:
+                    continue
+                text = "".join(
+                    run['textRun']['content'] for run in element['paragraph']['elements'] if 'textRun' in run
+                )
+                paragraphs.append(DocParagraph(
+                    number=len(paragraphs) + 1,
+                    start_index=element['startIndex'],
+                    end_index=element['endIndex'],
+                    text=text.rstrip("\n").replace("\x0b", "\n")
+                ))
+            return DocSnapshot(document_id, doc.get('revisionId'), paragraphs)
+        except Exception as e:
+            logger.error(f"Error reading document paragraphs: {e}")
+            return None
+
+    @track_api_call('docs')
+    def apply_edit_requests(self, document_id: str, requests: List[Dict], revision_id: Optional[str] = None) -> bool:
+        """
+        Applies a minimal set of batchUpdate requests to a Google Doc.
+
+        With revision_id the update only succeeds if the document has not
+        changed since it was read, so edits never land on shifted indexes
+        (the caller then falls back to a full rewrite). Not retried for the
+        same reason.
+
+        Args:
+            document_id (str): The Google Doc ID.
+            requests (List[Dict]): Requests from build_batch_requests().
+            revision_id (Optional[str]): Revision the requests were computed against.
+
+        Returns:
+            bool: True if the update succeeded, False otherwise.
+        """
+        if not self.service: return False
+        if not requests: return True
+
+        try:
+            body = {'requests': requests}
+            if revision_id:
+                body['writeControl'] = {'requiredRevisionId': revision_id}
+            self.service.documents().batchUpdate(documentId=document_id, body=body).execute()
+            logger.info(f"Applied {len(requests)} edit request(s) to document {document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error applying edits to document: {e}")
+            return False
+
     def append_text(self, document_id: str, text: str) -> bool:
         """
         Appends text to the end of a Google Doc with a bot signature.
@@ -0,0 +1,109 @@
+"""
+Batched Google Drive requests.
+
+Provisioning a case folder tree or sharing several files used to cost one
+HTTP round trip (and one retry loop) per operation.
+execute_batch() sends independent operations as multipart batch requests
+(up to DRIVE_BATCH_MAX_SIZE per round trip; Drive accepts 100):
+
+- Per-item results: each sub-request succeeds or fails on its own
+- Only failed sub-requests are retried, and only on transient errors (same
+  rules as src/utils/retry.py: retryable statuses, Retry-After, jittered
+  backoff and the process-wide retry budget)
+- A failure of the whole batch call (network) retries every pending item
+
+Blocking; run it through run_blocking('drive', ...) from async code.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from src.config import DRIVE_BATCH_MAX_SIZE, RETRY_MAX_RETRY_AFTER
+from src.utils.retry import compute_backoff, get_retry_after, is_transient_error, retry_budget
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Builds a fresh (unexecuted) request, e.g. lambda: service.files().delete(fileId=...)
+RequestFactory = Callable[[], Any]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one sub-request."""
+    key: str
+    response: Optional[dict] = None
+    error: Optional[Exception] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def execute_batch(service, requests: Dict[str, RequestFactory], max_retries: int = 3,
+                  initial_delay: float = 1.0, backoff_factor: float = 2.0,
+                  max_size: int = DRIVE_BATCH_MAX_SIZE) -> Dict[str, BatchResult]:
+    """
+    Executes independent Drive requests in multipart batches.
+
+    Args:
+        service: Drive API service (googleapiclient)
+        requests: Sub-requests by caller-chosen key
+        max_retries: Attempts per sub-request
+        initial_delay / backoff_factor: Backoff between rounds of retries
+        max_size: Sub-requests per batch round trip
+
+    Returns:
+        BatchResult per key (in the order of requests)
+    """
+    results = {key: BatchResult(key) for key in requests}
+    pending = list(requests)
+
+    for attempt in range(max_retries):
+        if not pending:
+            break
+
+        for start in range(0, len(pending), max_size):
+            chunk = pending[start:start + max_size]
+
+            def callback(request_id, response, exception):
+                result = results[request_id]
+                result.response, result.error = response, exception
+
+            batch = service.new_batch_http_request(callback=callback)
+            for key in chunk:
+                results[key].attempts += 1
+                batch.add(requests[key](), request_id=key)
+            try:
+                with span("drive.batch", api="drive", size=len(chunk), attempt=attempt + 1):
+                    batch.execute()
+            except Exception as e:
+                for key in chunk:
+                    results[key].response, results[key].error = None, e
+
+        failed = [key for key in pending if not results[key].ok]
+        pending = [key for key in failed if is_transient_error(results[key].error)]
+        if not pending or attempt == max_retries - 1:
+            break
+        if not retry_budget.try_acquire():
+            logger.error(f"Drive batch retry budget exhausted; {len(pending)} sub-request(s) not retried")
+            break
+
+        retry_after = max((get_retry_after(results[key].error) or 0.0) for key in pending)
+        if retry_after > RETRY_MAX_RETRY_AFTER:
+            logger.error(f"Drive batch asked to retry after {retry_after:.0f}s; giving up")
+            break
+        delay = max(compute_backoff(attempt, initial_delay, backoff_factor), retry_after)
+        logger.warning(f"Drive batch: retrying {len(pending)}/{len(requests)} failed sub-request(s) in {delay:.1f}s")
+        time.sleep(delay)
+
+    for result in results.values():
+        if not result.ok:
+            logger.error(f"Drive batch sub-request {result.key} failed after {result.attempts} attempt(s): {result.error}")
+    return results
+
+
+__all__ = ['BatchResult', 'execute_batch']
@@ -2,12 +2,14 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import os
 import logging
-import io
-from googleapiclient.http import MediaIoBaseUpload
-from typing import Optional
-from src.integrations.auth_helper import get_google_creds
+import functools
+from googleapiclient.http import MediaFileUpload
+from typing import Callable, Dict, List, Optional
+from src.integrations.auth_helper import get_google_creds, thread_safe_request_builder
 from src.utils.retry import sync_retry
 from src.utils.monitoring import track_api_call
+from src.integrations.drive_batch import execute_batch
+from src.config import UPLOAD_CHUNK_SIZE, UPLOAD_CHUNK_RETRIES
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +38,11 @@ class DelegadoDriveClient:
 
         if creds:
             try:
-                self.service = build('drive', 'v3', credentials=creds)
+                self.service = build(
+                    'drive', 'v3',
+                    credentials=creds,
+                    requestBuilder=thread_safe_request_builder(creds)
+                )
             except Exception as e:
                 logger.error(f"Error initializing Drive client: {e}")
         else:
@@ -116,41 +122,100 @@ class DelegadoDriveClient:
             logger.error(f"Error creating subfolder {folder_name}: {e}")
             return None
 
-    @sync_retry(
-        max_retries=3,
-        initial_delay=1.0,
-        backoff_factor=2.0,
-        exceptions=(HttpError, ConnectionError, TimeoutError)
-    )
     @track_api_call('drive')
-    def upload_file(self, file_content: bytes, file_name: str, folder_id: str, mime_type: str = None) -> Optional[str]:
+    def create_subfolders(self, parent_id: str, folder_names: List[str]) -> Dict[str, Optional[str]]:
         """
-        Uploads a file to the specified Drive folder.
+        Creates several subfolders inside a case folder in one batch round trip.
 
-        Includes retry logic for transient API failures.
+        Failed sub-requests are retried on their own (see drive_batch.execute_batch).
+
+        Args:
+            parent_id (str): The case folder ID.
+            folder_names (List[str]): Names of the subfolders.
+
+        Returns:
+            Dict[str, Optional[str]]: Folder ID per name (None if it could not be created).
+        """
+        if not self.service or not folder_names: return {name: None for name in folder_names}
+        results = execute_batch(self.service, {
+            name: functools.partial(
+                self.service.files().create,
+                body={'name': name, 'mimeType': 'application/vnd.google-apps.folder', 'parents': [parent_id]},
+                fields='id'
+            )
+            for name in folder_names
+        })
+        return {name: (result.response or {}).get('id') if result.ok else None for name, result in results.items()}
+
+    @track_api_call('drive')
+    def share_files(self, file_ids: List[str], email: str, role: str = "writer") -> Dict[str, bool]:
+        """
+        Shares several files or folders with an email in one batch round trip.
+
+        Returns:
+            Dict[str, bool]: Success per file ID.
+        """
+        if not self.service or not file_ids: return {file_id: False for file_id in file_ids}
+        results = execute_batch(self.service, {
+            file_id: functools.partial(
+                self.service.permissions().create,
+                fileId=file_id,
+                body={'type': 'user', 'role': role, 'emailAddress': email},
+                fields='id',
+                sendNotificationEmail=False
+            )
+            for file_id in file_ids
+        })
+        return {file_id: result.ok for file_id, result in results.items()}
+
+    @track_api_call('drive')
+    def upload_file_resumable(self, file_path: str, file_name: str, folder_id: str, mime_type: str = None,
+                              progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                              chunk_size: int = UPLOAD_CHUNK_SIZE) -> Optional[str]:
+        """
+        Uploads a file from disk to the specified Drive folder in resumable chunks.
+
+        Only one chunk is in memory at a time. Each chunk is retried on its own
+        (UPLOAD_CHUNK_RETRIES, exponential backoff on 5xx/429/network errors) and
+        the upload continues from the last byte Drive acknowledged, so a network
+        hiccup does not restart the whole file.
+
+        Args:
+            file_path (str): Local file to upload.
+            file_name (str): Name of the file in Drive.
+            folder_id (str): The ID of the destination folder.
+            mime_type (str): MIME type (default: application/octet-stream).
+            progress (Callable): Called with (bytes uploaded, total bytes) after each chunk.
+            chunk_size (int): Bytes per chunk (multiple of 256 KiB).
+
+        Returns:
+            Optional[str]: The webViewLink of the uploaded file, or None on error.
         """
         if not self.service: return None
 
         try:
-            file_metadata = {
-                'name': file_name,
-                'parents': [folder_id]
-            }
-
-            media = MediaIoBaseUpload(
-                io.BytesIO(file_content),
+            media = MediaFileUpload(
+                file_path,
                 mimetype=mime_type or 'application/octet-stream',
+                chunksize=chunk_size,
                 resumable=True
             )
-
-            file = self.service.files().create(
-                body=file_metadata,
+            request = self.service.files().create(
+                body={'name': file_name, 'parents': [folder_id]},
                 media_body=media,
                 fields='id, webViewLink'
-            ).execute()
+            )
+
+            response = None
+            while response is None:
+                status, response = request.next_chunk(num_retries=UPLOAD_CHUNK_RETRIES)
+                if status and progress:
+                    progress(status.resumable_progress, status.total_size)
+            if progress:
+                progress(media.size(), media.size())
 
-            logger.info(f"File uploaded: {file.get('name')} ({file.get('id')})")
-            return file.get('webViewLink')
+            logger.info(f"File uploaded: {file_name} ({response.get('id')})")
+            return response.get('webViewLink')
         except Exception as e:
             logger.error(f"Error uploading file {file_name}: {e}")
             return None
@@ -0,0 +1,130 @@
+"""
+Process-lifetime HTTP connection pools for the LLM providers.
+
+OpenRouter is called through a shared aiohttp.ClientSession and Perplexity
+through a shared httpx.AsyncClient (HTTP/2 when the h2 package is installed).
+Keeping the clients alive lets research, draft, repair and fallback calls reuse
+keep-alive connections instead of paying a TCP+TLS handshake per request.
+
+Clients are created lazily on first use and bound to the running event loop;
+if the loop changes (e.g., in tests) a fresh client is created. Call
+close_http_sessions() on shutdown (wired into src/main.py).
+"""
+
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+import aiohttp
+import httpx
+
+from src.config import (
+    HTTP_POOL_MAX_CONNECTIONS,
+    HTTP_POOL_MAX_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP2_ENABLED,
+    OPENROUTER_TIMEOUT,
+    PERPLEXITY_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# (client, loop it was created on)
+_aiohttp_session: Optional[Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = None
+_httpx_client: Optional[Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = None
+
+
+def get_aiohttp_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared aiohttp session used for OpenRouter.
+
+    Must be called from a coroutine. The session is created on first use and
+    replaced if it was closed or belongs to a different event loop.
+    """
+    global _aiohttp_session
+    loop = asyncio.get_running_loop()
+
+    if _aiohttp_session is not None:
+        session, session_loop = _aiohttp_session
+        if not session.closed and session_loop is loop:
+            return session
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_MAX_CONNECTIONS,
+        limit_per_host=HTTP_POOL_MAX_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=OPENROUTER_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+    _aiohttp_session = (session, loop)
+    logger.debug("Created pooled aiohttp session")
+    return session
+
+
+def get_httpx_client() -> httpx.AsyncClient:
+    """
+    Returns the shared httpx client used for Perplexity.
+
+    Must be called from a coroutine. HTTP/2 is negotiated when HTTP2_ENABLED is
+    set and the h2 package is installed; otherwise HTTP/1.1 keep-alive is used.
+    """
+    global _httpx_client
+    loop = asyncio.get_running_loop()
+
+    if _httpx_client is not None:
+        client, client_loop = _httpx_client
+        if not client.is_closed and client_loop is loop:
+            return client
+
+    http2 = HTTP2_ENABLED and HTTP2_AVAILABLE
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_POOL_MAX_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_TIMEOUT
+        ),
+        timeout=httpx.Timeout(PERPLEXITY_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+    _httpx_client = (client, loop)
+    logger.debug(f"Created pooled httpx client (http2={http2})")
+    return client
+
+
+async def close_http_sessions():
+    """
+    Closes the pooled clients. Called once when the bot stops.
+
+    Clients created on another (already closed) event loop are dropped
+    without awaiting their close.
+    """
+    global _aiohttp_session, _httpx_client
+    loop = asyncio.get_running_loop()
+
+    aiohttp_entry, _aiohttp_session = _aiohttp_session, None
+    httpx_entry, _httpx_client = _httpx_client, None
+
+    if aiohttp_entry is not None:
+        session, session_loop = aiohttp_entry
+        if session_loop is loop and not session.closed:
+            await session.close()
+
+    if httpx_entry is not None:
+        client, client_loop = httpx_entry
+        if client_loop is loop and not client.is_closed:
+            await client.aclose()
+
+    logger.debug("Closed pooled HTTP clients")
+
+
+__all__ = ['get_aiohttp_session', 'get_httpx_client', 'close_http_sessions', 'HTTP2_AVAILABLE']
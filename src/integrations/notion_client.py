@@ -1,9 +1,17 @@
 from notion_client import Client, APIResponseError
 import os
+import time
 import logging
 from typing import Dict, Any, Optional
+from src.config import (
+    CACHE_DIR,
+    CASE_INDEX_ENABLED,
+    CASE_INDEX_MAX_STALENESS,
+    CASE_INDEX_FULL_SYNC_INTERVAL
+)
 from src.utils.retry import sync_retry
 from src.utils.monitoring import track_api_call
+from src.integrations.case_index import CaseIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +27,7 @@ class DelegadoNotionClient:
             api_key: Notion integration token for API authentication.
             database_id: ID of the Notion database used for case management.
             client: Notion API client instance for database operations.
+            index: Local CaseIndex mirror serving read paths (None if disabled).
 
         Note:
             Integration is disabled if NOTION_TOKEN is not set.
@@ -27,12 +36,22 @@ class DelegadoNotionClient:
         self.api_key = os.getenv("NOTION_TOKEN")
         self.database_id = os.getenv("NOTION_DATABASE_ID")
         self.client = None
+        self.index = None
 
         if self.api_key:
             self.client = Client(auth=self.api_key)
         else:
             logger.warning("NOTION_TOKEN not found. Notion integration disabled.")
 
+        if self.client and self.database_id and CASE_INDEX_ENABLED:
+            try:
+                self.index = CaseIndex(
+                    os.path.join(CACHE_DIR, "case_index.sqlite3"),
+                    max_staleness=CASE_INDEX_MAX_STALENESS
+                )
+            except Exception as e:
+                logger.warning(f"Case index unavailable, reading Notion live: {e}")
+
     def _get_data_source_id(self) -> Optional[str]:
         """
         Retrieves the Data Source ID associated with the current Notion Database.
@@ -86,6 +105,94 @@ class DelegadoNotionClient:
         
         raise AttributeError("'DatabasesEndpoint' object has no attribute 'query' and no Data Source fallback found.")
 
+    def _query_all_pages(self, **kwargs) -> list:
+        """
+        Runs a database query and follows pagination until all results are fetched.
+
+        Args:
+            **kwargs: Extra query parameters (e.g., filter)
+
+        Returns:
+            list: All page objects matching the query.
+        """
+        pages, start_cursor = [], None
+        while True:
+            params = dict(database_id=self.database_id, page_size=100, **kwargs)
+            if start_cursor:
+                params["start_cursor"] = start_cursor
+            response = self._query_notion(**params)
+            pages.extend(response["results"])
+            if not response.get("has_more") or not response.get("next_cursor"):
+                return pages
+            start_cursor = response["next_cursor"]
+
+    @track_api_call('notion')
+    def sync_case_index(self, full: bool = False) -> bool:
+        """
+        Brings the local case index up to date with Notion.
+
+        Fetches only pages edited since the last sync cursor. A full sync (which
+        also drops pages archived outside the bot) runs on first use and then
+        every CASE_INDEX_FULL_SYNC_INTERVAL seconds.
+
+        Args:
+            full (bool): Force a full resync.
+
+        Returns:
+            bool: True if the index is synced, False if there is no index or the sync failed.
+        """
+        if not self.index or not self.client:
+            return False
+
+        requested_at = time.monotonic()
+        with self.index.sync_lock:
+            # Another thread finished a sync while we were waiting for the lock
+            if not full and self.index._last_sync >= requested_at:
+                return True
+
+            cursor = self.index.get_state("cursor")
+            full = full or not cursor or self.index.seconds_since_full_sync() > CASE_INDEX_FULL_SYNC_INTERVAL
+            try:
+                if full:
+                    pages = self._query_all_pages()
+                    new_cursor = self.index.replace_all(pages)
+                else:
+                    pages = self._query_all_pages(filter={
+                        "timestamp": "last_edited_time",
+                        "last_edited_time": {"on_or_after": cursor}
+                    })
+                    new_cursor = self.index.upsert_pages(pages)
+                self.index.mark_synced(new_cursor, full=full)
+                logger.debug(f"Case index synced ({'full' if full else 'incremental'}): {len(pages)} pages")
+                return True
+            except Exception as e:
+                logger.error(f"Error syncing case index: {e}")
+                return False
+
+    def _index_ready(self) -> bool:
+        """
+        Returns True if read paths may be served from the local index,
+        resyncing first when it is older than the staleness bound.
+        """
+        if not self.index:
+            return False
+        if self.index.is_fresh():
+            return True
+        return self.sync_case_index()
+
+    def _index_write(self, operation, *args, **kwargs):
+        """
+        Applies a write-through update to the index. On failure the index is
+        invalidated so the next read resyncs from Notion.
+        """
+        if not self.index:
+            return
+        try:
+            operation(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Case index write-through failed: {e}")
+            self.index.invalidate()
+
     @sync_retry(
         max_retries=3,
         initial_delay=1.0,
@@ -144,6 +251,9 @@ class DelegadoNotionClient:
                 properties=properties
             )
             logger.info(f"Notion page created: {response['id']}")
+            if self.index:
+                page = {**response, "properties": response.get("properties") or properties}
+                self._index_write(self.index.upsert_pages, [page])
             return response["id"]
         except Exception as e:
             logger.error(f"Error creating Notion page: {e}")
@@ -162,6 +272,13 @@ class DelegadoNotionClient:
             Optional[str]: The Notion page ID if found, None otherwise.
         """
         if not self.client or not self.database_id: return None
+
+        if self._index_ready():
+            row = self.index.get_by_case_id(case_id)
+            if row:
+                return row["page_id"]
+            # Miss: the page may have been created within the staleness window
+
         try:
             response = self._query_notion(
                 database_id=self.database_id,
@@ -192,7 +309,14 @@ class DelegadoNotionClient:
                   Returns empty list on error or if no active cases exist.
         """
         if not self.client or not self.database_id: return []
-        
+
+        active_statuses = ["Pendiente de hacer", "En progreso", "En revisión"]
+        if self._index_ready():
+            return [
+                {"id": row["case_id"], "title": row["title"], "status": row["status"]}
+                for row in self.index.get_by_statuses(active_statuses)
+            ]
+
         try:
             response = self._query_notion(
                 database_id=self.database_id,
@@ -250,6 +374,8 @@ class DelegadoNotionClient:
                 }
             )
             logger.info(f"Updated status for {case_id} to {new_status}")
+            if self.index:
+                self._index_write(self.index.update_fields, page_id, status=new_status)
             return True
         except Exception as e:
             logger.error(f"Error updating status for {case_id}: {e}")
@@ -282,6 +408,11 @@ class DelegadoNotionClient:
         try:
             self.client.pages.update(page_id=page_id, properties=properties)
             logger.info(f"Notion page {page_id} updated with links.")
+            if self.index:
+                links = {"drive_url": drive_link, "doc_url": doc_link}
+                self._index_write(
+                    self.index.update_fields, page_id, **{k: v for k, v in links.items() if v}
+                )
         except Exception as e:
             logger.error(f"Error updating Notion page links: {e}")
 
@@ -296,9 +427,14 @@ class DelegadoNotionClient:
             case_id (str): The Case ID to retrieve links for (e.g., "D-2026-001").
 
         Returns:
-            dict: A dictionary with keys 'drive_url' and 'doc_url'. Values are None
-                  if the links are not found. Returns empty dict on error.
+            dict: A dictionary with keys 'page_id', 'drive_url' and 'doc_url'. Link
+                  values are None if not set. Returns empty dict on error.
         """
+        if self._index_ready():
+            row = self.index.get_by_case_id(case_id)
+            if row:
+                return {"page_id": row["page_id"], "drive_url": row["drive_url"], "doc_url": row["doc_url"]}
+
         page_id = self._get_page_id_by_case_id(case_id)
         if not page_id: return {}
         
@@ -309,7 +445,7 @@ class DelegadoNotionClient:
             drive_url = props.get("Gdrive folder", {}).get("url")
             doc_url = props.get("Perplexity", {}).get("url")
             
-            return {"drive_url": drive_url, "doc_url": doc_url}
+            return {"page_id": page_id, "drive_url": drive_url, "doc_url": doc_url}
         except Exception as e:
             logger.error(f"Error retrieving case links: {e}")
             return {}
@@ -322,6 +458,8 @@ class DelegadoNotionClient:
         try:
             self.client.pages.update(page_id=page_id, archived=True)
             logger.info(f"Notion page {page_id} archived (deleted).")
+            if self.index:
+                self._index_write(self.index.remove, page_id)
             return True
         except Exception as e:
             logger.error(f"Error archiving Notion page {page_id}: {e}")
@@ -508,6 +646,9 @@ class DelegadoNotionClient:
         current_year = datetime.datetime.now().year
         search_prefix = f"{type_prefix}-{current_year}"
 
+        if self._index_ready():
+            return self.index.get_last_case_id(search_prefix)
+
         try:
             # Filter by Title starts with "PREFIX-YEAR" and sort descending
             response = self._query_notion(
@@ -1,6 +1,14 @@
+import asyncio
 import aiohttp
+import functools
 import json
 import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
 from src.config import (
     OPENROUTER_API_KEY,
     OPENROUTER_BASE_URL,
@@ -9,10 +17,22 @@ from src.config import (
     PRIMARY_DRAFT_MODEL,
     FALLBACK_DRAFT_MODEL,
     REPAIR_MODEL,
-    SAVE_RAW_LLM_RESPONSES
+    SAVE_RAW_LLM_RESPONSES,
+    HEDGING_ENABLED,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_MAX_DELAY,
+    HEDGE_MIN_SAMPLES,
+    STREAMING_ENABLED,
+    STREAM_IDLE_TIMEOUT,
+    STREAM_MAX_REASONING_CHARS,
+    OPENROUTER_TIMEOUT
 )
 from src.utils.retry import async_retry
-from src.utils.monitoring import track_api_call
+from src.utils.monitoring import track_api_call, json_repair_metrics
+from src.utils.json_repair import repair_json, JSONRepairError
+from src.utils.tracing import tag_span
+from src.integrations.http_pool import get_aiohttp_session
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +76,133 @@ def get_max_tokens_for_model(model: str) -> int:
             return max_tokens
     return DEFAULT_MAX_TOKENS
 
+class DegenerateOutputError(ValueError):
+    """Raised when a streamed completion is clearly unusable (looping or reasoning-only)."""
+
+
+@dataclass
+class StreamDelta:
+    """One streamed increment of a completion."""
+    content: str = ""
+    reasoning: str = ""
+
+
+def is_repetitive(text: str, min_unit: int = 8) -> bool:
+    """
+    True if the end of text is one short unit repeated over and over.
+
+    Args:
+        text: Tail of the generated output (the whole window is inspected)
+        min_unit: Shortest repeating unit considered
+    """
+    for period in range(min_unit, len(text) // 4 + 1):
+        repeats = len(text) // period
+        if text[-period * repeats:] == text[-period:] * repeats:
+            return True
+    return False
+
+
+class DegenerateOutputDetector:
+    """
+    Watches a completion stream and raises DegenerateOutputError as soon as
+    the output is clearly useless, so the caller can switch models early.
+    """
+
+    def __init__(self, max_reasoning_chars: int = STREAM_MAX_REASONING_CHARS,
+                 repeat_window: int = 800, check_every: int = 400):
+        self.max_reasoning_chars = max_reasoning_chars
+        self.repeat_window = repeat_window
+        self.check_every = check_every
+        self.content_chars = 0
+        self.reasoning_chars = 0
+        self._tail = ""
+        self._since_check = 0
+
+    def feed(self, delta: StreamDelta):
+        self.reasoning_chars += len(delta.reasoning)
+        if delta.content:
+            self.content_chars += len(delta.content)
+            self._tail = (self._tail + delta.content)[-self.repeat_window:]
+            self._since_check += len(delta.content)
+            if self._since_check >= self.check_every and len(self._tail) >= self.repeat_window:
+                self._since_check = 0
+                if is_repetitive(self._tail):
+                    raise DegenerateOutputError(f"Output is looping: ...{self._tail[-80:]!r}")
+
+        if not self.content_chars and self.reasoning_chars > self.max_reasoning_chars:
+            raise DegenerateOutputError(
+                f"{self.reasoning_chars} reasoning chars without any content"
+            )
+
+    def finish(self):
+        if not self.content_chars:
+            kind = "reasoning-only" if self.reasoning_chars else "empty"
+            raise DegenerateOutputError(f"Stream ended with {kind} output")
+
+
+class ModelLatencyTracker:
+    """
+    Keeps recent successful response times per model to size hedging delays.
+
+    The hedge delay for a model is its recent p95 latency clamped to
+    [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY], or HEDGE_DEFAULT_DELAY until
+    HEDGE_MIN_SAMPLES responses have been observed.
+    """
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, model: str) -> Optional[float]:
+        """Returns the p95 latency in seconds, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)
+        return samples[index]
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait for the primary model before starting the fallback."""
+        p95 = self.p95(model)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p95))
+
+
+# Shared by all OpenRouterClient instances
+model_latency = ModelLatencyTracker()
+
+
+async def _status_error(response, model: str) -> aiohttp.ClientResponseError:
+    """
+    Builds the error for a non-200 OpenRouter response.
+
+    The status and headers are kept so is_transient_error() only retries
+    retryable statuses (429, 5xx; not 400/401/402) and Retry-After is honored.
+    """
+    error_text = await response.text()
+    error_msg = (
+        f"OpenRouter API returned status {response.status} for model {model}. "
+        f"Reason: {response.reason}. Response: {error_text}"
+    )
+    logger.error(f"❌ {error_msg}")
+    return aiohttp.ClientResponseError(
+        response.request_info,
+        response.history,
+        status=response.status,
+        message=error_msg,
+        headers=response.headers
+    )
+
+
 class OpenRouterClient:
     def __init__(self):
         """
@@ -84,11 +231,13 @@ class OpenRouterClient:
         }
         self.last_raw_response = None
 
-    async def completion(self, messages: list, model: str = None, response_format: dict = None, task_type: str = None) -> str:
+    async def completion(self, messages: list, model: str = None, response_format: dict = None, task_type: str = None,
+                         allow_truncated: Optional[bool] = None) -> str:
         """
         Generates a completion using OpenRouter.
         Tries the primary model first, then falls back to the secondary model.
         :param task_type: Optional task type ('DRAFT', 'REFINEMENT', 'REPAIR') to determine model hierarchy.
+        :param allow_truncated: Whether cut-off JSON may be closed locally (default: all tasks but 'DRAFT').
         """
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not set. Returning simulation.")
@@ -103,17 +252,26 @@ class OpenRouterClient:
             fallback = FALLBACK_DRAFT_MODEL
 
         target_model = model or primary
+        if allow_truncated is None:
+            allow_truncated = task_type != "DRAFT"
+
+        if HEDGING_ENABLED and target_model != fallback:
+            try:
+                content, used_model = await self._hedged_request(messages, target_model, fallback, response_format)
+            except Exception as e:
+                logger.error(f"Hedged request failed for {target_model} and {fallback}: {e}")
+                return f"Error generating text: {e}"
+
+            if response_format and response_format.get("type") == "json_object":
+                content = await self._ensure_json(content, response_format, used_model, allow_truncated=allow_truncated)
+            return content
         
         try:
             content = await self._make_request(messages, target_model, response_format)
             
             # Check if JSON repair is needed
             if response_format and response_format.get("type") == "json_object":
-                try:
-                    json.loads(content)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON from {target_model}. Attempting repair with {REPAIR_MODEL}.")
-                    content = await self._repair_json(content, response_format)
+                content = await self._ensure_json(content, response_format, target_model, allow_truncated=allow_truncated)
             
             return content
             
@@ -126,11 +284,7 @@ class OpenRouterClient:
                     
                     # Check if JSON repair is needed for fallback
                     if response_format and response_format.get("type") == "json_object":
-                        try:
-                            json.loads(content)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Invalid JSON from fallback {fallback}. Attempting repair with {REPAIR_MODEL}.")
-                            content = await self._repair_json(content, response_format)
+                        content = await self._ensure_json(content, response_format, f"fallback {fallback}", allow_truncated=allow_truncated)
                     
                     return content
                 except Exception as e2:
@@ -144,16 +298,24 @@ class OpenRouterClient:
         template: str, 
         context: str, 
         research: str,
-        model: str = None
+        model: str = None,
+        on_progress: Optional[Callable[[str, int, str], Awaitable[None]]] = None,
+        legal_context: Optional[str] = None
     ) -> str:
         """
         Generates a filled legal document by combining:
         - Template structure (with {{DYNAMIC}} placeholders)
         - User context (facts of the case)
         - Perplexity research (legal grounds, verbatim)
+        - Applicable convenio articles (legal_context, verbatim; see src/legal/)
         
         Uses MODEL_PRIMARY by default.
         Returns the complete document as markdown.
+
+        If on_progress is given (and STREAMING_ENABLED), the completion is
+        streamed and on_progress(model, chars_so_far, tail_text) is awaited
+        for every increment. Degenerate streams are aborted early and the
+        fallback model is tried.
         """
         target_model = model or MODEL_PRIMARY
         
@@ -169,7 +331,9 @@ class OpenRouterClient:
             "5. Redacta en estilo jurídico formal español\n"
             "6. No inventes datos que no estén en los hechos o la investigación\n"
             "7. Si falta información para un campo, usa '[PENDIENTE DE COMPLETAR]'\n"
-            "8. El documento final debe estar listo para revisión humana\n\n"
+            "8. El documento final debe estar listo para revisión humana\n"
+            "9. Cita los artículos del convenio colectivo proporcionados de forma literal, "
+            "sin alterar su contenido\n\n"
             "IMPORTANTE: Devuelve SOLO el documento rellenado, sin explicaciones adicionales."
         )
         
@@ -180,6 +344,13 @@ class OpenRouterClient:
             f"---\n\n"
             f"## INVESTIGACIÓN JURÍDICA (Perplexity)\n\n{research}\n\n"
             f"---\n\n"
+        )
+        if legal_context:
+            user_prompt += (
+                f"## CONVENIO COLECTIVO APLICABLE (texto literal)\n\n{legal_context}\n\n"
+                f"---\n\n"
+            )
+        user_prompt += (
             "Genera el documento legal completo rellenando todos los campos {{PLACEHOLDER}} "
             "de la plantilla. Mantén el formato markdown."
         )
@@ -188,9 +359,22 @@ class OpenRouterClient:
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
+
+        request = self._make_request
+        if on_progress and STREAMING_ENABLED:
+            request = functools.partial(self._stream_request, on_progress=on_progress)
+
+        if HEDGING_ENABLED and target_model != MODEL_FALLBACK:
+            content, used_model = await self._hedged_request(
+                messages, target_model, MODEL_FALLBACK, None,
+                is_valid=lambda text: bool(text) and len(text) >= 50,
+                request=request
+            )
+            logger.info(f"✅ Document generated from template. Model: {used_model}. Length: {len(content)} chars.")
+            return content
         
         try:
-            content = await self._make_request(messages, target_model, None)
+            content = await request(messages, target_model, None)
             
             # Validation: Trigger retry if content is empty or error-like
             if not content or len(content) < 50:
@@ -204,7 +388,7 @@ class OpenRouterClient:
             if target_model != MODEL_FALLBACK:
                 logger.info(f"Retrying document generation with fallback: {MODEL_FALLBACK}")
                 try:
-                    content = await self._make_request(messages, MODEL_FALLBACK, None)
+                    content = await request(messages, MODEL_FALLBACK, None)
                     logger.info(f"✅ Document generated (fallback). Model: {MODEL_FALLBACK}. Length: {len(content)} chars.")
                     return content
                 except Exception as e2:
@@ -212,6 +396,114 @@ class OpenRouterClient:
                     raise e2
             raise e
 
+    async def _hedged_request(
+        self,
+        messages: list,
+        primary: str,
+        fallback: str,
+        response_format: dict = None,
+        is_valid: Callable[[str], bool] = bool,
+        request: Optional[Callable] = None
+    ) -> Tuple[str, str]:
+        """
+        Requests the primary model and hedges with the fallback model.
+
+        The fallback is started when the primary has not answered within its
+        hedge delay (recent p95 latency) or as soon as the primary fails. The
+        first valid response wins and the other request is cancelled.
+
+        Args:
+            messages: Chat messages for the API
+            primary: Model tried first
+            fallback: Model started as a hedge
+            response_format: Optional JSON schema for structured output
+            is_valid: Predicate a response must satisfy to be accepted
+            request: Coroutine function making one request (default: _make_request)
+
+        Returns:
+            Tuple of (content, model that produced it)
+
+        Raises:
+            Exception: The last error if neither model produced a valid response
+        """
+        request = request or self._make_request
+        tasks = {asyncio.create_task(request(messages, primary, response_format)): primary}
+        delay = model_latency.hedge_delay(primary)
+        last_error: Exception = ValueError("No valid response from any model")
+        fallback_started = False
+
+        def start_fallback(reason: str):
+            nonlocal fallback_started
+            fallback_started = True
+            logger.info(f"Hedging {primary} with {fallback}: {reason}")
+            tasks[asyncio.create_task(request(messages, fallback, response_format))] = fallback
+
+        try:
+            while tasks:
+                timeout = None if fallback_started else delay
+                done, _ = await asyncio.wait(tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    model_latency.hedges_started += 1
+                    start_fallback(f"no response after {delay:.1f}s")
+                    continue
+
+                for task in done:
+                    model = tasks.pop(task)
+                    error = task.exception()
+                    if error is None and is_valid(task.result()):
+                        if fallback_started and model == fallback:
+                            model_latency.hedges_won += 1
+                        return task.result(), model
+                    last_error = error or ValueError(f"Invalid response from {model}")
+                    logger.error(f"Error with model {model}: {last_error}")
+
+                if not fallback_started:
+                    start_fallback("primary failed")
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _ensure_json(self, content: str, response_format: dict, source: str,
+                           allow_truncated: bool = True) -> str:
+        """
+        Returns content as valid JSON text when possible.
+
+        Valid JSON is returned as is. Mechanical damage (fences, <think>
+        reasoning, literal newlines, trailing commas, truncation) is fixed
+        locally; only if that fails is REPAIR_MODEL asked to repair it.
+
+        With allow_truncated=False (drafts, draft edits), cut-off output is
+        returned unchanged: closing it would turn an incomplete legal document
+        or edit into "valid" JSON, so the caller regenerates it or falls back.
+        """
+        try:
+            json.loads(content)
+            json_repair_metrics.record('valid')
+            return content
+        except (json.JSONDecodeError, TypeError):
+            pass
+
+        try:
+            result = repair_json(content)
+            if not allow_truncated and "truncated" in result.fixes:
+                logger.warning(f"Truncated JSON from {source}; not repairing it.")
+                return content
+            json_repair_metrics.record('local', result.fixes)
+            logger.info(f"Invalid JSON from {source} repaired locally ({', '.join(result.fixes)}).")
+            return json.dumps(result.value, ensure_ascii=False)
+        except JSONRepairError as e:
+            logger.warning(f"Invalid JSON from {source}. Attempting repair with {REPAIR_MODEL}. ({e})")
+
+        repaired = await self._repair_json(content, response_format)
+        try:
+            repaired = json.dumps(repair_json(repaired).value, ensure_ascii=False)
+            json_repair_metrics.record('model')
+        except JSONRepairError:
+            json_repair_metrics.record('failed')
+        return repaired
+
     async def _repair_json(self, invalid_content: str, original_format: dict) -> str:
         """
         Attempts to repair malformed JSON using the REPAIR_MODEL.
@@ -255,7 +547,7 @@ class OpenRouterClient:
         max_retries=3,
         initial_delay=1.0,
         backoff_factor=2.0,
-        exceptions=(aiohttp.ClientError, aiohttp.ClientTimeout, ConnectionError, OSError)
+        exceptions=(aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, OSError)
     )
     @track_api_call('openrouter')
     async def _make_request(self, messages: list, model: str, response_format: dict = None) -> str:
@@ -276,42 +568,156 @@ class OpenRouterClient:
             Generated content string
 
         Raises:
+            aiohttp.ClientResponseError: For non-200 responses (carries status and headers)
             aiohttp.ClientError: For persistent API failures
             ValueError: For invalid API responses
         """
-        max_tokens = get_max_tokens_for_model(model)
+        payload = self._build_payload(messages, model, response_format)
+        started_at = time.monotonic()
+        tag_span(model=model)
+
+        # Pooled keep-alive session shared across calls, retries and fallback models
+        session = get_aiohttp_session()
+        async with session.post(
+            f"{self.base_url}/chat/completions",
+            headers=self.headers,
+            json=payload
+        ) as response:
+            # Check for non-200 status codes; only retryable ones (429, 5xx) are retried
+            if response.status != 200:
+                raise await _status_error(response, model)
+
+            # If status is 200, proceed
+            data = await response.json()
+            self.last_raw_response = data
+
+            if "choices" in data and len(data["choices"]) > 0:
+                model_latency.record(model, time.monotonic() - started_at)
+                return data["choices"][0]["message"]["content"]
+            else:
+                raise ValueError(f"Invalid response from OpenRouter: {data}")
+
+    def _build_payload(self, messages: list, model: str, response_format: dict = None) -> dict:
+        """Builds the chat/completions request body for a model."""
         payload = {
             "model": model,
             "messages": messages,
-            "max_tokens": max_tokens
+            "max_tokens": get_max_tokens_for_model(model)
         }
 
         if response_format and "deepseek" in model.lower():
             payload["response_format"] = response_format
+        return payload
+
+    async def stream_completion(self, messages: list, model: str, response_format: dict = None) -> AsyncIterator[StreamDelta]:
+        """
+        Streams a completion from OpenRouter (server-sent events).
+
+        Args:
+            messages: Chat messages for the API
+            model: Model identifier to use
+            response_format: Optional JSON schema for structured output
+
+        Yields:
+            StreamDelta with the content and/or reasoning text of each increment
+
+        Raises:
+            aiohttp.ClientResponseError: For non-200 responses (carries status and headers)
+            aiohttp.ClientError: For errors reported mid-stream
+        """
+        payload = self._build_payload(messages, model, response_format)
+        payload["stream"] = True
+
+        session = get_aiohttp_session()
+        async with session.post(
+            f"{self.base_url}/chat/completions",
+            headers=self.headers,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=OPENROUTER_TIMEOUT, sock_read=STREAM_IDLE_TIMEOUT)
+        ) as response:
+            if response.status != 200:
+                raise await _status_error(response, model)
+
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                # Blank lines separate events; ':' lines are keep-alive comments
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed stream chunk from {model}: {data[:200]}")
+                    continue
+
+                if "error" in chunk:
+                    raise aiohttp.ClientError(f"OpenRouter stream error for model {model}: {chunk['error']}")
+
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta") or {}
+                content = delta.get("content") or ""
+                reasoning = delta.get("reasoning") or ""
+                if content or reasoning:
+                    yield StreamDelta(content=content, reasoning=reasoning)
+
+    @async_retry(
+        max_retries=3,
+        initial_delay=1.0,
+        backoff_factor=2.0,
+        exceptions=(aiohttp.ClientError, asyncio.TimeoutError, ConnectionError, OSError)
+    )
+    @track_api_call('openrouter')
+    async def _stream_request(
+        self,
+        messages: list,
+        model: str,
+        response_format: dict = None,
+        on_progress: Optional[Callable[[str, int, str], Awaitable[None]]] = None
+    ) -> str:
+        """
+        Streams a completion and returns the full content.
+
+        Args:
+            messages: Chat messages for the API
+            model: Model identifier to use
+            response_format: Optional JSON schema for structured output
+            on_progress: Optional coroutine function awaited as
+                         on_progress(model, chars_so_far, tail_text)
+
+        Returns:
+            Generated content string
+
+        Raises:
+            DegenerateOutputError: If the output loops or is reasoning-only (not retried)
+            aiohttp.ClientError: For persistent API failures
+        """
+        detector = DegenerateOutputDetector()
+        parts = []
+        chars = 0
+        tail = ""
+        started_at = time.monotonic()
+        tag_span(model=model, streamed=True)
+
+        async for delta in self.stream_completion(messages, model, response_format):
+            detector.feed(delta)
+            if not delta.content:
+                continue
+            parts.append(delta.content)
+            chars += len(delta.content)
+            tail = (tail + delta.content)[-200:]
+            if on_progress:
+                try:
+                    await on_progress(model, chars, tail)
+                except Exception as e:
+                    logger.error(f"Stream progress callback failed: {e}")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=300
-            ) as response:
-                # Check for non-200 status codes
-                if response.status != 200:
-                    error_text = await response.text()
-                    # Non-200 status codes are not retried (they're not transient failures)
-                    error_msg = (
-                        f"OpenRouter API returned status {response.status} for model {model}. "
-                        f"Reason: {response.reason}. Response: {error_text}"
-                    )
-                    logger.error(f"❌ {error_msg}")
-                    raise aiohttp.ClientError(error_msg)
-
-                # If status is 200, proceed
-                data = await response.json()
-                self.last_raw_response = data
-
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0]["message"]["content"]
-                else:
-                    raise ValueError(f"Invalid response from OpenRouter: {data}")
+        detector.finish()
+        content = "".join(parts)
+        model_latency.record(model, time.monotonic() - started_at)
+        self.last_raw_response = {"model": model, "streamed": True, "content_chars": chars}
+        return content
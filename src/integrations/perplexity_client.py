@@ -4,6 +4,10 @@ import logging
 from typing import Optional
 from src.utils.retry import async_retry
 from src.utils.monitoring import track_api_call
+from src.utils.tracing import tag_span
+from src.integrations.http_pool import get_httpx_client
+from src.integrations.research_cache import get_research_cache
+from src.config import RESEARCH_CACHE_ENABLED
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +25,8 @@ class PerplexityClient:
             api_url: Perplexity API endpoint for chat completions.
             model: Model identifier (sonar-pro) optimized for online search grounding.
             last_raw_response: Stores the most recent raw API response for debugging.
+            last_cache_hit: CacheHit of the last research_case call served from
+                the research cache (None if it went to the network).
 
         Note:
             The sonar-pro model is used for its ability to ground responses in
@@ -32,6 +38,7 @@ class PerplexityClient:
         self.api_url = "https://api.perplexity.ai/chat/completions"
         self.model = "sonar-pro" # Using an online model for grounding
         self.last_raw_response = None
+        self.last_cache_hit = None
 
     async def verify_draft(self, context: str, thesis: str = "", specific_point: str = "", area: str = "") -> Optional[str]:
         """
@@ -97,16 +104,49 @@ class PerplexityClient:
 
         return None
 
-    async def research_case(self, context: str, document_type: str = "demanda") -> Optional[str]:
+    async def research_case(self, context: str, document_type: str = "demanda", use_cache: bool = True) -> Optional[str]:
         """
         Uses Perplexity to research legal grounds for a case.
         Returns raw research output to be fed verbatim to OpenRouter for document generation.
+
+        Results are cached by normalized facts; exact and near-duplicate hits
+        skip the network (see src/integrations/research_cache.py).
         
         Args:
             context: User-provided facts of the case
             document_type: Type of document ('demanda' or 'denuncia')
+            use_cache: Whether to read/write the research cache
         """
-        
+        self.last_cache_hit = None
+        cache = get_research_cache() if (use_cache and RESEARCH_CACHE_ENABLED) else None
+        if cache:
+            try:
+                hit = cache.lookup(context, document_type)
+            except Exception as e:
+                logger.error(f"Research cache lookup failed: {e}")
+                hit = None
+            if hit:
+                self.last_cache_hit = hit
+                tag_span(research_cache_similarity=round(hit.similarity, 2))
+                logger.info(
+                    f"♻️ Perplexity Research CACHE HIT for {document_type} "
+                    f"(similarity {hit.similarity:.2f}). Length: {len(hit.research)} chars."
+                )
+                return hit.research
+
+        result = await self._research_case_remote(context, document_type)
+        if result and cache:
+            try:
+                cache.store(context, document_type, result)
+            except Exception as e:
+                logger.error(f"Research cache store failed: {e}")
+        return result
+
+    async def _research_case_remote(self, context: str, document_type: str) -> Optional[str]:
+        """
+        Runs the research query against Perplexity (primary key, then fallback).
+        """
+
         # Build research prompt based on document type
         if document_type == "denuncia":
             action_focus = "denuncia ante la Inspección de Trabajo y Seguridad Social (ITSS)"
@@ -208,16 +248,18 @@ class PerplexityClient:
             "Content-Type": "application/json"
         }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(self.api_url, json=payload, headers=headers)
-
-            if response.status_code == 200:
-                data = response.json()
-                self.last_raw_response = data
-                content = data["choices"][0]["message"]["content"]
-                logger.info(f"✅ Perplexity SUCCESS. Status Code: 200. Response Length: {len(content)} characters.")
-                return content
-            else:
-                # Non-200 status codes are not retried (they're not transient failures)
-                logger.error(f"❌ Perplexity API returned status {response.status_code}: {response.text}")
-                return None
+        tag_span(model=payload.get("model"))
+        # Pooled keep-alive (HTTP/2 when available) client shared across calls and keys
+        client = get_httpx_client()
+        response = await client.post(self.api_url, json=payload, headers=headers)
+
+        if response.status_code == 200:
+            data = response.json()
+            self.last_raw_response = data
+            content = data["choices"][0]["message"]["content"]
+            logger.info(f"✅ Perplexity SUCCESS. Status Code: 200. Response Length: {len(content)} characters.")
+            return content
+        else:
+            # Non-200 status codes are not retried (they're not transient failures)
+            logger.error(f"❌ Perplexity API returned status {response.status_code}: {response.text}")
+            return None
@@ -0,0 +1,271 @@
+"""
+Persistent cache for Perplexity legal research.
+
+Delegates file many near-identical cases (EPIs, turnos, descansos) and each one
+used to pay for a full sonar-pro research call (20-60 s). ResearchCache stores
+research results in SQLite keyed on a normalized form of the facts plus the
+document type:
+
+- Normalization: lowercase, accents stripped, punctuation and Spanish stopwords
+  removed, light plural stemming; the key is the sorted token set
+- Exact hits skip the network entirely
+- Near-duplicates (token-set Jaccard similarity >= RESEARCH_CACHE_SIMILARITY)
+  are reused and reported in the final reply so the delegate knows the
+  research came from a similar case. Case creation runs unattended, so the
+  reuse cannot be offered and confirmed mid-pipeline; instead the default
+  threshold is strict (0.9) and facts that differ in a negation ("no", "sin",
+  "nunca"...) never match
+- Entries expire after RESEARCH_CACHE_TTL_HOURS; the least recently used
+  entries are evicted beyond RESEARCH_CACHE_MAX_ENTRIES
+- /research_cache (admin) shows stats and clears the cache
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+
+from src.config import (
+    RESEARCH_CACHE_DB_PATH,
+    RESEARCH_CACHE_TTL_HOURS,
+    RESEARCH_CACHE_MAX_ENTRIES,
+    RESEARCH_CACHE_SIMILARITY
+)
+
+logger = logging.getLogger(__name__)
+
+# Function words that carry no meaning for matching facts. Negations and
+# prepositions that change the facts ("no", "sin", "contra", "mas", "bajo"...)
+# are deliberately kept: "no pagó las horas extra" must not match "pagó las horas extra"
+SPANISH_STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante aqui asi aun bien cada como con
+cual cuando de del desde donde dos el ella ellas ellos en entre era eran es esa esas ese
+eso esos esta estaba estaban estan estar este esto estos fue fueron ha habia han hasta hay la las
+le les lo los me mi mis mucho muy nos nosotros o os otra otras otro otros para pero
+poco por porque que quien se sea segun ser si sido sobre solo son su sus tambien tan tanto te
+tiene tienen todo todos tu un una unas uno unos usted y ya yo
+""".split())
+
+# Tokens that flip the meaning of the facts: near-duplicates must agree on them
+POLARITY_TOKENS = frozenset("no ni sin nada nunca jamas ningun ninguna ninguno tampoco".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_cache (
+    key TEXT PRIMARY KEY,
+    document_type TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    research TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_research_type ON research_cache(document_type);
+CREATE INDEX IF NOT EXISTS idx_research_lru ON research_cache(last_used_at);
+"""
+
+
+def normalize_tokens(text: str) -> FrozenSet[str]:
+    """
+    Reduces free-text facts to a set of meaningful tokens.
+
+    Example:
+        >>> sorted(normalize_tokens("No nos dan los EPIs en los turnos de noche"))
+        ['dan', 'epis', 'no', 'noche', 'turno']
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = set()
+    for token in _TOKEN_RE.findall(text):
+        if token in SPANISH_STOPWORDS or len(token) < 2:
+            continue
+        # Light plural stemming: turnos -> turno, descansos -> descanso
+        if len(token) > 4 and token.endswith("s") and not token.isdigit():
+            token = token[:-1]
+        tokens.add(token)
+    return frozenset(tokens)
+
+
+def cache_key(tokens: FrozenSet[str], document_type: str) -> str:
+    """Stable key for a normalized token set and document type."""
+    raw = f"{document_type}|{' '.join(sorted(tokens))}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Token-set Jaccard similarity in [0, 1]."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class CacheHit:
+    """A cached research result and how closely its facts match the query."""
+    research: str
+    similarity: float
+    key: str
+
+    @property
+    def exact(self) -> bool:
+        return self.similarity >= 1.0
+
+
+class ResearchCache:
+    """
+    SQLite-backed research cache with TTL, LRU bound and near-duplicate lookup.
+    """
+
+    # Facts with fewer tokens are too vague for near-duplicate matching
+    MIN_TOKENS_FOR_SIMILARITY = 4
+
+    def __init__(self, db_path: str, ttl_seconds: float, max_entries: int, similarity_threshold: float):
+        """
+        Args:
+            db_path: Path of the SQLite file (':memory:' for an in-process cache)
+            ttl_seconds: Maximum age of an entry
+            max_entries: Maximum number of entries kept (least recently used evicted)
+            similarity_threshold: Minimum Jaccard similarity for a near-duplicate hit
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def lookup(self, facts: str, document_type: str) -> Optional[CacheHit]:
+        """
+        Finds cached research for the facts (exact match first, then near-duplicate).
+
+        Args:
+            facts: User-provided facts of the case
+            document_type: Document type the research was done for
+
+        Returns:
+            CacheHit, or None on a miss
+        """
+        tokens = normalize_tokens(facts)
+        if not tokens:
+            return None
+        key = cache_key(tokens, document_type)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("DELETE FROM research_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+
+            row = self._conn.execute("SELECT research FROM research_cache WHERE key = ?", (key,)).fetchone()
+            hit = CacheHit(row[0], 1.0, key) if row else None
+
+            if hit is None and len(tokens) >= self.MIN_TOKENS_FOR_SIMILARITY:
+                best_key, best_score, best_research = None, 0.0, None
+                rows = self._conn.execute(
+                    "SELECT key, tokens, research FROM research_cache WHERE document_type = ?",
+                    (document_type,)
+                )
+                for candidate_key, candidate_tokens, research in rows:
+                    candidate = frozenset(candidate_tokens.split())
+                    if (tokens ^ candidate) & POLARITY_TOKENS:
+                        continue
+                    score = jaccard(tokens, candidate)
+                    if score > best_score:
+                        best_key, best_score, best_research = candidate_key, score, research
+                if best_key and best_score >= self.similarity_threshold:
+                    hit = CacheHit(best_research, best_score, best_key)
+
+            if hit:
+                self._conn.execute(
+                    "UPDATE research_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+                    (now, hit.key)
+                )
+        return hit
+
+    def store(self, facts: str, document_type: str, research: str):
+        """
+        Caches research for the facts, evicting least recently used entries if needed.
+        """
+        tokens = normalize_tokens(facts)
+        if not tokens or not research:
+            return
+        key = cache_key(tokens, document_type)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO research_cache (key, document_type, tokens, research, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET research = excluded.research, "
+                "created_at = excluded.created_at, last_used_at = excluded.last_used_at",
+                (key, document_type, " ".join(sorted(tokens)), research, now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM research_cache WHERE key IN ("
+                "SELECT key FROM research_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, document_type: Optional[str] = None) -> int:
+        """
+        Removes cached research.
+
+        Args:
+            document_type: Only remove entries for this type (default: all)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if document_type:
+                cursor = self._conn.execute("DELETE FROM research_cache WHERE document_type = ?", (document_type,))
+            else:
+                cursor = self._conn.execute("DELETE FROM research_cache")
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, object]:
+        """Returns entry counts per document type, total hits and the oldest entry age in hours."""
+        with self._lock:
+            per_type = dict(self._conn.execute(
+                "SELECT document_type, COUNT(*) FROM research_cache GROUP BY document_type"
+            ).fetchall())
+            total_hits, oldest = self._conn.execute(
+                "SELECT COALESCE(SUM(hits), 0), MIN(created_at) FROM research_cache"
+            ).fetchone()
+        return {
+            "entries": sum(per_type.values()),
+            "per_type": per_type,
+            "hits": total_hits,
+            "oldest_age_hours": (time.time() - oldest) / 3600 if oldest else None,
+        }
+
+
+_cache: Optional[ResearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_research_cache() -> ResearchCache:
+    """Returns the process-wide research cache, opening RESEARCH_CACHE_DB_PATH on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResearchCache(
+                RESEARCH_CACHE_DB_PATH,
+                ttl_seconds=RESEARCH_CACHE_TTL_HOURS * 3600,
+                max_entries=RESEARCH_CACHE_MAX_ENTRIES,
+                similarity_threshold=RESEARCH_CACHE_SIMILARITY
+            )
+        return _cache
+
+
+__all__ = ['ResearchCache', 'CacheHit', 'get_research_cache', 'normalize_tokens', 'jaccard']
@@ -0,0 +1,36 @@
+"""
+Local legal knowledge: the BOE texts shipped in src/data (collective
+agreement), compiled into a memory-mapped index for retrieval.
+"""
+
+from src.legal.bm25 import BM25Index, tokenize
+from src.legal.convenio import LegalDocument, LegalSection, parse_convenio
+from src.legal.index_file import MappedLegalIndex, build_index_file, ensure_index_file
+from src.legal.retrieval import (
+    LegalHit,
+    LegalRetriever,
+    format_legal_context,
+    get_legal_retriever,
+    ensure_legal_index
+)
+from src.legal.citations import Citation, CitationReport, extract_citations, verify_citations
+
+__all__ = [
+    'BM25Index',
+    'tokenize',
+    'LegalDocument',
+    'LegalSection',
+    'parse_convenio',
+    'MappedLegalIndex',
+    'build_index_file',
+    'ensure_index_file',
+    'LegalHit',
+    'LegalRetriever',
+    'format_legal_context',
+    'get_legal_retriever',
+    'ensure_legal_index',
+    'Citation',
+    'CitationReport',
+    'extract_citations',
+    'verify_citations',
+]
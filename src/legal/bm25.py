@@ -0,0 +1,139 @@
+"""
+Okapi BM25 over an in-memory inverted index.
+
+The index maps each term to its postings (document, term frequency), so a
+query only touches the documents that contain at least one of its terms.
+BM25Index keeps it in memory; MappedLegalIndex (index_file.py) reads the same
+structure from a memory-mapped file.
+"""
+
+import math
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from src.integrations.research_cache import SPANISH_STOPWORDS
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Light Spanish suffix stripping, longest first: "acosa"/"acoso" -> "acos",
+# "teletrabajar"/"teletrabajo" -> "teletrabaj", "despido"/"despidieron" -> "despid"
+_SUFFIXES = ("aciones", "ieron", "acion", "aron", "ando", "iendo", "ados", "idos", "ado", "ido",
+             "ar", "er", "ir", "es", "os", "as", "a", "e", "o", "s")
+# Participle endings need a longer stem, or nouns lose part of the root
+# ("despido" -> "desp" instead of "despid")
+_PARTICIPLES = frozenset(("ados", "idos", "ado", "ido"))
+# Verbs whose stem vowel alternates e/i: "despedido"/"despedir" -> "despid"
+_STEM_ALIASES = {"desped": "despid"}
+
+
+def stem(token: str) -> str:
+    if token.isdigit():
+        return token
+    for suffix in _SUFFIXES:
+        min_stem = 5 if suffix in _PARTICIPLES else 4
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+            token = token[:-len(suffix)]
+            break
+    return _STEM_ALIASES.get(token, token)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normalizes text into BM25 terms (like the research cache keys, with more stemming).
+
+    Lowercase, accents stripped, stopwords and 1-character tokens removed,
+    light suffix stemming. Repeated terms are kept (term frequency matters).
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    terms = []
+    for token in _TOKEN_RE.findall(text):
+        if token in SPANISH_STOPWORDS or len(token) < 2:
+            continue
+        terms.append(stem(token))
+    return terms
+
+
+def idf(n_documents: int, document_frequency: int) -> float:
+    return math.log(1 + (n_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+class BM25Search(ABC):
+    """
+    BM25 scoring over an inverted index. Subclasses provide the postings and
+    document lengths (in memory, or read from the mapped file in index_file.py).
+    """
+
+    k1 = 1.5
+    b = 0.75
+    avg_length = 0.0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of documents."""
+        pass
+
+    @abstractmethod
+    def postings(self, term: str) -> Sequence[Tuple[int, int]]:
+        """(doc_id, term frequency) pairs of the documents containing term."""
+        pass
+
+    @abstractmethod
+    def doc_length(self, doc_id: int) -> int:
+        """Number of terms in a document."""
+        pass
+
+    def search(self, query_terms: Sequence[str], k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Scores the documents containing any query term.
+
+        Returns:
+            Up to k (doc_id, score) pairs, best first
+        """
+        n = len(self)
+        scores: Dict[int, float] = {}
+        for term in set(query_terms):
+            postings = self.postings(term)
+            if not postings:
+                continue
+            term_idf = idf(n, len(postings))
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_length(doc_id) / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class BM25Index(BM25Search):
+    """
+    In-memory inverted BM25 index over pre-tokenized documents.
+    """
+
+    def __init__(self, documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: One list of terms per document (see tokenize)
+            k1: Term-frequency saturation
+            b: Length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.doc_lengths) / len(documents)) if documents else 0.0
+        self.index: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, doc in enumerate(documents):
+            for term, tf in Counter(doc).items():
+                self.index.setdefault(term, []).append((doc_id, tf))
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def postings(self, term: str) -> Sequence[Tuple[int, int]]:
+        return self.index.get(term, ())
+
+    def doc_length(self, doc_id: int) -> int:
+        return self.doc_lengths[doc_id]
+
+
+__all__ = ['BM25Search', 'BM25Index', 'tokenize', 'stem', 'idf']
@@ -0,0 +1,255 @@
+"""
+Offline citation verifier for generated drafts.
+
+extract_citations() finds article references in a draft ("art. 34 ET",
+"artículos 22 y 23 del Convenio colectivo", "artículo 18 bis del convenio") and
+verify_citations() checks each one locally:
+
+- Texts held in the legal index (the convenio, or any statute whose BOE XML is
+  added to src/data) are checked article by article -> 'verified' / 'not_found'
+- Core labor statutes not held locally are checked against their article range
+  (ET 1-92, LRJS 1-305, ...) -> 'in_range' / 'not_found'
+- References to other laws -> 'unknown_law'; references without a law that
+  cannot be inherited from the previous citation -> 'ambiguous'
+
+The report says whether the remote verification round trip (Perplexity
+verify_draft + LLM refinement) is still needed: it is skipped only when every
+citation was verified against a text we hold. 'in_range' only says the article
+number exists, not that it supports the argument, so it still goes remote.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.legal.convenio import article_section_id
+from src.legal.retrieval import get_legal_retriever
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Statute:
+    """A statute that drafts cite by abbreviation or name."""
+    key: str
+    name: str
+    boe_id: str
+    articles: int
+    pattern: str
+
+
+# Patterns run on lowercased, accent-free text, right after the article numbers
+STATUTES: Dict[str, Statute] = {s.key: s for s in (
+    Statute("ET", "Estatuto de los Trabajadores", "BOE-A-2015-11430", 92,
+            r"(?:estatuto de los trabajadores|e\.\s?t\.|et\b|tret\b|let\b|(?:real decreto legislativo|rdl(?:eg)?\.?) 2/2015)"),
+    Statute("LRJS", "Ley Reguladora de la Jurisdicción Social", "BOE-A-2011-15936", 305,
+            r"(?:lrjs\b|ley reguladora de la jurisdiccion social|ley 36/2011)"),
+    Statute("LISOS", "Ley sobre Infracciones y Sanciones en el Orden Social", "BOE-A-2000-15060", 55,
+            r"(?:lisos\b|ley (?:sobre|de) infracciones y sanciones en el orden social|(?:real decreto legislativo|rdl(?:eg)?\.?) 5/2000)"),
+    Statute("LPRL", "Ley de Prevención de Riesgos Laborales", "BOE-A-1995-24292", 54,
+            r"(?:lprl\b|ley de prevencion de riesgos laborales|ley 31/1995)"),
+    Statute("LGSS", "Ley General de la Seguridad Social", "BOE-A-2015-11724", 373,
+            r"(?:lgss\b|ley general de la seguridad social|(?:real decreto legislativo|rdl(?:eg)?\.?) 8/2015)"),
+    Statute("LOLS", "Ley Orgánica de Libertad Sindical", "BOE-A-1985-16660", 15,
+            r"(?:lols\b|ley organica de libertad sindical|ley organica 11/1985)"),
+    Statute("CE", "Constitución Española", "BOE-A-1978-31229", 169,
+            r"(?:constitucion(?: espanola)?\b|ce\b)"),
+)}
+
+CONVENIO = "CONVENIO"
+_CONVENIO_RE = re.compile(r"(?:(?:del |el )?(?:presente |vigente |citado |mismo )?convenio(?: colectivo)?\b|cc\b)")
+_OTHER_LAW_RE = re.compile(r"(?:ley|real decreto|rd|orden|reglamento|directiva|l\.o\.|lo)\b[^.;,\n]{0,40}")
+_INHERIT_RE = re.compile(r"(?:de la |del |de dicho |de dicha |de la citada |del citado |de la misma |del mismo )?"
+                         r"(?:citad[ao]|mism[ao]|dich[ao]|referid[ao]|anterior)\b")
+
+_ACCENTS = str.maketrans("áéíóúüñÁÉÍÓÚÜÑ", "aeiouunAEIOUUN")
+
+_NUMBER = r"\d{1,3}(?:\s?(?:bis|ter|quater))?(?:\.\d{1,2})*(?:\s?[a-z]\))?"
+_ARTICLES_RE = re.compile(
+    rf"\b(?:art[ií]culos?|arts?\.)\s*(?P<numbers>{_NUMBER}(?:\s*(?:,|y|e|a|al|-)\s*{_NUMBER})*)",
+    re.IGNORECASE
+)
+_SINGLE_NUMBER_RE = re.compile(r"(\d{1,3})(?:\s?(bis|ter|quater))?((?:\.\d{1,2})*)", re.IGNORECASE)
+_LAW_CONNECTOR_RE = re.compile(
+    r"\s*,?\s*(?:apartados? [0-9a-z.)]+,?\s*)?(?:de la |del |de los |de |en el |en la )?"
+)
+
+# Statuses that send the draft to the remote verification round trip
+UNRESOLVED = ("not_found", "unknown_law", "ambiguous")
+
+
+@dataclass
+class Citation:
+    """One article reference found in a draft."""
+    text: str
+    article: str
+    law: Optional[str]
+    position: int
+    status: str = "ambiguous"
+    detail: str = ""
+
+    @property
+    def resolved(self) -> bool:
+        return self.status not in UNRESOLVED
+
+
+@dataclass
+class CitationReport:
+    """Result of the offline verification of a draft."""
+    citations: List[Citation] = field(default_factory=list)
+
+    @property
+    def unresolved(self) -> List[Citation]:
+        return [c for c in self.citations if not c.resolved]
+
+    @property
+    def needs_remote(self) -> bool:
+        """True unless there are citations and all of them were verified against local text."""
+        return not self.citations or any(c.status != "verified" for c in self.citations)
+
+    def to_dict(self) -> dict:
+        return {
+            "citations": [
+                {"text": c.text, "article": c.article, "law": c.law, "status": c.status, "detail": c.detail}
+                for c in self.citations
+            ],
+            "unresolved": len(self.unresolved),
+            "needs_remote": self.needs_remote,
+        }
+
+    def to_markdown(self) -> str:
+        """Report for the Notion audit log."""
+        icons = {"verified": "✅", "in_range": "☑️", "not_found": "❌", "unknown_law": "❓", "ambiguous": "❓"}
+        lines = [f"Verificación local de citas: {len(self.citations) - len(self.unresolved)}/{len(self.citations)} resueltas"]
+        for c in self.citations:
+            law = c.law or "?"
+            lines.append(f"{icons.get(c.status, '•')} Art. {c.article} {law} — {c.status}{': ' + c.detail if c.detail else ''}")
+        return "\n".join(lines)
+
+
+def _split_numbers(numbers: str) -> List[str]:
+    """'22 a 24' -> ['22', '23', '24']; '34.3 y 35' -> ['34', '35']; '18 bis' -> ['18 bis']."""
+    found = [(m.group(1) + (f" {m.group(2).lower()}" if m.group(2) else ""), m.start(), m.end())
+             for m in _SINGLE_NUMBER_RE.finditer(numbers)]
+    articles: List[str] = []
+    for i, (number, start, _) in enumerate(found):
+        gap = numbers[found[i - 1][2]:start] if i else ""
+        if re.fullmatch(r"\s*(?:a|al|-)\s*", gap) and number.isdigit() and articles and articles[-1].isdigit():
+            low, high = int(articles[-1]), int(number)
+            if 0 < high - low <= 20:
+                articles.extend(str(n) for n in range(low + 1, high + 1))
+                continue
+        articles.append(number)
+    return list(dict.fromkeys(articles))
+
+
+def _match_law(tail: str) -> Tuple[Optional[str], bool]:
+    """
+    Law referenced right after the article numbers.
+
+    Returns:
+        (law key, CONVENIO, 'OTHER:<text>' or None; whether the tail refers back to the previous law)
+    """
+    rest = tail[_LAW_CONNECTOR_RE.match(tail).end():]
+    for statute in STATUTES.values():
+        if re.match(statute.pattern, rest):
+            return statute.key, False
+    if _CONVENIO_RE.match(rest):
+        return CONVENIO, False
+    if _INHERIT_RE.match(rest):
+        return None, True
+    other = _OTHER_LAW_RE.match(rest)
+    if other:
+        return f"OTHER:{other.group(0).strip()}", False
+    return None, False
+
+
+def extract_citations(text: str) -> List[Citation]:
+    """
+    Finds article references in a draft.
+
+    A citation without a law inherits the previous one when the draft refers
+    back to it ("del citado Estatuto", "de la misma ley"). Repeated references
+    to the same article are reported once.
+    """
+    normalized = text.translate(_ACCENTS).lower()
+    citations: List[Citation] = []
+    seen = set()
+    previous_law: Optional[str] = None
+    for match in _ARTICLES_RE.finditer(normalized):
+        law, inherits = _match_law(normalized[match.end():match.end() + 80])
+        if law is None and inherits:
+            law = previous_law
+        if law and not law.startswith("OTHER:"):
+            previous_law = law
+        for article in _split_numbers(match.group("numbers")):
+            if (article, law) not in seen:
+                seen.add((article, law))
+                citations.append(Citation(text[match.start():match.end()], article, law, match.start()))
+    return citations
+
+
+def _resolve(citation: Citation, index, convenio_ids: List[str]):
+    if citation.law is None:
+        citation.status, citation.detail = "ambiguous", "sin norma identificable"
+        return
+    if citation.law.startswith("OTHER:"):
+        citation.status, citation.detail = "unknown_law", citation.law[len("OTHER:"):]
+        citation.law = None
+        return
+
+    section_id = article_section_id(citation.article)
+    if citation.law == CONVENIO:
+        if not convenio_ids:
+            citation.status, citation.detail = "ambiguous", "convenio no disponible localmente"
+            return
+        if any(index.find_section(identifier, section_id) is not None for identifier in convenio_ids):
+            citation.status = "verified"
+        else:
+            citation.status, citation.detail = "not_found", "el convenio no tiene ese artículo"
+        return
+
+    statute = STATUTES[citation.law]
+    if index is not None and statute.boe_id in index.identifiers:
+        found = index.find_section(statute.boe_id, section_id) is not None
+        citation.status = "verified" if found else "not_found"
+        citation.detail = "" if found else f"no existe en el texto de {citation.law}"
+        return
+    number = int(re.match(r"\d+", citation.article).group(0))
+    if 1 <= number <= statute.articles:
+        citation.status = "in_range"
+    else:
+        citation.status, citation.detail = "not_found", f"{citation.law} tiene {statute.articles} artículos"
+
+
+def verify_citations(text: str, index=None) -> CitationReport:
+    """
+    Extracts and checks the citations of a draft offline.
+
+    Args:
+        text: Draft content
+        index: MappedLegalIndex (default: the process-wide legal index; if it
+               cannot be loaded, only statute ranges are checked)
+
+    Returns:
+        CitationReport
+    """
+    report = CitationReport(extract_citations(text))
+    if not report.citations:
+        return report
+
+    if index is None:
+        try:
+            index = get_legal_retriever().index
+        except Exception as e:
+            logger.error(f"Legal index unavailable for citation checks: {e}")
+
+    statute_ids = {statute.boe_id for statute in STATUTES.values()}
+    convenio_ids = [i for i in (index.identifiers if index is not None else ()) if i not in statute_ids]
+    for citation in report.citations:
+        _resolve(citation, index, convenio_ids)
+    return report
+
+
+__all__ = ['Citation', 'CitationReport', 'Statute', 'STATUTES', 'extract_citations', 'verify_citations']
@@ -0,0 +1,145 @@
+"""
+Parser for BOE consolidated XML documents (convenio colectivo).
+
+The BOE XML keeps the whole text in <texto> as a flat sequence of <p> elements
+(the class tells headings from paragraphs) and <table> elements. parse_convenio
+groups it into sections: the preamble, one section per article and one per
+annex. The registering resolution that precedes the agreement is skipped.
+"""
+
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+_ARTICLE_RE = re.compile(r"^Art[ií]culo\s+(\d+(?:\s+(?:bis|ter|quater))?)\.?\s*(.*)$", re.IGNORECASE)
+
+
+@dataclass
+class LegalSection:
+    """An article (or preamble/annex) of a legal text, paragraphs kept verbatim."""
+    section_id: str
+    label: str
+    title: str
+    paragraphs: List[str] = field(default_factory=list)
+
+    @property
+    def heading(self) -> str:
+        return f"{self.label}. {self.title}" if self.title else self.label
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.paragraphs)
+
+
+@dataclass
+class LegalDocument:
+    """A parsed BOE document."""
+    identifier: str
+    title: str
+    sections: List[LegalSection]
+
+    def get(self, section_id: str) -> Optional[LegalSection]:
+        return next((s for s in self.sections if s.section_id == section_id), None)
+
+
+def _text(element: ET.Element) -> str:
+    return " ".join("".join(element.itertext()).split())
+
+
+def _slug(value: str, max_words: int = 4) -> str:
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    words = re.findall(r"[a-z0-9]+", ascii_value.lower())
+    return "-".join(words[:max_words])
+
+
+def article_section_id(number: str) -> str:
+    """Section ID of an article number: '23' -> 'art-23', '18 bis' -> 'art-18-bis'."""
+    return f"art-{_slug(number)}"
+
+
+def _table_rows(table: ET.Element) -> List[str]:
+    """Flattens a table into one ' | '-separated line per row (caption first)."""
+    rows = []
+    caption = table.find("caption")
+    if caption is not None and _text(caption):
+        rows.append(_text(caption))
+    for row in table.iter("tr"):
+        cells = [_text(cell) for cell in row if cell.tag in ("td", "th")]
+        if any(cells):
+            rows.append(" | ".join(cells))
+    return rows
+
+
+def parse_convenio(path: str) -> LegalDocument:
+    """
+    Parses a BOE XML collective agreement into sections.
+
+    Args:
+        path: Path of the BOE XML file (e.g., src/data/convenio_colectivo_ingenierias.xml)
+
+    Returns:
+        LegalDocument with the preamble, articles and annexes in document order
+    """
+    root = ET.parse(path).getroot()
+    identifier = root.findtext("metadatos/identificador", default="").strip()
+    title = " ".join(root.findtext("metadatos/titulo", default="").split())
+
+    sections: List[LegalSection] = []
+    current: Optional[LegalSection] = None
+    in_agreement = False
+    pending_annex: Optional[str] = None
+    annex_id = ""
+
+    body = root.find("texto")
+    for element in (body if body is not None else []):
+        if element.tag == "table":
+            if current is not None:
+                current.paragraphs.extend(_table_rows(element))
+            continue
+        if element.tag != "p":
+            continue
+
+        css = element.get("class", "")
+        content = _text(element)
+        if not content:
+            continue
+
+        if css == "anexo" and not in_agreement:
+            # Start of the agreement itself; everything before is the registering resolution
+            in_agreement = True
+            current = None
+            continue
+        if not in_agreement:
+            continue
+
+        if css == "centro_redonda" and current is None:
+            current = LegalSection(_slug(content), content.capitalize(), "")
+            sections.append(current)
+        elif css == "articulo":
+            match = _ARTICLE_RE.match(content)
+            if match:
+                number, article_title = match.group(1), match.group(2).strip()
+                current = LegalSection(article_section_id(number), f"Artículo {number}", article_title.rstrip("."))
+            else:
+                # Disposiciones, or numbered points of the minutes in the annexes
+                label, _, rest = content.partition(". ")
+                section_id = _slug(label) if not annex_id else f"{annex_id}-{_slug(label)}"
+                current = LegalSection(section_id, label.rstrip("."), rest.strip().rstrip("."))
+            sections.append(current)
+        elif css == "anexo_num":
+            pending_annex = content
+        elif css == "anexo_tit" and pending_annex:
+            annex_id = _slug(pending_annex)
+            number = pending_annex.split(maxsplit=1)[-1]
+            current = LegalSection(annex_id, f"Anexo {number}", content.rstrip("."))
+            sections.append(current)
+            pending_annex = None
+        elif current is not None:
+            current.paragraphs.append(content)
+
+    return LegalDocument(identifier, title, sections)
+
+
+__all__ = ['LegalSection', 'LegalDocument', 'parse_convenio', 'article_section_id']
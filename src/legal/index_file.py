@@ -0,0 +1,293 @@
+"""
+Prebuilt, memory-mapped legal index.
+
+Parsing the BOE XML corpus with ElementTree at every boot is slow and keeps the
+whole tree in memory. build_index_file() turns the corpus into one compact
+binary file; MappedLegalIndex memory-maps it and decodes only what a query
+touches, so cold start is a header read and RSS stays flat as texts are added.
+
+File layout (little endian, offsets absolute):
+
+    header     magic, format version, source hash, counts, average section
+               length and the offsets of the tables below
+    documents  n_documents x (identifier, title)               string refs
+    sections   n_sections  x (document, section_id, label, title, text,
+                              length in terms)
+    terms      n_terms     x (term, postings offset, document frequency),
+               sorted by term bytes (binary search)
+    postings   per term: df x (section, term frequency)
+    strings    UTF-8 string table; a string ref is (offset, length)
+
+The source hash covers the name and contents of every source file plus
+FORMAT_VERSION; ensure_index_file() rebuilds only when it changes. Bump
+FORMAT_VERSION when the layout, the parser or the tokenizer changes.
+
+Build ahead of time with scripts/maintenance/build_legal_index.py (the Docker
+image builds it at image build time).
+"""
+
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.legal.bm25 import BM25Search, tokenize
+from src.legal.convenio import LegalSection, parse_convenio
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MXLEGAL\x00"
+FORMAT_VERSION = 3
+
+# Heading terms are repeated so "Vacaciones" in a title outweighs a passing mention
+HEADING_WEIGHT = 3
+
+_HEADER = struct.Struct("<8sI32sIIId5Q")
+_DOCUMENT = struct.Struct("<QIQI")
+_SECTION = struct.Struct("<IQIQIQIQII")
+_TERM = struct.Struct("<QIQI")
+_POSTING = struct.Struct("<II")
+
+
+def source_hash(paths: Sequence[str]) -> bytes:
+    """SHA-256 over FORMAT_VERSION and the name and contents of each source file."""
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    for path in sorted(paths, key=os.path.basename):
+        with open(path, "rb") as f:
+            file_digest = hashlib.sha256(f.read()).digest()
+        digest.update(os.path.basename(path).encode() + b"\x00" + file_digest)
+    return digest.digest()
+
+
+def corpus_files(directory: str) -> List[str]:
+    """The BOE XML files of the legal corpus in a directory."""
+    return sorted(glob.glob(os.path.join(directory, "*.xml")))
+
+
+def section_terms(section: LegalSection) -> List[str]:
+    return tokenize(section.heading) * HEADING_WEIGHT + tokenize(section.text)
+
+
+class _StringTable:
+    def __init__(self):
+        self.data = bytearray()
+        self.refs: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, value: str) -> Tuple[int, int]:
+        ref = self.refs.get(value)
+        if ref is None:
+            encoded = value.encode("utf-8")
+            ref = (len(self.data), len(encoded))
+            self.data += encoded
+            self.refs[value] = ref
+        return ref
+
+
+def build_index_file(sources: Sequence[str], path: str) -> int:
+    """
+    Parses the XML sources and writes the index file atomically.
+
+    Args:
+        sources: BOE XML files (see parse_convenio)
+        path: Output file
+
+    Returns:
+        Number of indexed sections
+    """
+    strings = _StringTable()
+    documents, sections = [], []
+    for source in sources:
+        document = parse_convenio(source)
+        doc_idx = len(documents)
+        documents.append(strings.add(document.identifier or os.path.basename(source)) + strings.add(document.title))
+        for section in document.sections:
+            if section.paragraphs:
+                sections.append((doc_idx, section))
+
+    index: Dict[bytes, List[Tuple[int, int]]] = {}
+    section_records, total_length = [], 0
+    for section_idx, (doc_idx, section) in enumerate(sections):
+        terms = section_terms(section)
+        total_length += len(terms)
+        for term, tf in Counter(terms).items():
+            index.setdefault(term.encode("utf-8"), []).append((section_idx, tf))
+        section_records.append(_SECTION.pack(
+            doc_idx,
+            *strings.add(section.section_id),
+            *strings.add(section.label),
+            *strings.add(section.title),
+            *strings.add(section.text),
+            len(terms)
+        ))
+
+    documents_off = _HEADER.size
+    sections_off = documents_off + len(documents) * _DOCUMENT.size
+    terms_off = sections_off + len(section_records) * _SECTION.size
+    postings_off = terms_off + len(index) * _TERM.size
+
+    term_records, postings = [], bytearray()
+    for term in sorted(index):
+        term_off, term_len = strings.add(term.decode("utf-8"))
+        term_records.append(_TERM.pack(term_off, term_len, postings_off + len(postings), len(index[term])))
+        for section_idx, tf in index[term]:
+            postings += _POSTING.pack(section_idx, tf)
+    strings_off = postings_off + len(postings)
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, source_hash(sources),
+        len(documents), len(sections), len(index),
+        total_length / len(sections) if sections else 0.0,
+        documents_off, sections_off, terms_off, postings_off, strings_off
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for record in documents:
+                f.write(_DOCUMENT.pack(*record))
+            f.write(b"".join(section_records))
+            f.write(b"".join(term_records))
+            f.write(postings)
+            f.write(strings.data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(sections)
+
+
+def read_source_hash(path: str) -> Optional[bytes]:
+    """Source hash stored in an index file (None if missing, foreign or of another version)."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, stored_hash = _HEADER.unpack(raw)[:3]
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return stored_hash
+
+
+def ensure_index_file(sources: Sequence[str], path: str) -> bool:
+    """
+    Rebuilds the index file if it is missing or its sources changed.
+
+    Returns:
+        True if the file was (re)built
+    """
+    if read_source_hash(path) == source_hash(sources):
+        return False
+    count = build_index_file(sources, path)
+    logger.info(f"📚 Legal index rebuilt: {count} sections from {len(sources)} document(s) -> {path}")
+    return True
+
+
+class MappedLegalIndex(BM25Search):
+    """
+    Read-only view of an index file through mmap.
+
+    Term lookups binary-search the term table; sections are decoded on access
+    (the most recent ones are cached).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.source_hash, self.n_documents, self.n_sections, self.n_terms,
+         self.avg_length, self._documents_off, self._sections_off, self._terms_off,
+         self._postings_off, self._strings_off) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a legal index file (version {FORMAT_VERSION})")
+        self.section = lru_cache(maxsize=64)(self._read_section)
+        self._section_ids: Optional[Dict[Tuple[str, str], int]] = None
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return self.n_sections
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_off + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _section_record(self, section_idx: int) -> tuple:
+        return _SECTION.unpack_from(self._mm, self._sections_off + section_idx * _SECTION.size)
+
+    def doc_length(self, doc_id: int) -> int:
+        return self._section_record(doc_id)[-1]
+
+    def postings(self, term: str) -> Sequence[Tuple[int, int]]:
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            term_off, term_len, postings_off, df = _TERM.unpack_from(self._mm, self._terms_off + mid * _TERM.size)
+            start = self._strings_off + term_off
+            candidate = self._mm[start:start + term_len]
+            if candidate == key:
+                return list(_POSTING.iter_unpack(self._mm[postings_off:postings_off + df * _POSTING.size]))
+            if candidate < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return []
+
+    def document(self, doc_idx: int) -> Tuple[str, str]:
+        """(identifier, title) of a source document."""
+        id_off, id_len, title_off, title_len = _DOCUMENT.unpack_from(
+            self._mm, self._documents_off + doc_idx * _DOCUMENT.size
+        )
+        return self._string(id_off, id_len), self._string(title_off, title_len)
+
+    def section_document(self, section_idx: int) -> int:
+        return self._section_record(section_idx)[0]
+
+    @property
+    def identifiers(self) -> List[str]:
+        """Identifiers of the source documents (e.g., 'BOE-A-2023-6346')."""
+        return [self.document(i)[0] for i in range(self.n_documents)]
+
+    def find_section(self, identifier: str, section_id: str) -> Optional[int]:
+        """
+        Index of a section by document identifier and section ID (e.g., 'BOE-A-2023-6346', 'art-23').
+        """
+        if self._section_ids is None:
+            identifiers = self.identifiers
+            ids = {}
+            for i in range(self.n_sections):
+                record = self._section_record(i)
+                ids[(identifiers[record[0]], self._string(record[1], record[2]))] = i
+            self._section_ids = ids
+        return self._section_ids.get((identifier, section_id))
+
+    def _read_section(self, section_idx: int) -> LegalSection:
+        record = self._section_record(section_idx)
+        section_id, label, title, text = (self._string(*record[i:i + 2]) for i in (1, 3, 5, 7))
+        return LegalSection(section_id, label, title, text.split("\n"))
+
+
+__all__ = [
+    'build_index_file',
+    'ensure_index_file',
+    'read_source_hash',
+    'source_hash',
+    'corpus_files',
+    'section_terms',
+    'MappedLegalIndex',
+    'FORMAT_VERSION',
+]
@@ -0,0 +1,154 @@
+"""
+Retrieval of legal articles (collective agreement) for the facts of a case.
+
+The XML corpus in src/data is compiled into a memory-mapped index file (see
+index_file.py) that is rebuilt only when a source changes. search() returns the
+top-k sections in a few milliseconds; each hit carries a verbatim excerpt made
+of the paragraphs that best match the facts, in document order, so prompts can
+quote the agreement literally without sending whole 15 KB articles.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from src.config import (
+    LEGAL_CORPUS_DIR,
+    LEGAL_INDEX_PATH,
+    LEGAL_TOP_K,
+    LEGAL_MIN_SCORE,
+    LEGAL_MAX_EXCERPT_CHARS
+)
+from src.legal.bm25 import tokenize
+from src.legal.convenio import LegalSection
+from src.legal.index_file import MappedLegalIndex, corpus_files, ensure_index_file
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LegalHit:
+    """A legal section relevant to a case."""
+    section: LegalSection
+    score: float
+    excerpt: str
+    source: str = ""
+
+
+class LegalRetriever:
+    """
+    BM25 retriever over a mapped legal index.
+    """
+
+    def __init__(self, index: MappedLegalIndex):
+        self.index = index
+
+    @classmethod
+    def open(cls, sources: Sequence[str], path: str) -> "LegalRetriever":
+        """Maps the index file at path, rebuilding it first if the sources changed."""
+        start = time.perf_counter()
+        rebuilt = ensure_index_file(sources, path)
+        retriever = cls(MappedLegalIndex(path))
+        logger.info(
+            f"📚 Legal index {'built' if rebuilt else 'mapped'}: {len(retriever.index)} sections from "
+            f"{retriever.index.n_documents} document(s) in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return retriever
+
+    def search(
+        self,
+        facts: str,
+        k: int = LEGAL_TOP_K,
+        min_score: float = LEGAL_MIN_SCORE,
+        max_excerpt_chars: int = LEGAL_MAX_EXCERPT_CHARS
+    ) -> List[LegalHit]:
+        """
+        Finds the legal sections relevant to the facts of a case.
+
+        Args:
+            facts: Facts of the case (free text)
+            k: Maximum number of sections
+            min_score: Minimum BM25 score of a section
+            max_excerpt_chars: Size limit of each verbatim excerpt
+
+        Returns:
+            LegalHits, best first
+        """
+        terms = tokenize(facts)
+        if not terms:
+            return []
+        query = set(terms)
+        hits = []
+        for section_idx, score in self.index.search(terms, k):
+            if score < min_score:
+                continue
+            section = self.index.section(section_idx)
+            _, title = self.index.document(self.index.section_document(section_idx))
+            hits.append(LegalHit(section, score, self._excerpt(section, query, max_excerpt_chars), title))
+        return hits
+
+    @staticmethod
+    def _excerpt(section: LegalSection, query: set, max_chars: int) -> str:
+        """Best-matching paragraphs of a section, verbatim and in document order."""
+        if len(section.text) <= max_chars:
+            return section.text
+
+        ranked = sorted(
+            range(len(section.paragraphs)),
+            key=lambda i: (-len(query.intersection(tokenize(section.paragraphs[i]))), i)
+        )
+        chosen, used = {}, 0
+        for i in ranked:
+            paragraph = section.paragraphs[i]
+            if used + len(paragraph) > max_chars:
+                if chosen:
+                    continue
+                paragraph = paragraph[:max_chars].rsplit(" ", 1)[0] + " […]"
+            chosen[i] = paragraph
+            used += len(paragraph)
+
+        parts, previous = [], None
+        for i in sorted(chosen):
+            if previous is not None and i != previous + 1:
+                parts.append("[…]")
+            parts.append(chosen[i])
+            previous = i
+        return "\n".join(parts)
+
+
+def format_legal_context(hits: List[LegalHit]) -> str:
+    """
+    Formats hits as a prompt section quoting the legal texts literally.
+    """
+    if not hits:
+        return ""
+    sources = list(dict.fromkeys(hit.source for hit in hits if hit.source))
+    header = "".join(f"Fuente: {source}\n" for source in sources) + "\n" if sources else ""
+    blocks = [f"### {hit.section.heading}\n{hit.excerpt}" for hit in hits]
+    return header + "\n\n".join(blocks)
+
+
+_retriever: Optional[LegalRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_legal_retriever() -> LegalRetriever:
+    """Returns the process-wide retriever, mapping (and if needed building) the index on first use."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            sources = corpus_files(LEGAL_CORPUS_DIR)
+            if not sources:
+                raise FileNotFoundError(f"No legal XML files in {LEGAL_CORPUS_DIR}")
+            _retriever = LegalRetriever.open(sources, LEGAL_INDEX_PATH)
+        return _retriever
+
+
+def ensure_legal_index() -> bool:
+    """Builds the index file of the corpus if it is missing or stale (build step)."""
+    return ensure_index_file(corpus_files(LEGAL_CORPUS_DIR), LEGAL_INDEX_PATH)
+
+
+__all__ = ['LegalHit', 'LegalRetriever', 'format_legal_context', 'get_legal_retriever', 'ensure_legal_index']
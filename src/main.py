@@ -1,7 +1,26 @@
+import asyncio
 import logging
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
-from src.config import BOT_TOKEN
+from src.config import (
+    BOT_TOKEN,
+    BOT_MODE,
+    CASE_INDEX_SYNC_INTERVAL,
+    METRICS_EXPORTER_ENABLED,
+    METRICS_LISTEN,
+    METRICS_PORT,
+    LEGAL_INDEX_ENABLED
+)
 from src.logging_config import setup_logging
+from src.utils.executor import run_blocking, shutdown_executors, executor_queue_depths
+from src.utils.metrics_exporter import register_gauge, start_metrics_server
+from src.integrations.http_pool import close_http_sessions
+from src.webhook import run_webhook
+from src.integrations.case_index import case_index_sync_loop
+from src.utils.case_ids import reconcile_from_notion
+from src.utils.update_processor import ChatOrderedUpdateProcessor
+from src.legal import get_legal_retriever
+from src.handlers.base import notion
+from src.handlers.private import media_groups
 from src.handlers import (
     start,
     denuncia_handler,
@@ -13,12 +32,80 @@ from src.handlers import (
     update_handler,
     metrics_command,
     log_command,
+    research_cache_command,
+    trace_command,
     help_command,
     history_command
 )
+from src.pipeline import DOCUMENT_CONFIGS
 
 logger = logging.getLogger(__name__)
 
+# Long-running tasks started in on_startup and cancelled in on_shutdown
+_background_tasks = []
+_metrics_runner = None
+
+def register_runtime_gauges(application):
+    """Exposes queue depths of this process to the metrics exporter."""
+    register_gauge(
+        "update_queue_depth", "Telegram updates waiting to be dispatched.",
+        lambda: application.update_queue.qsize()
+    )
+    register_gauge(
+        "executor_queue_depth", "Blocking integration calls waiting for a thread.",
+        lambda: {(("integration", name),): depth for name, depth in executor_queue_depths().items()}
+    )
+    processor = application.update_processor
+    if isinstance(processor, ChatOrderedUpdateProcessor):
+        register_gauge(
+            "pipelines_queued", "Pipeline commands waiting for the in-flight pipeline cap.",
+            lambda: processor.pipelines_queued
+        )
+
+async def on_startup(application):
+    """Reconciles local state with Notion and starts background maintenance tasks."""
+    global _metrics_runner
+    if METRICS_EXPORTER_ENABLED:
+        register_runtime_gauges(application)
+        _metrics_runner = await start_metrics_server(METRICS_LISTEN, METRICS_PORT)
+
+    if LEGAL_INDEX_ENABLED:
+        # Map the legal index now (rebuilding it if the corpus changed) so the first pipeline does not pay for it
+        try:
+            await run_blocking('legal', get_legal_retriever)
+        except Exception as e:
+            logger.error(f"Could not load the legal index: {e}")
+
+    if notion.client:
+        prefixes = {config['case_prefix'] for config in DOCUMENT_CONFIGS.values()}
+        await run_blocking('notion', reconcile_from_notion, notion, sorted(prefixes))
+
+    if notion.index:
+        _background_tasks.append(
+            asyncio.create_task(case_index_sync_loop(notion, CASE_INDEX_SYNC_INTERVAL))
+        )
+        logger.info("🗂️ Notion case index sync started.")
+
+async def on_stop(application):
+    """Processes buffered albums while the bot can still reply (before shutdown)."""
+    await media_groups.drain()
+
+async def on_shutdown(application):
+    """Releases process-wide resources once the application has stopped."""
+    global _metrics_runner
+    if _metrics_runner:
+        await _metrics_runner.cleanup()
+        _metrics_runner = None
+
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+
+    shutdown_executors()
+    await close_http_sessions()
+    logger.info("🛑 Integration thread pools and HTTP sessions shut down.")
+
 def main():
     # Initialize Logging System
     setup_logging()
@@ -29,13 +116,24 @@ def main():
 
     logger.info("🤖 Initializing Marxnager Bot...")
 
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        # Pipelines run concurrently (capped); other commands never wait behind them
+        .concurrent_updates(ChatOrderedUpdateProcessor(pipeline_commands=DOCUMENT_CONFIGS.keys()))
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Command Handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("metrics", metrics_command))
     application.add_handler(CommandHandler("log", log_command))
+    application.add_handler(CommandHandler("research_cache", research_cache_command))
+    application.add_handler(CommandHandler("trace", trace_command))
     application.add_handler(CommandHandler("history", history_command))
     application.add_handler(CommandHandler("denuncia", denuncia_handler))
     application.add_handler(CommandHandler("demanda", demanda_handler))
@@ -51,8 +149,12 @@ def main():
         private_message_handler
     ))
 
-    logger.info("🚀 Bot started successfully. Listening for commands...")
-    application.run_polling()
+    if BOT_MODE == "webhook":
+        logger.info("🚀 Bot started in webhook mode.")
+        asyncio.run(run_webhook(application))
+    else:
+        logger.info("🚀 Bot started successfully. Listening for commands...")
+        application.run_polling()
 
 if __name__ == '__main__':
     main()
@@ -7,34 +7,55 @@ the common pattern while allowing handler-specific configuration.
 
 Pipeline Steps:
 1. Initialization - Generate case ID and load template
-2. Research - Query Perplexity AI for Spanish labor law research
+2. Research - Retrieve convenio articles locally and query Perplexity AI
+   for Spanish labor law research
 3. Document Generation - Generate document via OpenRouter LLM
 4. Drive Structure - Create Google Drive folder with subfolders
 5. Docs Creation - Create editable Google Doc with generated content
-6. Notion Entry - Create Notion database entry with links and content
-7. Finalization - Send Telegram summary card with deep link
+6. Notion Entry - Create the Notion database entry for the case
+7. Finalization - Link Drive/Doc and content in Notion, send Telegram summary
+
+The steps form a dependency graph (STEP_GRAPH) executed by DAGExecutor:
+Research starts immediately, while Drive Structure and Notion Entry only wait
+for the case ID, so Google/Notion provisioning overlaps the LLM calls.
 
 The pipeline is designed to be:
 - Atomic: Either completes all steps or rolls back completely
+- Concurrent: Independent steps run in parallel (see src/utils/dag.py)
 - Observable: Real-time progress updates via Telegram
 - Resilient: Automatic rollback on any step failure
+- Non-blocking: Notion/Google/Supabase SDK calls run in bounded per-integration
+  thread pools (see src/utils/executor.py), so concurrent pipelines overlap
 - Configurable: Handler-specific behavior via configuration dict
 """
 
 import re
+import time
 import logging
-from typing import Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from datetime import datetime
 
 from src.utils import (
-    generate_case_id,
     send_progress_message,
-    update_progress_message,
+    format_progress_text,
     RollbackManager,
     ProgressTracker
 )
+from src.utils.executor import run_blocking
+from src.utils.dag import DAGExecutor, PipelineStep
+from src.utils.case_ids import get_case_id_allocator
+from src.utils.progress_renderer import ProgressRenderer
+from src.utils.monitoring import pipeline_metrics
+from src.utils.tracing import start_trace, set_case_id, span, tag_span
+from src.config import (
+    STREAM_PROGRESS_INTERVAL,
+    PROGRESS_FLUSH_TIMEOUT,
+    LEGAL_INDEX_ENABLED,
+    LEGAL_SKIP_RESEARCH_SCORE
+)
+from src.legal import LegalHit, format_legal_context, get_legal_retriever
 from src.integrations.perplexity_client import PerplexityClient
 from src.integrations.openrouter_client import OpenRouterClient
 from src.integrations.supabase_client import DelegadoSupabaseClient
@@ -42,6 +63,18 @@ from src.template_loader import get_template_for_document_type
 from src.handlers.base import notion, drive, docs, logger
 from src.user_profile import UserProfileManager
 
+# Step dependency graph: step name -> steps it waits for.
+# Order of the keys is the display order in the progress message.
+STEP_GRAPH = {
+    "Initialization": [],
+    "Research": [],
+    "Document Generation": ["Initialization", "Research"],
+    "Drive Structure": ["Initialization"],
+    "Docs Creation": ["Document Generation", "Drive Structure"],
+    "Notion Entry": ["Initialization"],
+    "Finalization": ["Docs Creation", "Notion Entry"],
+}
+
 # Document type configurations
 DOCUMENT_CONFIGS = {
     'denuncia': {
@@ -55,7 +88,7 @@ DOCUMENT_CONFIGS = {
         'type_emoji': '📂',
         'type_name': 'Denuncia ITSS',
         'use_deep_link': True,
-        'update_links_in_finalization': False
+        'step_graph': STEP_GRAPH
     },
     'demanda': {
         'case_prefix': 'J',
@@ -68,7 +101,7 @@ DOCUMENT_CONFIGS = {
         'type_emoji': '⚖️',
         'type_name': 'Demanda',
         'use_deep_link': True,
-        'update_links_in_finalization': True  # Extra link update in finalization
+        'step_graph': STEP_GRAPH
     },
     'email': {
         'case_prefix': 'E',
@@ -81,11 +114,37 @@ DOCUMENT_CONFIGS = {
         'type_emoji': '📧',
         'type_name': 'Email RRHH',
         'use_deep_link': False,  # No deep link for emails
-        'update_links_in_finalization': False
+        'step_graph': STEP_GRAPH
     }
 }
 
 
+# Research text sent to the LLM when Perplexity was skipped (Notion still stores the articles)
+LOCAL_RESEARCH_NOTE = (
+    "No se ha realizado investigación externa. Fundamenta el documento en los artículos "
+    "del convenio colectivo aplicable incluidos a continuación y en la normativa laboral básica."
+)
+
+
+def find_convenio_articles(facts: str) -> List[LegalHit]:
+    """
+    Retrieves the convenio articles relevant to the facts (local BM25 index).
+
+    Never raises: the local index grounds the prompt but is not critical.
+    """
+    if not LEGAL_INDEX_ENABLED:
+        return []
+    try:
+        with span("legal.convenio_search", kind="local") as search_span:
+            hits = get_legal_retriever().search(facts)
+            if search_span:
+                search_span.set(hits=len(hits), top_score=round(hits[0].score, 1) if hits else None)
+            return hits
+    except Exception as e:
+        logger.error(f"Convenio search failed: {e}")
+        return []
+
+
 async def execute_document_pipeline(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
@@ -108,238 +167,271 @@ async def execute_document_pipeline(
         ValueError: If template loading fails or document generation fails
         Exception: Propagates API failures with automatic rollback
 
-    Pipeline Flow:
+    Pipeline Flow (steps on the same line run concurrently):
         1. Initialize: Generate case ID (D/J/E-2026-XXX) and load template
-        2. Research: Query Perplexity AI for legal context
-        3. Generate: Fill template via OpenRouter LLM
-        4. Drive: Create Google Drive folder with subfolders
-        5. Docs: Create editable Google Doc
-        6. Notion: Create database entry with links and content
-        7. Finalize: Send Telegram summary with deep link
+           | Research: Query Perplexity AI for legal context
+        2. Drive: Create Google Drive folder with subfolders
+           | Notion: Create database entry
+           | Generate: Fill template via OpenRouter LLM (needs research)
+        3. Docs: Create editable Google Doc (needs draft and folder)
+        4. Finalize: Add links and content to Notion, send Telegram summary
     """
+    # One trace per run; bound to the case ID once Initialization allocates it
+    with start_trace(f"pipeline.{document_type}", document_type=document_type, user_id=update.effective_user.id):
+        await _run_document_pipeline(update, context, document_type, context_args)
+
+
+async def _run_document_pipeline(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    document_type: str,
+    context_args: str
+) -> None:
+    """Pipeline body of execute_document_pipeline (runs inside its trace)."""
     # Validate document type
     if document_type not in DOCUMENT_CONFIGS:
         raise ValueError(f"Unknown document type: {document_type}")
 
     config = DOCUMENT_CONFIGS[document_type]
+    step_graph = config['step_graph']
     user = update.effective_user.first_name
 
     # Define steps for progress tracking
-    steps = [
-        "Initialization",
-        "Research",
-        "Document Generation",
-        "Drive Structure",
-        "Docs Creation",
-        "Notion Entry",
-        "Finalization"
-    ]
-    tracker = ProgressTracker(steps)
+    steps = list(step_graph.keys())
+    tracker = ProgressTracker(steps, name=document_type)
 
     # Initialize progress message
     message_id = await send_progress_message(update, steps)
     chat_id = update.effective_chat.id
     rollback = RollbackManager()
 
-    async def refresh_progress():
-        """Helper to update progress message with current status."""
-        await update_progress_message(context, chat_id, message_id, tracker.get_steps_status())
+    # Coalesced, rate-limited edits of the progress message on every tracker change
+    renderer = ProgressRenderer(
+        context.bot, chat_id, message_id,
+        initial_text=format_progress_text(tracker.get_steps_status())
+    )
+    tracker.attach_renderer(renderer)
 
     # Initialize AI clients
     pplx_client = PerplexityClient()
     openrouter_client = OpenRouterClient()
     supabase_client = DelegadoSupabaseClient()
 
-    # Pipeline state
-    case_id = None
-    template = None
-    research = None
-    draft_content = None
-    safe_summary = None
-    full_title = None
-    drive_link = None
-    folder_id = None
-    doc_link = None
-    notion_page_id = None
+    # Pipeline state shared by the step functions
+    state: Dict[str, Any] = {
+        'case_id': None,
+        'template': None,
+        'research': None,
+        'research_cache_hit': None,
+        'research_local_only': False,
+        'legal_hits': [],
+        'legal_context': None,
+        'draft_content': None,
+        'safe_summary': None,
+        'full_title': None,
+        'drive_link': None,
+        'folder_id': None,
+        'doc_link': None,
+        'notion_page_id': None,
+    }
 
-    try:
-        # ========== STEP 1: INITIALIZATION ==========
-        tracker.start_step("Initialization")
-        await refresh_progress()
-        try:
-            last_id = notion.get_last_case_id(config['case_prefix'])
-            case_id = generate_case_id(config['case_prefix'], last_id)
-
-            # Load user profile and inject into template
-            user_id = update.effective_user.id
-            profile_manager = UserProfileManager(supabase_client=supabase_client)
-            user_profile = profile_manager.get_profile(user_id)
-
-            if not user_profile:
-                logger.warning(f"No profile found for user {user_id}, using template with hardcoded data")
-                # Fall back to template without profile injection
-                template = get_template_for_document_type(document_type, user_profile=None)
-            else:
-                logger.info(f"Loaded profile for user {user_id}: {user_profile.nombre}")
-                template = get_template_for_document_type(document_type, user_profile=user_profile)
-
-            if not template:
-                raise ValueError(f"No se pudo cargar la plantilla de {document_type}")
-
-            tracker.complete_step("Initialization")
-            await refresh_progress()
-        except Exception as e:
-            tracker.fail_step("Initialization")
-            await refresh_progress()
-            rollback.trigger_failure("Initialization", e)
-            raise e
-
-        # ========== STEP 2: RESEARCH (PERPLEXITY) ==========
-        tracker.start_step("Research")
-        await refresh_progress()
-        try:
-            research = await pplx_client.research_case(context_args, document_type=document_type)
-            if not research:
+    # ========== STEP: INITIALIZATION ==========
+    async def initialization():
+        # Local atomic sequence: no Notion round trip, no duplicate IDs under concurrency
+        state['case_id'] = await run_blocking(
+            'case_ids', get_case_id_allocator().allocate, config['case_prefix']
+        )
+        set_case_id(state['case_id'])
+
+        # Generate safe summary for folder title
+        summary = context_args[:80].replace('\n', ' ') + "..." if len(context_args) > 80 else context_args
+        state['safe_summary'] = re.sub(r'[<>:"/\\|?*]', '', summary).strip()
+        state['full_title'] = f"{state['case_id']} - {state['safe_summary']}"
+
+        # Load user profile and inject into template
+        user_id = update.effective_user.id
+        profile_manager = UserProfileManager(supabase_client=supabase_client)
+        user_profile = await run_blocking('supabase', profile_manager.get_profile, user_id)
+
+        if not user_profile:
+            logger.warning(f"No profile found for user {user_id}, using template with hardcoded data")
+            # Fall back to template without profile injection
+            state['template'] = get_template_for_document_type(document_type, user_profile=None)
+        else:
+            logger.info(f"Loaded profile for user {user_id}: {user_profile.nombre}")
+            state['template'] = get_template_for_document_type(document_type, user_profile=user_profile)
+
+        if not state['template']:
+            raise ValueError(f"No se pudo cargar la plantilla de {document_type}")
+
+    # ========== STEP: RESEARCH (CONVENIO + PERPLEXITY) ==========
+    async def research_step():
+        # The local convenio is always consulted first (milliseconds)
+        hits = find_convenio_articles(context_args)
+        state['legal_hits'] = hits
+        state['legal_context'] = format_legal_context(hits) or None
+
+        if hits and LEGAL_SKIP_RESEARCH_SCORE > 0 and hits[0].score >= LEGAL_SKIP_RESEARCH_SCORE:
+            logger.info(f"📚 Convenio hit {hits[0].section.label} ({hits[0].score:.1f}): skipping Perplexity")
+            tag_span(research_source="convenio")
+            state['research'] = state['legal_context']
+            state['research_local_only'] = True
+            return
+
+        state['research'] = await pplx_client.research_case(context_args, document_type=document_type)
+        if not state['research']:
+            if not hits:
                 raise ValueError(f"Perplexity no pudo completar la investigación para {document_type}")
-            tracker.complete_step("Research")
-            await refresh_progress()
-        except Exception as e:
-            tracker.fail_step("Research")
-            await refresh_progress()
-            rollback.trigger_failure("Research", e)
-            raise e
-
-        # ========== STEP 3: DOCUMENT GENERATION ==========
-        tracker.start_step("Document Generation")
-        await refresh_progress()
-        try:
-            draft_content = await openrouter_client.generate_from_template(
-                template=template,
-                context=context_args,
-                research=research
-            )
-            if not draft_content or len(draft_content) < config['min_content_length']:
-                raise ValueError("El documento generado es demasiado corto")
-
-            # Generate safe summary for folder title
-            summary = context_args[:80].replace('\n', ' ') + "..." if len(context_args) > 80 else context_args
-            safe_summary = re.sub(r'[<>:"/\\|?*]', '', summary).strip()
-            full_title = f"{case_id} - {safe_summary}"
-
-            tracker.complete_step("Document Generation")
-            await refresh_progress()
-        except Exception as e:
-            tracker.fail_step("Document Generation")
-            await refresh_progress()
-            rollback.trigger_failure("Document Generation", e)
-            raise e
-
-        # ========== STEP 4: DRIVE STRUCTURE ==========
-        tracker.start_step("Drive Structure")
-        await refresh_progress()
-        try:
-            drive_link, folder_id = None, None
-            if not drive.service:
-                logger.warning("Drive service not initialized. Skipping Drive creation.")
-                tracker.fail_step("Drive Structure")
-            else:
-                drive_link, folder_id = drive.create_case_folder(
-                    case_id,
-                    safe_summary,
-                    case_type=config['case_type']
-                )
-                if folder_id:
-                    rollback.set_drive_folder(folder_id)
-                    # Create subfolders if configured
-                    for subfolder in config['subfolders']:
-                        drive.create_subfolder(folder_id, subfolder)
-                    tracker.complete_step("Drive Structure")
-                else:
-                    raise ValueError("Falló la creación de la carpeta en Drive")
-
-            await refresh_progress()
-        except Exception as e:
+            logger.warning(f"Perplexity failed for {document_type}; continuing with convenio articles only")
+            state['research'] = state['legal_context']
+            state['research_local_only'] = True
+            return
+        state['research_cache_hit'] = pplx_client.last_cache_hit
+
+    # ========== STEP: DOCUMENT GENERATION ==========
+    async def document_generation():
+        last_preview_at = 0.0
+
+        async def on_draft_progress(model: str, chars: int, tail: str):
+            """Throttled live preview of the streamed draft in the progress message."""
+            nonlocal last_preview_at
+            now = time.monotonic()
+            if now - last_preview_at < STREAM_PROGRESS_INTERVAL:
+                return
+            last_preview_at = now
+            preview = " ".join(tail.split())[-60:]
+            tracker.set_detail("Document Generation", f"{chars:,} caracteres · …{preview}")
+
+        draft_content = await openrouter_client.generate_from_template(
+            template=state['template'],
+            context=context_args,
+            research=LOCAL_RESEARCH_NOTE if state['research_local_only'] else state['research'],
+            on_progress=on_draft_progress,
+            legal_context=state['legal_context']
+        )
+        if not draft_content or len(draft_content) < config['min_content_length']:
+            raise ValueError("El documento generado es demasiado corto")
+        state['draft_content'] = draft_content
+
+    # ========== STEP: DRIVE STRUCTURE ==========
+    async def drive_structure():
+        if not drive.service:
+            logger.warning("Drive service not initialized. Skipping Drive creation.")
             tracker.fail_step("Drive Structure")
-            await refresh_progress()
-            rollback.trigger_failure("Drive Structure", e)
-            logger.error(f"Drive step failed: {e}")
-
-        # ========== STEP 5: DOCS CREATION ==========
-        tracker.start_step("Docs Creation")
-        await refresh_progress()
-        try:
-            doc_link = None
-            if not docs.service:
-                logger.warning("Docs service not initialized. Skipping Doc creation.")
-                tracker.fail_step("Docs Creation")
-            elif not folder_id:
-                logger.warning("No Drive folder available. Skipping Doc creation.")
-                tracker.fail_step("Docs Creation")
-            else:
-                doc_link = docs.create_draft_document(full_title, draft_content, folder_id)
-                if doc_link:
-                    tracker.complete_step("Docs Creation")
-                else:
-                    raise ValueError("Falló la creación del documento de Google")
-
-            await refresh_progress()
-        except Exception as e:
+            return
+
+        drive_link, folder_id = await run_blocking(
+            'drive',
+            drive.create_case_folder,
+            state['case_id'],
+            state['safe_summary'],
+            case_type=config['case_type']
+        )
+        if not folder_id:
+            raise ValueError("Falló la creación de la carpeta en Drive")
+
+        rollback.set_drive_folder(folder_id)
+        state['drive_link'], state['folder_id'] = drive_link, folder_id
+        # Create subfolders if configured (one batch round trip)
+        if config['subfolders']:
+            subfolders = await run_blocking('drive', drive.create_subfolders, folder_id, config['subfolders'])
+            missing = [name for name, subfolder_id in subfolders.items() if not subfolder_id]
+            if missing:
+                logger.warning(f"Subfolders not created for {state['case_id']}: {', '.join(missing)}")
+
+    # ========== STEP: DOCS CREATION ==========
+    async def docs_creation():
+        if not docs.service:
+            logger.warning("Docs service not initialized. Skipping Doc creation.")
+            tracker.fail_step("Docs Creation")
+            return
+        if not state['folder_id']:
+            logger.warning("No Drive folder available. Skipping Doc creation.")
             tracker.fail_step("Docs Creation")
-            await refresh_progress()
-            rollback.trigger_failure("Docs Creation", e)
-            logger.error(f"Docs step failed: {e}")
+            return
 
-        # ========== STEP 6: NOTION ENTRY ==========
-        tracker.start_step("Notion Entry")
-        await refresh_progress()
+        doc_link = await run_blocking(
+            'docs', docs.create_draft_document, state['full_title'], state['draft_content'], state['folder_id']
+        )
+        if not doc_link:
+            raise ValueError("Falló la creación del documento de Google")
+        state['doc_link'] = doc_link
+
+    # ========== STEP: NOTION ENTRY ==========
+    async def notion_entry():
+        notion_page_id = await run_blocking('notion', notion.create_case_page, {
+            "id": state['case_id'],
+            "title": state['full_title'],
+            "type": config['notion_type'],
+            "status": "Borrador",
+            "created_at": datetime.now(),
+            "initial_context": context_args
+        })
+        if not notion_page_id:
+            raise ValueError("Falló la creación de la página en Notion")
+        rollback.set_notion_page(notion_page_id)
+        state['notion_page_id'] = notion_page_id
+
+    # ========== STEP: FINALIZATION ==========
+    async def finalization():
+        notion_page_id = state['notion_page_id']
+        drive_link, doc_link = state['drive_link'], state['doc_link']
+
+        # Link the Drive folder and Doc now that both provisioning branches are done
+        if drive_link or doc_link:
+            await run_blocking('notion', notion.update_page_links, notion_page_id, drive_link, doc_link)
+
+        # Append content blocks
         try:
-            notion_page_id = notion.create_case_page({
-                "id": case_id,
-                "title": full_title,
-                "type": config['notion_type'],
-                "status": "Borrador",
-                "created_at": datetime.now(),
-                "initial_context": context_args
-            })
-            if not notion_page_id:
-                raise ValueError("Falló la creación de la página en Notion")
-            rollback.set_notion_page(notion_page_id)
-
-            # Update links immediately
-            if drive_link or doc_link:
-                notion.update_page_links(notion_page_id, drive_link, doc_link)
-
-            # Append content blocks
-            try:
-                if research or draft_content:
-                    notion.append_content_blocks(notion_page_id, research, draft_content)
-            except Exception as e:
-                logger.error(f"Failed to append content blocks: {e}")
-
-            tracker.complete_step("Notion Entry")
-            await refresh_progress()
+            if state['research'] or state['draft_content']:
+                await run_blocking(
+                    'notion', notion.append_content_blocks,
+                    notion_page_id, state['research'], state['draft_content']
+                )
         except Exception as e:
-            tracker.fail_step("Notion Entry")
-            await refresh_progress()
-            rollback.trigger_failure("Notion Entry", e)
-            raise e
-
-        # ========== STEP 7: FINALIZATION ==========
-        tracker.start_step("Finalization")
-        await refresh_progress()
-        try:
-            # Some document types (e.g., demanda) update links again in finalization
-            if config['update_links_in_finalization'] and notion_page_id:
-                if drive_link or doc_link:
-                    notion.update_page_links(notion_page_id, drive_link, doc_link)
+            logger.error(f"Failed to append content blocks: {e}")
+
+    step_functions = {
+        "Initialization": initialization,
+        "Research": research_step,
+        "Document Generation": document_generation,
+        "Drive Structure": drive_structure,
+        "Docs Creation": docs_creation,
+        "Notion Entry": notion_entry,
+        "Finalization": finalization,
+    }
+    # Drive and Docs failures are tolerated (the case is still usable from Notion).
+    non_critical_steps = {"Drive Structure", "Docs Creation"}
+    # LLM-only steps create no artifacts, so they can be cancelled on failure.
+    cancellable_steps = {"Research", "Document Generation"}
+
+    executor = DAGExecutor(
+        [
+            PipelineStep(
+                name=name,
+                run=step_functions[name],
+                depends_on=deps,
+                critical=name not in non_critical_steps,
+                cancellable=name in cancellable_steps
+            )
+            for name, deps in step_graph.items()
+        ],
+        tracker,
+        rollback
+    )
+
+    pipeline_metrics.pipeline_started(document_type)
+    succeeded = False
+    try:
+        await executor.run()
 
-            tracker.complete_step("Finalization")
-            await refresh_progress()
-        except Exception as e:
-            tracker.fail_step("Finalization")
-            await refresh_progress()
-            rollback.trigger_failure("Finalization", e)
-            raise e
+        case_id = state['case_id']
+        safe_summary = state['safe_summary']
+        notion_page_id = state['notion_page_id']
+        drive_link, doc_link = state['drive_link'], state['doc_link']
+
+        # Make sure the progress message shows the final state before replying
+        await renderer.flush(timeout=PROGRESS_FLUSH_TIMEOUT)
 
         # ========== FINAL RESPONSE ==========
         response = (
@@ -354,6 +446,17 @@ async def execute_document_pipeline(
 
         response += "\n"
 
+        cache_hit = state['research_cache_hit']
+        if cache_hit and not cache_hit.exact:
+            response += f"♻️ Investigación reutilizada de un caso similar ({cache_hit.similarity:.0%})\n"
+        elif cache_hit:
+            response += "♻️ Investigación reutilizada de la caché\n"
+
+        if state['legal_hits']:
+            articles = ", ".join(hit.section.label for hit in state['legal_hits'])
+            source = "solo convenio" if state['research_local_only'] else "convenio"
+            response += f"📚 *Fuentes ({source}):* {articles}\n"
+
         if notion_page_id:
             response += f"🔗 [Ver en Notion](https://notion.so/{notion_page_id.replace('-', '')})\n"
 
@@ -376,13 +479,16 @@ async def execute_document_pipeline(
             reply_markup = InlineKeyboardMarkup(keyboard)
 
         await update.message.reply_text(response, parse_mode='Markdown', reply_markup=reply_markup)
+        succeeded = True
 
         # Log event to Supabase for /history command
         if supabase_client.is_enabled():
             try:
                 user_id = update.effective_user.id
                 event_text = f"Se creó {config['type_name']} con ID {case_id}: {safe_summary}"
-                supabase_client.log_event(
+                await run_blocking(
+                    'supabase',
+                    supabase_client.log_event,
                     user_id=user_id,
                     event_text=event_text,
                     case_id=case_id,
@@ -396,12 +502,11 @@ async def execute_document_pipeline(
     except Exception as e:
         logger.error(f"execute_document_pipeline failed for {document_type}: {e}", exc_info=True)
 
-        # Mark current pending step as failed
+        # Mark any step still running as failed
         for s in tracker.steps:
-            if tracker.status[s] == "in_progress" or tracker.status[s] == "pending":
+            if tracker.status[s] == "in_progress":
                 tracker.fail_step(s)
-                break
-        await update_progress_message(context, chat_id, message_id, tracker.get_steps_status())
+        await renderer.flush(timeout=PROGRESS_FLUSH_TIMEOUT)
 
         # Execute rollback
         rollback_report = await rollback.execute_rollback()
@@ -409,5 +514,8 @@ async def execute_document_pipeline(
 
         raise e
 
+    finally:
+        pipeline_metrics.pipeline_finished(document_type, succeeded)
+
 
-__all__ = ['execute_document_pipeline', 'DOCUMENT_CONFIGS']
+__all__ = ['execute_document_pipeline', 'DOCUMENT_CONFIGS', 'STEP_GRAPH']
@@ -1,9 +1,12 @@
+import asyncio
 import time
 from datetime import datetime
 import random
 import os
 from telegram.error import BadRequest
+from telegram.helpers import escape_markdown
 import logging
+from src.utils.monitoring import pipeline_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -11,40 +14,81 @@ class ProgressTracker:
     """
     Manages the state and timing of multiple execution steps.
     """
-    def __init__(self, steps: list):
+    def __init__(self, steps: list, name: str = None):
+        """
+        Args:
+            steps: Step names, in display order
+            name: Pipeline name; when set, step outcomes and durations are
+                  recorded in pipeline_metrics
+        """
         self.steps = steps
+        self.name = name
         self.status = {step: "pending" for step in steps}
         self.start_times = {}
         self.elapsed_times = {}
+        self.details = {}
+        self.renderer = None
+
+    def attach_renderer(self, renderer):
+        """
+        Attaches a ProgressRenderer that is notified on every state change.
+        """
+        self.renderer = renderer
+        self._render()
+
+    def _render(self):
+        if self.renderer is not None:
+            self.renderer.request_render(self.get_steps_status())
 
     def start_step(self, step_name: str):
         if step_name in self.status:
             self.status[step_name] = "in_progress"
             self.start_times[step_name] = time.time()
             logger.info(f"⏳ Starting step: {step_name}")
+            self._render()
+
+    def set_detail(self, step_name: str, detail: str):
+        """Sets a short live detail line for a running step (cleared when it ends)."""
+        if step_name in self.status:
+            self.details[step_name] = detail
+            self._render()
 
     def complete_step(self, step_name: str):
         if step_name in self.status:
             self.status[step_name] = "completed"
+            self.details.pop(step_name, None)
+            elapsed = None
             if step_name in self.start_times:
                 elapsed = time.time() - self.start_times[step_name]
                 self.elapsed_times[step_name] = f"{elapsed:.1f}s"
             logger.info(f"✅ Completed step: {step_name} in {self.elapsed_times.get(step_name, '0s')}")
+            if self.name:
+                pipeline_metrics.record_step(self.name, step_name, elapsed, success=True)
+            self._render()
 
     def fail_step(self, step_name: str):
         if step_name in self.status:
             self.status[step_name] = "failed"
+            self.details.pop(step_name, None)
             logger.error(f"❌ Failed step: {step_name}")
+            if self.name:
+                elapsed = time.time() - self.start_times[step_name] if step_name in self.start_times else None
+                pipeline_metrics.record_step(self.name, step_name, elapsed, success=False)
+            self._render()
 
     def get_steps_status(self) -> list:
         """
         Returns a list of [step_name, status, elapsed] for all steps.
+        Steps with a live detail get it appended as a fourth element.
         """
         result = []
         for step in self.steps:
             status = self.status[step]
             elapsed = self.elapsed_times.get(step)
-            result.append([step, status, elapsed])
+            item = [step, status, elapsed]
+            if step in self.details:
+                item.append(self.details[step])
+            result.append(item)
         return result
 
 def generate_case_id(type_prefix="D", last_id=None):
@@ -116,16 +160,16 @@ async def send_progress_message(update, steps):
     sent_message = await update.message.reply_text(message_text, parse_mode='Markdown')
     return sent_message.message_id
 
-async def update_progress_message(context, chat_id, message_id, steps_status):
+def format_progress_text(steps_status):
     """
-    Updates the existing progress message with the current status of each step.
-    
+    Builds the Markdown text of a progress message.
+
     Args:
-        context: The Telegram Context object.
-        chat_id (int): The ID of the chat.
-        message_id (int): The ID of the message to edit.
-        steps_status (list of tuples): List of (step_name, status, [optional_elapsed]).
+        steps_status (list of tuples): List of (step_name, status, [optional_elapsed], [optional_detail]).
                                        Status can be "pending", "in_progress", "completed", "failed".
+
+    Returns:
+        str: The message text.
     """
     formatted_steps = []
     
@@ -133,6 +177,7 @@ async def update_progress_message(context, chat_id, message_id, steps_status):
         step_name = item[0]
         status = item[1]
         elapsed = item[2] if len(item) > 2 else None
+        detail = item[3] if len(item) > 3 else None
 
         if status == "completed":
             time_info = f" `({elapsed})`" if elapsed else ""
@@ -141,10 +186,28 @@ async def update_progress_message(context, chat_id, message_id, steps_status):
             formatted_steps.append(f"❌ *{step_name}*")
         elif status == "in_progress":
             formatted_steps.append(f"⏳ *{step_name}*")
+            if detail:
+                formatted_steps.append(f"      └ _{escape_markdown(detail, version=1)}_")
         else: # pending
             formatted_steps.append(f"⬜ {step_name}")
             
-    message_text = f"🔄 *Procesando solicitud...*\n\n" + "\n".join(formatted_steps)
+    return f"🔄 *Procesando solicitud...*\n\n" + "\n".join(formatted_steps)
+
+async def update_progress_message(context, chat_id, message_id, steps_status):
+    """
+    Updates the existing progress message with the current status of each step.
+
+    For pipelines, prefer attaching a ProgressRenderer (src/utils/progress_renderer.py)
+    to the ProgressTracker: it coalesces updates and respects Telegram edit limits.
+    
+    Args:
+        context: The Telegram Context object.
+        chat_id (int): The ID of the chat.
+        message_id (int): The ID of the message to edit.
+        steps_status (list of tuples): List of (step_name, status, [optional_elapsed], [optional_detail]).
+                                       Status can be "pending", "in_progress", "completed", "failed".
+    """
+    message_text = format_progress_text(steps_status)
     
     try:
         await context.bot.edit_message_text(
@@ -192,22 +255,27 @@ class RollbackManager:
         Deletes all tracked artifacts and returns a detailed status message.
         """
         from src.integrations.cleanup_helper import delete_notion_page, delete_drive_object
+        from src.utils.executor import run_blocking
         
-        reverted_items = []
-        
-        # Note: Deleting a folder in Drive also deletes the Docs inside it.
-        # But we track doc_id just in case or for granular reporting.
-        
-        if self.drive_folder_id:
-            if delete_drive_object(self.drive_folder_id):
-                reverted_items.append("Carpeta en Drive eliminada")
-        elif self.doc_id:
-            if delete_drive_object(self.doc_id):
-                reverted_items.append("Documento eliminado")
-        
-        if self.notion_page_id:
-            if delete_notion_page(self.notion_page_id):
-                reverted_items.append("Página de Notion eliminada")
+        async def delete_drive():
+            # Note: Deleting a folder in Drive also deletes the Docs inside it.
+            # But we track doc_id just in case or for granular reporting.
+            if self.drive_folder_id:
+                if await run_blocking('drive', delete_drive_object, self.drive_folder_id):
+                    return "Carpeta en Drive eliminada"
+            elif self.doc_id:
+                if await run_blocking('drive', delete_drive_object, self.doc_id):
+                    return "Documento eliminado"
+            return None
+
+        async def delete_notion():
+            if self.notion_page_id:
+                if await run_blocking('notion', delete_notion_page, self.notion_page_id):
+                    return "Página de Notion eliminada"
+            return None
+
+        # Drive and Notion are independent: revert both at once
+        reverted_items = [item for item in await asyncio.gather(delete_drive(), delete_notion()) if item]
         
         if not reverted_items:
             rollback_summary = "No se crearon artefactos para revertir."
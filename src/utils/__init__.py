@@ -31,6 +31,7 @@ get_logs = _legacy_utils.get_logs
 RollbackManager = _legacy_utils.RollbackManager
 send_progress_message = _legacy_utils.send_progress_message
 update_progress_message = _legacy_utils.update_progress_message
+format_progress_text = _legacy_utils.format_progress_text
 
 __all__ = [
     "ProgressTracker",
@@ -39,4 +40,5 @@ __all__ = [
     "RollbackManager",
     "send_progress_message",
     "update_progress_message",
+    "format_progress_text",
 ]
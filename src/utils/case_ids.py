@@ -0,0 +1,190 @@
+"""
+Durable, atomic case-ID allocation.
+
+generate_case_id() derives the next ID from the last one found in Notion, which
+costs a sorted database query per pipeline and lets two delegates who start
+/denuncia at the same time receive the same D-2026-00X. CaseIdAllocator keeps
+one counter per (prefix, year) in SQLite and increments it in a single
+transactional UPSERT ... RETURNING, so IDs are handed out instantly and never
+repeat, even across threads or processes sharing the database file.
+
+At startup the counters are reconciled from Notion (see reconcile_from_notion)
+so the local sequence never falls behind cases created elsewhere.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from src.config import CASE_ID_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS case_sequences (
+    prefix TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    last_seq INTEGER NOT NULL,
+    PRIMARY KEY (prefix, year)
+);
+"""
+
+
+def format_case_id(prefix: str, year: int, seq: int) -> str:
+    """Formats a Case ID like D-2026-001 (same format as generate_case_id)."""
+    return f"{prefix}-{year}-{seq:03d}"
+
+
+def parse_case_id(case_id: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Parses a Case ID into (prefix, year, sequence).
+
+    Returns:
+        The parsed tuple, or None if case_id is not in PREFIX-YEAR-SEQ format
+    """
+    parts = case_id.split("-") if case_id else []
+    if len(parts) != 3:
+        return None
+    try:
+        return parts[0], int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+class CaseIdAllocator:
+    """
+    Per-prefix, per-year sequence allocator backed by SQLite.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path of the SQLite file (':memory:' for an in-process allocator)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # timeout: wait for other processes holding the write lock instead of failing
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def allocate(self, prefix: str, year: Optional[int] = None) -> str:
+        """
+        Atomically reserves the next Case ID for a prefix.
+
+        Args:
+            prefix: Case type prefix ('D', 'J', 'E')
+            year: Sequence year (default: current year)
+
+        Returns:
+            The allocated Case ID (e.g., 'D-2026-004')
+        """
+        year = year or datetime.now().year
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._conn.execute(
+                    "INSERT INTO case_sequences (prefix, year, last_seq) VALUES (?, ?, 1) "
+                    "ON CONFLICT(prefix, year) DO UPDATE SET last_seq = last_seq + 1 "
+                    "RETURNING last_seq",
+                    (prefix, year)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return format_case_id(prefix, year, seq)
+
+    def seed(self, case_id: str) -> bool:
+        """
+        Moves a sequence forward so it is at least the given Case ID.
+
+        Never moves a counter backwards, so it is safe to call with stale data.
+
+        Args:
+            case_id: Highest known Case ID (e.g., 'D-2026-015')
+
+        Returns:
+            True if the ID was parsed and applied, False otherwise
+        """
+        parsed = parse_case_id(case_id)
+        if not parsed:
+            return False
+        prefix, year, seq = parsed
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO case_sequences (prefix, year, last_seq) VALUES (?, ?, ?) "
+                "ON CONFLICT(prefix, year) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)",
+                (prefix, year, seq)
+            )
+        return True
+
+    def peek(self, prefix: str, year: Optional[int] = None) -> Optional[str]:
+        """Returns the last allocated Case ID for a prefix without allocating."""
+        year = year or datetime.now().year
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_seq FROM case_sequences WHERE prefix = ? AND year = ?",
+                (prefix, year)
+            ).fetchone()
+        return format_case_id(prefix, year, row[0]) if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_allocator: Optional[CaseIdAllocator] = None
+_allocator_lock = threading.Lock()
+
+
+def get_case_id_allocator() -> CaseIdAllocator:
+    """Returns the process-wide allocator, opening CASE_ID_DB_PATH on first use."""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = CaseIdAllocator(CASE_ID_DB_PATH)
+        return _allocator
+
+
+def reconcile_from_notion(notion_client, prefixes: Iterable[str]) -> int:
+    """
+    Seeds the allocator with the highest Case ID per prefix found in Notion.
+
+    Blocking; run it through run_blocking('notion', ...) from async code.
+
+    Args:
+        notion_client: DelegadoNotionClient
+        prefixes: Case prefixes to reconcile (e.g., 'D', 'J', 'E')
+
+    Returns:
+        Number of prefixes seeded
+    """
+    allocator = get_case_id_allocator()
+    seeded = 0
+    for prefix in prefixes:
+        try:
+            last_id = notion_client.get_last_case_id(prefix)
+        except Exception as e:
+            logger.error(f"Could not reconcile case IDs for prefix {prefix}: {e}")
+            continue
+        if last_id and allocator.seed(last_id):
+            seeded += 1
+            logger.info(f"Case ID sequence {prefix} reconciled from Notion at {last_id}")
+    return seeded
+
+
+__all__ = [
+    'CaseIdAllocator',
+    'get_case_id_allocator',
+    'reconcile_from_notion',
+    'parse_case_id',
+    'format_case_id',
+]
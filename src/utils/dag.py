@@ -0,0 +1,192 @@
+"""
+Dependency-graph executor for multi-step pipelines.
+
+Steps declare which other steps they depend on. Every step whose dependencies
+are done is started immediately, so independent work (e.g., Drive/Notion
+provisioning and the Perplexity/OpenRouter calls) overlaps instead of running
+strictly one after another.
+
+ProgressTracker and RollbackManager semantics are preserved:
+- The executor starts/completes/fails steps on the tracker as they run
+- Every step failure is reported to the RollbackManager via trigger_failure()
+- When a critical step fails, steps that only talk to LLMs (cancellable) are
+  cancelled, but steps that create external artifacts are awaited so anything
+  they created is registered with the RollbackManager before rollback runs
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineStep:
+    """
+    A single node of the pipeline graph.
+
+    Attributes:
+        name: Step name as shown in the progress tracker
+        run: Coroutine function executing the step. It may call
+             tracker.fail_step(name) itself to mark a soft skip.
+        depends_on: Names of the steps that must finish before this one starts
+        critical: If True, a failure aborts the pipeline (and triggers rollback).
+                  If False, the failure is recorded and dependents still run.
+        cancellable: If True, the step has no external side effects and may be
+                     cancelled when another step fails.
+    """
+    name: str
+    run: Callable[[], Awaitable[None]]
+    depends_on: Sequence[str] = ()
+    critical: bool = True
+    cancellable: bool = False
+
+
+def validate_step_graph(graph: Dict[str, Sequence[str]]) -> None:
+    """
+    Checks that a step graph only references known steps and has no cycles.
+
+    Args:
+        graph: Mapping of step name to the names it depends on
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph contains a cycle
+    """
+    for name, deps in graph.items():
+        for dep in deps:
+            if dep not in graph:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+
+    visiting, visited = set(), set()
+
+    def visit(name: str):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle detected in step graph at '{name}'")
+        visiting.add(name)
+        for dep in graph[name]:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in graph:
+        visit(name)
+
+
+class DAGExecutor:
+    """
+    Runs PipelineSteps concurrently while respecting their dependencies.
+    """
+
+    def __init__(
+        self,
+        steps: List[PipelineStep],
+        tracker,
+        rollback,
+        on_change: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        """
+        Args:
+            steps: Steps to execute
+            tracker: ProgressTracker updated as steps start, complete or fail
+            rollback: RollbackManager notified of step failures
+            on_change: Optional coroutine function awaited after every state change
+                       (e.g., to refresh the Telegram progress message)
+        """
+        self.steps = {step.name: step for step in steps}
+        self.tracker = tracker
+        self.rollback = rollback
+        self.on_change = on_change
+        validate_step_graph({step.name: step.depends_on for step in steps})
+
+    async def _notify(self):
+        if self.on_change:
+            await self.on_change()
+
+    async def run(self) -> None:
+        """
+        Executes the graph until every step is done or a critical step fails.
+
+        Raises:
+            Exception: The error of the first critical step that failed
+        """
+        done: set = set()
+        running: Dict[asyncio.Task, PipelineStep] = {}
+
+        def ready_steps() -> List[PipelineStep]:
+            started = done | {step.name for step in running.values()}
+            return [
+                step for name, step in self.steps.items()
+                if name not in started and all(dep in done for dep in step.depends_on)
+            ]
+
+        while len(done) < len(self.steps):
+            for step in ready_steps():
+                self.tracker.start_step(step.name)
+                running[asyncio.create_task(self._run_step(step), name=step.name)] = step
+            await self._notify()
+
+            if not running:
+                # Unreachable for a validated graph, but never spin forever.
+                raise RuntimeError("Pipeline graph stalled with no runnable steps")
+
+            finished, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+
+            critical_error = None
+            for task in finished:
+                step = running.pop(task)
+                done.add(step.name)
+                error = task.exception()
+                if error is None:
+                    if self.tracker.status.get(step.name) == "in_progress":
+                        self.tracker.complete_step(step.name)
+                    continue
+
+                self.tracker.fail_step(step.name)
+                self.rollback.trigger_failure(step.name, error)
+                if step.critical:
+                    critical_error = critical_error or error
+                else:
+                    logger.error(f"Non-critical step '{step.name}' failed: {error}")
+
+            if critical_error is not None:
+                await self._abort(running)
+                await self._notify()
+                raise critical_error
+
+        await self._notify()
+
+    async def _run_step(self, step: PipelineStep):
+        with span(step.name, kind="step", critical=step.critical):
+            return await step.run()
+
+    async def _abort(self, running: Dict[asyncio.Task, PipelineStep]) -> None:
+        """
+        Stops in-flight steps after a critical failure.
+
+        Cancellable steps are cancelled; the others are awaited so their
+        artifacts reach the RollbackManager. The first recorded failure stays
+        the one reported in the rollback message.
+        """
+        failed_step, error_message = self.rollback.failed_step, self.rollback.error_message
+
+        for task, step in running.items():
+            if step.cancellable:
+                task.cancel()
+
+        results = await asyncio.gather(*running.keys(), return_exceptions=True)
+        for (task, step), result in zip(running.items(), results):
+            if isinstance(result, BaseException) or task.cancelled():
+                self.tracker.fail_step(step.name)
+            elif self.tracker.status.get(step.name) == "in_progress":
+                self.tracker.complete_step(step.name)
+
+        self.rollback.failed_step, self.rollback.error_message = failed_step, error_message
+
+
+__all__ = ['PipelineStep', 'DAGExecutor', 'validate_step_graph']
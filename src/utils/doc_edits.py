@@ -0,0 +1,173 @@
+"""
+Structured edits of Google Docs drafts.
+
+Refining a draft used to regenerate the whole document and rewrite it in the
+Doc. Instead, the agent sees the draft as numbered paragraphs and answers with
+targeted edit operations:
+
+    {"edits": [
+        {"action": "replace", "paragraph": 12, "end_paragraph": 14, "text": "..."},
+        {"action": "insert_after", "paragraph": 20, "text": "..."},
+        {"action": "delete", "paragraph": 31}
+    ]}
+
+- replace: paragraphs paragraph..end_paragraph (a section) become text
+- insert_after: text is inserted as new paragraph(s) after paragraph (0 = at the start)
+- delete: paragraphs paragraph..end_paragraph are removed
+
+build_batch_requests() turns them into minimal Docs batchUpdate requests using
+the paragraph indexes read from the API, applied from the end of the document
+backwards so earlier indexes stay valid. LLM output and Docs writes then scale
+with the size of the change, not the size of the document.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTIONS = ("replace", "insert_after", "delete")
+
+
+class EditError(ValueError):
+    """Raised when edit operations are malformed or do not fit the document."""
+
+
+@dataclass
+class DocParagraph:
+    """A paragraph of a Google Doc with its API indexes (end_index includes the newline)."""
+    number: int
+    start_index: int
+    end_index: int
+    text: str
+
+
+@dataclass
+class DocSnapshot:
+    """Paragraphs of a Google Doc at a given revision."""
+    document_id: str
+    revision_id: Optional[str]
+    paragraphs: List[DocParagraph]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(p.text for p in self.paragraphs)
+
+
+@dataclass
+class DocEdit:
+    """One edit operation on numbered paragraphs (1-based, inclusive range)."""
+    action: str
+    paragraph: int
+    end_paragraph: Optional[int] = None
+    text: str = ""
+
+    @property
+    def last(self) -> int:
+        return self.end_paragraph or self.paragraph
+
+    @property
+    def span(self) -> Tuple[float, float]:
+        """Position in the document: an insertion sits between two paragraphs."""
+        if self.action == "insert_after":
+            return self.paragraph + 0.5, self.paragraph + 0.5
+        return self.paragraph, self.last
+
+
+def format_numbered(paragraphs: List[DocParagraph]) -> str:
+    """Renders the document for the LLM, one '[n] text' line per paragraph."""
+    return "\n".join(f"[{p.number}] {p.text}" for p in paragraphs)
+
+
+def parse_edits(data: Any, paragraph_count: int) -> List[DocEdit]:
+    """
+    Validates the edit operations returned by the LLM.
+
+    Args:
+        data: Parsed JSON ({"edits": [...]} or a bare list)
+        paragraph_count: Number of paragraphs in the document
+
+    Returns:
+        Edits sorted by position (empty if the LLM found nothing to change)
+
+    Raises:
+        EditError: Unknown action, paragraph out of range or overlapping edits
+    """
+    raw_edits = data.get("edits") if isinstance(data, dict) else data
+    if not isinstance(raw_edits, list):
+        raise EditError("Expected a list of edits")
+
+    edits = []
+    for raw in raw_edits:
+        if not isinstance(raw, dict) or raw.get("action") not in ACTIONS:
+            raise EditError(f"Invalid edit: {raw!r}")
+        try:
+            paragraph = int(raw.get("paragraph"))
+            end = int(raw["end_paragraph"]) if raw.get("end_paragraph") not in (None, "") else None
+        except (TypeError, ValueError):
+            raise EditError(f"Invalid paragraph number in {raw!r}")
+        edit = DocEdit(raw["action"], paragraph, end, str(raw.get("text") or "").strip("\n"))
+
+        lowest = 0 if edit.action == "insert_after" else 1
+        if not lowest <= edit.paragraph <= edit.last <= paragraph_count:
+            raise EditError(f"Paragraphs {edit.paragraph}-{edit.last} out of range 1-{paragraph_count}")
+        if edit.action != "delete" and not edit.text:
+            raise EditError(f"Edit without text: {raw!r}")
+        edits.append(edit)
+
+    edits.sort(key=lambda e: e.span)
+    for previous, current in zip(edits, edits[1:]):
+        if current.span[0] <= previous.span[1]:
+            raise EditError(f"Overlapping edits at paragraph {current.paragraph}")
+    return edits
+
+
+def build_batch_requests(paragraphs: List[DocParagraph], edits: List[DocEdit]) -> List[Dict]:
+    """
+    Converts edits into Docs batchUpdate requests.
+
+    Requests are emitted from the last edit to the first so that each one
+    works on indexes not yet shifted by the others.
+    """
+    by_number = {p.number: p for p in paragraphs}
+    last_number = paragraphs[-1].number if paragraphs else 0
+    requests: List[Dict] = []
+
+    for edit in sorted(edits, key=lambda e: e.span, reverse=True):
+        if edit.action == "insert_after":
+            if edit.paragraph == 0:
+                index, text = (paragraphs[0].start_index if paragraphs else 1), edit.text + "\n"
+            elif edit.paragraph == last_number:
+                # The final newline of the body cannot be moved: insert before it
+                index, text = by_number[edit.paragraph].end_index - 1, "\n" + edit.text
+            else:
+                index, text = by_number[edit.paragraph].end_index, edit.text + "\n"
+            requests.append({'insertText': {'location': {'index': index}, 'text': text}})
+            continue
+
+        first, last = by_number[edit.paragraph], by_number[edit.last]
+        if edit.action == "replace":
+            # Keep the last paragraph's newline (and with it the paragraph style)
+            if last.end_index - 1 > first.start_index:
+                requests.append({'deleteContentRange': {'range': {
+                    'startIndex': first.start_index, 'endIndex': last.end_index - 1
+                }}})
+            requests.append({'insertText': {'location': {'index': first.start_index}, 'text': edit.text}})
+        else:  # delete
+            if edit.last == last_number and edit.paragraph > 1:
+                # Remove the preceding newline instead of the undeletable final one
+                start, end = by_number[edit.paragraph - 1].end_index - 1, last.end_index - 1
+            else:
+                start, end = first.start_index, last.end_index
+            if end > start:
+                requests.append({'deleteContentRange': {'range': {'startIndex': start, 'endIndex': end}}})
+    return requests
+
+
+__all__ = [
+    'DocParagraph',
+    'DocSnapshot',
+    'DocEdit',
+    'EditError',
+    'format_numbered',
+    'parse_edits',
+    'build_batch_requests',
+]
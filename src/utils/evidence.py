@@ -0,0 +1,200 @@
+"""
+Evidence ingestion helpers for private editing mode.
+
+- EvidenceLedger: which Telegram files (by file_unique_id, stable across
+  forwards and re-sends) were already uploaded to each case, so resent evidence
+  is answered with the existing Drive link instead of a second upload. A file
+  is reserved before its upload starts, so the same file sent twice at once is
+  uploaded only once
+- MediaGroupCollector: an album arrives as one update per item; the collector
+  gathers them by media_group_id until no new item arrived for
+  MEDIA_GROUP_WAIT seconds and hands the whole group to one callback, so the
+  handler can upload the items concurrently and send a single summary reply
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from src.config import EVIDENCE_DB_PATH, MEDIA_GROUP_WAIT
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    case_id TEXT NOT NULL,
+    file_unique_id TEXT NOT NULL,
+    file_name TEXT,
+    drive_link TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    PRIMARY KEY (case_id, file_unique_id)
+);
+"""
+
+
+@dataclass
+class EvidenceItem:
+    """One attachment to upload to a case folder."""
+    attachment: Any
+    file_name: str
+    mime_type: Optional[str]
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        return getattr(self.attachment, "file_unique_id", None)
+
+
+class EvidenceLedger:
+    """
+    Uploaded evidence per case, backed by SQLite.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path of the SQLite file (':memory:' for an in-process ledger)
+        """
+        self._lock = threading.Lock()
+        self._in_flight: set = set()  # (case_id, file_unique_id) being uploaded
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, case_id: str, file_unique_id: Optional[str]) -> Optional[str]:
+        """Drive link of a file already uploaded to the case, or None."""
+        if not file_unique_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT drive_link FROM evidence WHERE case_id = ? AND file_unique_id = ?",
+                (case_id, file_unique_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def reserve(self, case_id: str, file_unique_id: Optional[str]) -> bool:
+        """
+        Claims a file for upload to the case.
+
+        Returns:
+            False if the file is already in the case or another upload of it is
+            in progress; True otherwise (call release() once the upload ends).
+            Files without a unique ID cannot be deduplicated and are always claimed.
+        """
+        if not file_unique_id:
+            return True
+        key = (case_id, file_unique_id)
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            row = self._conn.execute(
+                "SELECT 1 FROM evidence WHERE case_id = ? AND file_unique_id = ?", key
+            ).fetchone()
+            if row:
+                return False
+            self._in_flight.add(key)
+        return True
+
+    def release(self, case_id: str, file_unique_id: Optional[str]):
+        """Ends a reservation (after record() on success, or after a failed upload)."""
+        with self._lock:
+            self._in_flight.discard((case_id, file_unique_id))
+
+    def record(self, case_id: str, file_unique_id: Optional[str], file_name: str, drive_link: str):
+        if not file_unique_id:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evidence (case_id, file_unique_id, file_name, drive_link, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (case_id, file_unique_id, file_name, drive_link, datetime.now().isoformat())
+            )
+
+    def forget(self, case_id: str):
+        """Drops the entries of a case (e.g., its Drive folder was replaced)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM evidence WHERE case_id = ?", (case_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_ledger: Optional[EvidenceLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_evidence_ledger() -> EvidenceLedger:
+    """Returns the process-wide ledger, opening EVIDENCE_DB_PATH on first use."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = EvidenceLedger(EVIDENCE_DB_PATH)
+        return _ledger
+
+
+class MediaGroupCollector:
+    """
+    Buffers album items by media group and flushes each group once it is complete.
+
+    Telegram sends no "end of album" marker: a group is considered complete
+    when no new item arrived for `wait` seconds.
+    """
+
+    def __init__(self, wait: float = MEDIA_GROUP_WAIT):
+        self.wait = wait
+        self._groups: Dict[Hashable, List[Any]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._callbacks: Dict[Hashable, Callable[[List[Any]], Awaitable[None]]] = {}
+        self._tasks: set = set()
+
+    def add(self, key: Hashable, item: Any, on_complete: Callable[[List[Any]], Awaitable[None]]):
+        """
+        Adds an item to its group. The first item's on_complete receives the whole group.
+
+        Args:
+            key: Group key (e.g., (chat_id, media_group_id))
+            item: Item to buffer
+            on_complete: Coroutine function called once with the group's items
+        """
+        loop = asyncio.get_running_loop()
+        self._groups.setdefault(key, []).append(item)
+        self._callbacks.setdefault(key, on_complete)
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        self._timers[key] = loop.call_later(self.wait, self._flush, key)
+
+    def pending(self, key: Hashable) -> int:
+        return len(self._groups.get(key, ()))
+
+    def _flush(self, key: Hashable):
+        self._timers.pop(key, None)
+        items = self._groups.pop(key, [])
+        callback = self._callbacks.pop(key)
+        task = asyncio.get_running_loop().create_task(self._run(key, callback, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, callback, items: List[Any]):
+        try:
+            await callback(items)
+        except Exception as e:
+            logger.error(f"Error processing media group {key}: {e}")
+
+    async def drain(self):
+        """Flushes every buffered group now and waits for all group callbacks (tests, shutdown)."""
+        for key in list(self._timers):
+            self._timers[key].cancel()
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+__all__ = ['EvidenceItem', 'EvidenceLedger', 'get_evidence_ledger', 'MediaGroupCollector']
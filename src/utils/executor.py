@@ -0,0 +1,103 @@
+"""
+Bounded thread pools for running blocking integration calls off the event loop.
+
+The Notion, Google Drive/Docs and Supabase SDKs are synchronous. Calling them
+directly from a handler coroutine blocks the Telegram event loop for the whole
+network round trip, so every other delegate waits. This module keeps one
+bounded ThreadPoolExecutor per integration (sizes configured in src/config.py)
+and exposes run_blocking() to await a blocking call from async code.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.config import INTEGRATION_POOL_SIZES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(integration: str) -> ThreadPoolExecutor:
+    """
+    Returns the thread pool dedicated to an integration, creating it on first use.
+
+    Args:
+        integration: Integration name (e.g., 'notion', 'drive', 'docs', 'supabase')
+
+    Returns:
+        The ThreadPoolExecutor bounded to the configured pool size.
+    """
+    executor = _executors.get(integration)
+    if executor is not None:
+        return executor
+
+    with _executors_lock:
+        executor = _executors.get(integration)
+        if executor is None:
+            max_workers = INTEGRATION_POOL_SIZES.get(integration, DEFAULT_POOL_SIZE)
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, max_workers),
+                thread_name_prefix=f"{integration}-io"
+            )
+            _executors[integration] = executor
+            logger.debug(f"Created {integration} executor with {max_workers} workers")
+    return executor
+
+
+async def run_blocking(integration: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a blocking integration call in its bounded pool and awaits the result.
+
+    Args:
+        integration: Integration name used to select the thread pool
+        func: Blocking callable (e.g., notion.create_case_page)
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns. Exceptions raised by func propagate to the caller.
+
+    Example:
+        page_id = await run_blocking('notion', notion.create_case_page, case_data)
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    # Carry contextvars (e.g., the tracing span) into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(integration), ctx.run, call)
+
+
+def executor_queue_depths() -> Dict[str, int]:
+    """Returns the number of calls waiting for a free thread, per integration pool."""
+    with _executors_lock:
+        executors = list(_executors.items())
+    # _work_queue holds submitted calls that no worker has picked up yet
+    return {integration: executor._work_queue.qsize() for integration, executor in executors}
+
+
+def shutdown_executors(wait: bool = True):
+    """
+    Shuts down all integration pools. Called once when the bot stops.
+
+    Args:
+        wait: Whether to wait for in-flight calls to finish (default: True)
+    """
+    with _executors_lock:
+        executors = list(_executors.items())
+        _executors.clear()
+
+    for integration, executor in executors:
+        executor.shutdown(wait=wait)
+        logger.debug(f"Shut down {integration} executor")
+
+
+__all__ = ['get_executor', 'run_blocking', 'executor_queue_depths', 'shutdown_executors']
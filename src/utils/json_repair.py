@@ -0,0 +1,280 @@
+"""
+Deterministic local repair of LLM JSON output.
+
+Most invalid JSON from the models is mechanically broken, not wrong:
+
+- <think>...</think> reasoning (DeepSeek R1), prose before the object,
+  ```json code fences and text after it
+- literal newlines/tabs/control characters inside strings
+- invalid escapes (a lone backslash before a letter, e.g., in Windows paths)
+- trailing commas before } or ]
+- truncated output: unterminated string, dangling key, missing closing braces
+
+TolerantJSONParser fixes these in one pass as text arrives (feed() per chunk,
+partial() for a best-effort value mid-stream, close() for the result), so a
+REPAIR_MODEL call or a full regeneration is only needed when this fails.
+repair_json() is the one-shot entry point.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+_THINK_BLOCK_RE = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+_THINK_OPEN_RE = re.compile(r"<think>", re.IGNORECASE)
+_THINK_CLOSE_RE = re.compile(r"</think>", re.IGNORECASE)
+_START_RE = re.compile(r"[{\[]")
+# Characters that change the state inside / outside a string
+_STRING_SPECIAL_RE = re.compile(r'["\\\x00-\x1f]')
+_STRUCTURE_RE = re.compile(r'["{}\[\],:]')
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_LITERALS = ("true", "false", "null")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(ValueError):
+    """Raised when the text cannot be repaired into valid JSON locally."""
+
+
+@dataclass
+class RepairResult:
+    """A parsed value and the fixes that were needed to parse it."""
+    value: Any
+    text: str
+    fixes: Tuple[str, ...] = ()
+
+    @property
+    def repaired(self) -> bool:
+        return bool(self.fixes)
+
+
+class TolerantJSONParser:
+    """
+    Incremental, repairing JSON scanner for one top-level object or array.
+
+    The scanner only rewrites the text (escaping, dropping, closing); the final
+    value is parsed by the json module, so accepted output is always valid JSON.
+    """
+
+    def __init__(self):
+        self._pre = ""           # text seen before the value starts
+        self._started = False
+        self._done = False
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None  # index in _out of a key not yet followed by ':'
+        self.fixes: List[str] = []
+
+    def _fix(self, name: str):
+        if name not in self.fixes:
+            self.fixes.append(name)
+
+    # ---------- input ----------
+
+    def feed(self, chunk: str):
+        """Consumes the next piece of the text."""
+        if self._done or not chunk:
+            if self._done and chunk and chunk.strip().strip("`").strip():
+                self._fix("trailing_text")
+            return
+        if not self._started:
+            self._pre += chunk
+            self._try_start(final=False)
+            return
+        self._consume(chunk)
+
+    def _try_start(self, final: bool):
+        text = self._pre
+        if _THINK_BLOCK_RE.search(text):
+            self._fix("think_block")
+            text = _THINK_BLOCK_RE.sub("", text)
+        closes = list(_THINK_CLOSE_RE.finditer(text))
+        if closes:
+            # Reasoning whose opening tag was stripped upstream: keep what follows
+            self._fix("think_block")
+            text = text[closes[-1].end():]
+        opened = _THINK_OPEN_RE.search(text)
+        if opened:
+            if not final:
+                return  # wait for </think>
+            # Unterminated reasoning: anything inside it is not the answer
+            self._fix("think_block")
+            text = text[:opened.start()]
+        match = _START_RE.search(text)
+        if not match:
+            return
+        before = text[:match.start()]
+        if "```" in before:
+            self._fix("code_fence")
+        elif before.strip():
+            self._fix("preamble")
+        self._started = True
+        self._pre = ""
+        self._consume(text[match.start():])
+
+    def _consume(self, text: str):
+        out = self._out
+        i, n = 0, len(text)
+        while i < n and not self._done:
+            if self._in_string:
+                if self._escape:
+                    c = text[i]
+                    if c not in _VALID_ESCAPES:
+                        self._fix("invalid_escape")
+                        out.append("\\")  # "\d" -> "\\d"
+                    out.append(c)
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL_RE.search(text, i)
+                if not match:
+                    out.append(text[i:])
+                    return
+                out.append(text[i:match.start()])
+                c = match.group(0)
+                i = match.end()
+                if c == "\\":
+                    out.append(c)
+                    self._escape = True
+                elif c == '"':
+                    out.append(c)
+                    self._in_string = False
+                else:
+                    self._fix("control_character")
+                    out.append(_CONTROL_ESCAPES.get(c, f"\\u{ord(c):04x}"))
+                continue
+
+            match = _STRUCTURE_RE.search(text, i)
+            if not match:
+                out.append(text[i:])
+                return
+            out.append(text[i:match.start()])
+            c = match.group(0)
+            i = match.end()
+            if c == '"':
+                if self._expect_key:
+                    self._key_start = len(out)
+                    self._expect_key = False
+                self._in_string = True
+                out.append(c)
+            elif c in "{[":
+                self._stack.append(c)
+                self._expect_key = c == "{"
+                out.append(c)
+            elif c in "}]":
+                self._drop_trailing_comma()
+                opener = self._stack.pop() if self._stack else None
+                if opener is None:
+                    self._done = True
+                    break
+                if _CLOSERS[opener] != c:
+                    self._fix("mismatched_bracket")
+                out.append(_CLOSERS[opener])
+                self._expect_key = False
+                self._key_start = None
+                if not self._stack:
+                    self._done = True
+            elif c == ",":
+                out.append(c)
+                self._expect_key = bool(self._stack) and self._stack[-1] == "{"
+            else:  # ':'
+                out.append(c)
+                self._key_start = None
+        if self._done and text[i:].strip().strip("`").strip():
+            self._fix("trailing_text")
+
+    def _drop_trailing_comma(self):
+        out = self._out
+        j = len(out) - 1
+        while j >= 0 and not out[j].strip():
+            j -= 1
+        if j >= 0 and out[j].rstrip().endswith(","):
+            self._fix("trailing_comma")
+            out[j] = out[j].rstrip()[:-1]
+
+    # ---------- output ----------
+
+    def _finish(self) -> Tuple[str, List[str]]:
+        """Text of the value closed as it stands now, plus the fixes that closing needed."""
+        fixes: List[str] = []
+        out = list(self._out)
+        in_string, escape = self._in_string, self._escape
+        if in_string:
+            if escape:
+                out.append("\\")
+            out.append('"')
+            fixes.append("truncated")
+        if self._key_start is not None:
+            # Dangling key: '{"a": 1, "b"' -> '{"a": 1, '
+            del out[self._key_start:]
+            fixes.append("truncated")
+        text = "".join(out).rstrip()
+
+        literal = re.search(r"[a-z]+$", text)
+        if literal and not self._done:
+            completion = next((lit for lit in _LITERALS if lit.startswith(literal.group(0))), None)
+            if completion:
+                text = text[:literal.start()] + completion
+        if text.endswith(":"):
+            text += " null"
+        text = text.rstrip(",").rstrip()
+        if self._stack and not self._done:
+            fixes.append("truncated")
+            text += "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+        return text, fixes
+
+    def partial(self) -> Optional[Any]:
+        """Best-effort value of the text received so far (None if nothing parseable yet)."""
+        if not self._started:
+            return None
+        try:
+            return json.loads(self._finish()[0])
+        except json.JSONDecodeError:
+            return None
+
+    def close(self) -> RepairResult:
+        """
+        Finishes the input and returns the repaired value.
+
+        Raises:
+            JSONRepairError: If no JSON value could be recovered
+        """
+        if not self._started:
+            self._try_start(final=True)
+        if not self._started:
+            raise JSONRepairError("No JSON object or array found")
+        text, fixes = self._finish()
+        for fix in fixes:
+            self._fix(fix)
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise JSONRepairError(f"Could not repair JSON ({', '.join(self.fixes) or 'no fixes'}): {e}") from e
+        return RepairResult(value, text, tuple(self.fixes))
+
+
+def repair_json(text: str) -> RepairResult:
+    """
+    Parses LLM output as JSON, repairing mechanical damage locally.
+
+    Valid JSON takes the fast path (no fixes). Otherwise the text goes through
+    TolerantJSONParser.
+
+    Raises:
+        JSONRepairError: If the text cannot be repaired
+    """
+    try:
+        return RepairResult(json.loads(text), text)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    parser = TolerantJSONParser()
+    parser.feed(text or "")
+    return parser.close()
+
+
+__all__ = ['TolerantJSONParser', 'RepairResult', 'JSONRepairError', 'repair_json']
@@ -0,0 +1,114 @@
+"""
+Minimal Markdown -> HTML rendering for Google Docs import.
+
+Drafts are written in the Markdown of the templates in src/data. Drive converts
+uploaded HTML into a Google Doc, so rendering the draft to HTML turns its
+headings, bold, italics and lists into real Docs formatting. Only the subset
+the templates and the models use is supported:
+
+- ATX headings (# ... ######), horizontal rules (---, ***)
+- **bold** / __bold__, *italic* / _italic_, `code`
+- "-", "*" and "+" bullet lists, "1." numbered lists, > blockquotes
+- Paragraphs; single line breaks inside a paragraph are kept (<br>)
+
+Everything else is passed through as escaped text.
+"""
+
+import html
+import re
+from typing import List
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE_RE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+_BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_QUOTE_RE = re.compile(r"^\s*>\s?(.*)$")
+
+_CODE_RE = re.compile(r"`([^`]+)`")
+_BOLD_RE = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+_ITALIC_RE = re.compile(r"(?<![*\w])\*(?=\S)(.+?)(?<=\S)\*(?!\*)|(?<![_\w])_(?=\S)(.+?)(?<=\S)_(?![_\w])")
+
+
+def render_inline(text: str) -> str:
+    """Escapes text and renders inline code, bold and italics."""
+    codes: List[str] = []
+
+    def keep_code(match):
+        codes.append(f"<code>{html.escape(match.group(1), quote=False)}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = _CODE_RE.sub(keep_code, text)
+    text = html.escape(text, quote=False)
+    text = _BOLD_RE.sub(lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    text = _ITALIC_RE.sub(lambda m: f"<i>{m.group(1) or m.group(2)}</i>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+def markdown_to_html(markdown: str, title: str = "") -> str:
+    """
+    Renders a Markdown draft as a standalone HTML document.
+
+    Args:
+        markdown: Draft content
+        title: Document title (<title> element)
+
+    Returns:
+        HTML text (UTF-8)
+    """
+    body: List[str] = []
+    paragraph: List[str] = []
+    list_tag = None
+
+    def close_paragraph():
+        if paragraph:
+            body.append(f"<p>{'<br>'.join(render_inline(line) for line in paragraph)}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            body.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in markdown.replace("\r\n", "\n").split("\n"):
+        if not line.strip():
+            close_paragraph()
+            close_list()
+            continue
+
+        heading = _HEADING_RE.match(line)
+        bullet = _BULLET_RE.match(line)
+        numbered = _NUMBERED_RE.match(line)
+        quote = _QUOTE_RE.match(line)
+
+        if heading or _RULE_RE.match(line) or quote:
+            close_paragraph()
+            close_list()
+            if heading:
+                level = len(heading.group(1))
+                body.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>")
+            elif quote:
+                body.append(f"<blockquote><p>{render_inline(quote.group(1))}</p></blockquote>")
+            else:
+                body.append("<hr>")
+        elif bullet or numbered:
+            close_paragraph()
+            tag = "ul" if bullet else "ol"
+            if list_tag != tag:
+                close_list()
+                body.append(f"<{tag}>")
+                list_tag = tag
+            body.append(f"<li>{render_inline((bullet or numbered).group(1))}</li>")
+        else:
+            close_list()
+            paragraph.append(line.strip())
+
+    close_paragraph()
+    close_list()
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title></head>\n<body>\n" + "\n".join(body) + "\n</body></html>\n"
+    )
+
+
+__all__ = ['markdown_to_html', 'render_inline']
@@ -0,0 +1,197 @@
+"""
+OpenMetrics (Prometheus) exporter for integration and pipeline metrics.
+
+/metrics in Telegram shows a Markdown summary for a human; this module serves
+the same data, plus pipeline and queue metrics, over HTTP in OpenMetrics text
+format so Prometheus can scrape it, alert on Notion/OpenRouter degradation and
+keep latency trends:
+
+- marxnager_api_calls_total{api,outcome}, marxnager_api_errors_total{api,error_type},
+  marxnager_api_rate_limit_hits_total{api}, marxnager_api_latency_seconds{api} (histogram)
+- marxnager_pipeline_runs_total{pipeline,outcome}, marxnager_pipelines_in_flight{pipeline}
+- marxnager_pipeline_step_duration_seconds{pipeline,step} (histogram),
+  marxnager_pipeline_steps_total{pipeline,step,outcome}
+- marxnager_json_responses_total{outcome}, marxnager_json_local_fixes_total{fix}
+  (how invalid LLM JSON was handled: local repair, REPAIR_MODEL, regeneration)
+- Gauges registered at runtime with register_gauge() (update queue, executor
+  queues, queued pipelines; see src/main.py)
+
+Enable with METRICS_EXPORTER_ENABLED; the server listens on METRICS_LISTEN:METRICS_PORT.
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from aiohttp import web
+
+from src.utils.monitoring import (
+    APIMetrics,
+    PipelineMetrics,
+    JSONRepairMetrics,
+    LatencyHistogram,
+    api_metrics,
+    pipeline_metrics,
+    json_repair_metrics
+)
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "marxnager"
+
+# Histogram bucket bounds in seconds (LLM calls and pipelines run for minutes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+GaugeValue = Union[float, Dict[Tuple[Tuple[str, str], ...], float]]
+
+# name -> (help text, callback returning a value or {label tuples: value})
+_gauges: Dict[str, Tuple[str, Callable[[], GaugeValue]]] = {}
+
+
+def register_gauge(name: str, help_text: str, callback: Callable[[], GaugeValue]):
+    """
+    Registers a gauge evaluated at scrape time.
+
+    Args:
+        name: Metric name without the 'marxnager_' prefix
+        help_text: HELP line
+        callback: Returns a number, or a dict mapping label tuples
+                  (e.g., (('integration', 'notion'),)) to numbers
+    """
+    _gauges[name] = (help_text, callback)
+
+
+def unregister_gauge(name: str):
+    _gauges.pop(name, None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str):
+        self.lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+
+    def sample(self, name: str, labels, value: float):
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, labels, histogram: LatencyHistogram):
+        """Writes a histogram recorded in milliseconds as seconds."""
+        labels = list(labels)
+        for bound in LATENCY_BUCKETS:
+            self.sample(f"{name}_bucket", labels + [("le", _number(float(bound)))], histogram.count_le(bound * 1000))
+        self.sample(f"{name}_bucket", labels + [("le", "+Inf")], histogram.count)
+        self.sample(f"{name}_count", labels, histogram.count)
+        self.sample(f"{name}_sum", labels, histogram.total / 1000)
+
+
+def render_openmetrics(
+    metrics: Optional[APIMetrics] = None,
+    pipelines: Optional[PipelineMetrics] = None,
+    json_repairs: Optional[JSONRepairMetrics] = None
+) -> str:
+    """
+    Renders all metrics in OpenMetrics text format.
+
+    Args:
+        metrics: API metrics (default: the global api_metrics)
+        pipelines: Pipeline metrics (default: the global pipeline_metrics)
+        json_repairs: JSON repair metrics (default: the global json_repair_metrics)
+    """
+    api_totals = (metrics or api_metrics).totals()
+    pipeline_snapshot = (pipelines or pipeline_metrics).snapshot()
+    repair_snapshot = (json_repairs or json_repair_metrics).snapshot()
+    out = _Writer()
+
+    out.family("api_calls", "counter", "Integration calls by outcome.")
+    for api, totals in sorted(api_totals.items()):
+        out.sample("api_calls_total", [("api", api), ("outcome", "success")], totals['successes'])
+        out.sample("api_calls_total", [("api", api), ("outcome", "failure")], totals['calls'] - totals['successes'])
+
+    out.family("api_errors", "counter", "Failed integration calls by error type.")
+    for api, totals in sorted(api_totals.items()):
+        for error_type, count in sorted(totals['errors'].items()):
+            out.sample("api_errors_total", [("api", api), ("error_type", error_type)], count)
+
+    out.family("api_rate_limit_hits", "counter", "Rate-limit errors returned by integrations.")
+    for api, totals in sorted(api_totals.items()):
+        out.sample("api_rate_limit_hits_total", [("api", api)], totals['rate_limit_hits'])
+
+    out.family("api_latency_seconds", "histogram", "Latency of successful integration calls.")
+    for api, totals in sorted(api_totals.items()):
+        out.histogram("api_latency_seconds", [("api", api)], totals['latency'])
+
+    out.family("pipeline_runs", "counter", "Finished document pipelines by outcome.")
+    for (pipeline, outcome), count in sorted(pipeline_snapshot['runs'].items()):
+        out.sample("pipeline_runs_total", [("pipeline", pipeline), ("outcome", outcome)], count)
+
+    out.family("pipelines_in_flight", "gauge", "Document pipelines running now.")
+    for pipeline, count in sorted(pipeline_snapshot['in_flight'].items()):
+        out.sample("pipelines_in_flight", [("pipeline", pipeline)], count)
+
+    out.family("pipeline_steps", "counter", "Finished pipeline steps by outcome.")
+    for (pipeline, step, outcome), count in sorted(pipeline_snapshot['step_outcomes'].items()):
+        out.sample("pipeline_steps_total", [("pipeline", pipeline), ("step", step), ("outcome", outcome)], count)
+
+    out.family("pipeline_step_duration_seconds", "histogram", "Duration of pipeline steps.")
+    for (pipeline, step), histogram in sorted(pipeline_snapshot['step_durations'].items()):
+        out.histogram("pipeline_step_duration_seconds", [("pipeline", pipeline), ("step", step)], histogram)
+
+    out.family("json_responses", "counter", "JSON responses requested from LLMs by how they were parsed.")
+    for outcome, count in sorted(repair_snapshot['outcomes'].items()):
+        out.sample("json_responses_total", [("outcome", outcome)], count)
+
+    out.family("json_local_fixes", "counter", "Fixes applied by the local JSON repair.")
+    for fix, count in sorted(repair_snapshot['fixes'].items()):
+        out.sample("json_local_fixes_total", [("fix", fix)], count)
+
+    for name, (help_text, callback) in sorted(_gauges.items()):
+        try:
+            value = callback()
+        except Exception as e:
+            logger.error(f"Metrics gauge {name} failed: {e}")
+            continue
+        out.family(name, "gauge", help_text)
+        if isinstance(value, dict):
+            for labels, sample in sorted(value.items()):
+                out.sample(name, labels, sample)
+        else:
+            out.sample(name, (), value)
+
+    out.lines.append("# EOF")
+    return "\n".join(out.lines) + "\n"
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(body=render_openmetrics().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """
+    Starts the HTTP exporter (GET /metrics). Stop it with `await runner.cleanup()`.
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Metrics exporter listening on {host}:{port}/metrics")
+    return runner
+
+
+__all__ = ['render_openmetrics', 'register_gauge', 'unregister_gauge', 'start_metrics_server', 'CONTENT_TYPE']
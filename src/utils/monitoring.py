@@ -3,28 +3,148 @@ Basic monitoring utilities for tracking API failures and success rates.
 
 Provides simple metrics collection for:
 - API success/failure rates
-- Latency tracking
+- Latency tracking (average and p50/p95/p99)
 - Rate limit detection
 - Error categorization
+- A tracing span per tracked call (see src/utils/tracing.py)
+
+Memory is fixed: each API keeps a ring of per-minute buckets covering the last
+METRICS_RETENTION_MINUTES minutes, and latencies go into a log-linear histogram
+instead of being stored one by one. Queries cost O(minutes in the window), not
+O(calls). Recording is thread-safe, so calls made from the integration thread
+pools are tracked too.
 """
 
+import functools
+import math
 import time
 import logging
-from typing import Dict, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from collections import Counter, defaultdict
+
+from src.config import METRICS_RETENTION_MINUTES
+from src.utils.tracing import span, current_attempt
 
 logger = logging.getLogger(__name__)
 
 
-class APIMetrics:
-    """Simple in-memory metrics tracker for API calls."""
+class LatencyHistogram:
+    """
+    Log-linear latency histogram (milliseconds).
+
+    Each power-of-two range [2^e, 2^(e+1)) is split into SUB_BUCKETS linear
+    buckets, so any recorded value is reported within ~1/SUB_BUCKETS (12.5%)
+    of its true value. Buckets are stored sparsely.
+    """
+
+    SUB_BUCKETS = 8
+    MAX_EXPONENT = 24  # ~4.6 hours in ms; larger values land in the last bucket
+
+    __slots__ = ("counts", "count", "total")
 
     def __init__(self):
-        self._calls: Dict[str, list] = defaultdict(list)
-        self._errors: Dict[str, list] = defaultdict(list)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+
+    @classmethod
+    def bucket_index(cls, value: float) -> int:
+        if value < 1:
+            return 0
+        exponent = min(int(math.log2(value)), cls.MAX_EXPONENT)
+        base = 2 ** exponent
+        sub = min(int((value - base) / base * cls.SUB_BUCKETS), cls.SUB_BUCKETS - 1)
+        return 1 + exponent * cls.SUB_BUCKETS + sub
+
+    @classmethod
+    def bucket_upper_bound(cls, index: int) -> float:
+        if index == 0:
+            return 1.0
+        exponent, sub = divmod(index - 1, cls.SUB_BUCKETS)
+        base = 2 ** exponent
+        return base + base * (sub + 1) / cls.SUB_BUCKETS
+
+    def record(self, value: float):
+        index = self.bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Returns the upper bound of the bucket holding the pct-th percentile (0-100)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self.bucket_upper_bound(index)
+        return self.bucket_upper_bound(max(self.counts))
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def count_le(self, bound: float) -> int:
+        """Number of values whose bucket upper bound is <= bound (for cumulative exports)."""
+        return sum(count for index, count in self.counts.items() if self.bucket_upper_bound(index) <= bound)
+
+    def copy(self) -> "LatencyHistogram":
+        clone = LatencyHistogram()
+        clone.merge(self)
+        return clone
+
+
+class _MinuteBucket:
+    """Aggregated calls of one API during one wall-clock minute."""
+
+    __slots__ = ("minute", "calls", "successes", "latency", "errors")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.calls = 0
+        self.successes = 0
+        self.latency = LatencyHistogram()
+        self.errors: Counter = Counter()
+
+
+class APIMetrics:
+    """Fixed-memory, thread-safe metrics tracker for API calls."""
+
+    def __init__(self, retention_minutes: int = METRICS_RETENTION_MINUTES, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            retention_minutes: Longest window that can be queried
+            clock: Wall-clock time source (injectable for tests)
+        """
+        self.retention_minutes = retention_minutes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # api_name -> ring of per-minute buckets (slot = minute % retention)
+        self._buckets: Dict[str, List[Optional[_MinuteBucket]]] = {}
+        # api_name -> counters since start (monotonic, for the OpenMetrics exporter)
+        self._totals: Dict[str, _MinuteBucket] = {}
         self._rate_limits: Dict[str, int] = defaultdict(int)
 
+    def _current_minute(self) -> int:
+        return int(self._clock() // 60)
+
+    def _window(self, api_name: str, minutes: int) -> List[_MinuteBucket]:
+        """Buckets of an API within the last N minutes. Caller holds the lock."""
+        ring = self._buckets.get(api_name)
+        if not ring:
+            return []
+        now = self._current_minute()
+        oldest = now - min(minutes, self.retention_minutes) + 1
+        return [b for b in ring if b is not None and oldest <= b.minute <= now]
+
     def record_call(self, api_name: str, success: bool, latency_ms: float = None, error_type: str = None):
         """
         Record an API call with its result.
@@ -35,31 +155,41 @@ class APIMetrics:
             latency_ms: Optional latency in milliseconds
             error_type: Optional error type/category for failures
         """
-        timestamp = datetime.now()
+        minute = self._current_minute()
+
+        with self._lock:
+            ring = self._buckets.get(api_name)
+            if ring is None:
+                ring = self._buckets[api_name] = [None] * self.retention_minutes
+            slot = minute % self.retention_minutes
+            bucket = ring[slot]
+            if bucket is None or bucket.minute != minute:
+                bucket = ring[slot] = _MinuteBucket(minute)
+
+            totals = self._totals.get(api_name)
+            if totals is None:
+                totals = self._totals[api_name] = _MinuteBucket(0)
+
+            for target in (bucket, totals):
+                target.calls += 1
+                if success:
+                    target.successes += 1
+                    if latency_ms:
+                        target.latency.record(latency_ms)
+                else:
+                    target.errors[error_type or 'unknown'] += 1
+
+            rate_limited = not success and error_type and 'rate' in error_type.lower()
+            if rate_limited:
+                self._rate_limits[api_name] += 1
+                rate_limit_total = self._rate_limits[api_name]
 
         if success:
-            self._calls[api_name].append({
-                'timestamp': timestamp,
-                'success': True,
-                'latency_ms': latency_ms
-            })
             logger.debug(f"✅ {api_name} call succeeded ({latency_ms:.0f}ms)" if latency_ms else f"✅ {api_name} call succeeded")
         else:
-            self._calls[api_name].append({
-                'timestamp': timestamp,
-                'success': False,
-                'error_type': error_type
-            })
-            self._errors[api_name].append({
-                'timestamp': timestamp,
-                'error_type': error_type
-            })
             logger.warning(f"❌ {api_name} call failed ({error_type or 'unknown error'})")
-
-            # Detect rate limit errors
-            if error_type and 'rate' in error_type.lower():
-                self._rate_limits[api_name] += 1
-                logger.error(f"🚨 Rate limit hit for {api_name} (total: {self._rate_limits[api_name]})")
+            if rate_limited:
+                logger.error(f"🚨 Rate limit hit for {api_name} (total: {rate_limit_total})")
 
     def get_success_rate(self, api_name: str, minutes: int = 60) -> Optional[float]:
         """
@@ -72,16 +202,21 @@ class APIMetrics:
         Returns:
             Success rate as percentage (0-100), or None if no calls recorded
         """
-        cutoff = datetime.now() - timedelta(minutes=minutes)
-        recent_calls = [c for c in self._calls[api_name] if c['timestamp'] >= cutoff]
+        with self._lock:
+            buckets = self._window(api_name, minutes)
+            total = sum(b.calls for b in buckets)
+            successful = sum(b.successes for b in buckets)
 
-        if not recent_calls:
+        if not total:
             return None
+        return (successful / total) * 100
 
-        successful = sum(1 for c in recent_calls if c['success'])
-        total = len(recent_calls)
-
-        return (successful / total) * 100 if total > 0 else 0.0
+    def _latency_histogram(self, api_name: str, minutes: int) -> LatencyHistogram:
+        merged = LatencyHistogram()
+        with self._lock:
+            for bucket in self._window(api_name, minutes):
+                merged.merge(bucket.latency)
+        return merged
 
     def get_average_latency(self, api_name: str, minutes: int = 60) -> Optional[float]:
         """
@@ -94,17 +229,24 @@ class APIMetrics:
         Returns:
             Average latency in milliseconds, or None if no successful calls recorded
         """
-        cutoff = datetime.now() - timedelta(minutes=minutes)
-        recent_calls = [
-            c for c in self._calls[api_name]
-            if c['timestamp'] >= cutoff and c['success'] and c.get('latency_ms')
-        ]
+        return self._latency_histogram(api_name, minutes).mean()
 
-        if not recent_calls:
-            return None
+    def get_latency_percentiles(
+        self, api_name: str, minutes: int = 60, percentiles: Iterable[float] = (50, 95, 99)
+    ) -> Dict[float, Optional[float]]:
+        """
+        Latency percentiles for an API in the last N minutes.
+
+        Args:
+            api_name: Name of the API
+            minutes: Time window in minutes (default: 60)
+            percentiles: Percentiles to compute (0-100)
 
-        latencies = [c['latency_ms'] for c in recent_calls]
-        return sum(latencies) / len(latencies)
+        Returns:
+            Dictionary mapping each percentile to milliseconds (None if no data)
+        """
+        histogram = self._latency_histogram(api_name, minutes)
+        return {pct: histogram.percentile(pct) for pct in percentiles}
 
     def get_error_summary(self, api_name: str, minutes: int = 60) -> Dict[str, int]:
         """
@@ -117,14 +259,10 @@ class APIMetrics:
         Returns:
             Dictionary mapping error types to counts
         """
-        cutoff = datetime.now() - timedelta(minutes=minutes)
-        recent_errors = [e for e in self._errors[api_name] if e['timestamp'] >= cutoff]
-
-        summary = defaultdict(int)
-        for error in recent_errors:
-            error_type = error['error_type'] or 'unknown'
-            summary[error_type] += 1
-
+        summary: Counter = Counter()
+        with self._lock:
+            for bucket in self._window(api_name, minutes):
+                summary.update(bucket.errors)
         return dict(summary)
 
     def get_all_metrics(self, minutes: int = 60) -> Dict[str, Dict]:
@@ -139,16 +277,43 @@ class APIMetrics:
         """
         metrics = {}
 
-        for api_name in self._calls.keys():
+        with self._lock:
+            api_names = list(self._buckets.keys())
+
+        for api_name in api_names:
+            percentiles = self.get_latency_percentiles(api_name, minutes)
             metrics[api_name] = {
                 'success_rate': self.get_success_rate(api_name, minutes),
                 'avg_latency_ms': self.get_average_latency(api_name, minutes),
+                'p50_latency_ms': percentiles[50],
+                'p95_latency_ms': percentiles[95],
+                'p99_latency_ms': percentiles[99],
                 'error_summary': self.get_error_summary(api_name, minutes),
                 'rate_limit_hits': self._rate_limits.get(api_name, 0)
             }
 
         return metrics
 
+    def totals(self) -> Dict[str, Dict]:
+        """
+        Counters since start for every API (never windowed; used by the exporter).
+
+        Returns:
+            Dictionary mapping API names to calls, successes, errors (by type),
+            rate_limit_hits and a copy of the latency histogram (ms)
+        """
+        with self._lock:
+            return {
+                api_name: {
+                    'calls': totals.calls,
+                    'successes': totals.successes,
+                    'errors': dict(totals.errors),
+                    'rate_limit_hits': self._rate_limits.get(api_name, 0),
+                    'latency': totals.latency.copy(),
+                }
+                for api_name, totals in self._totals.items()
+            }
+
     def log_summary(self, minutes: int = 60):
         """
         Log a summary of all API metrics.
@@ -164,9 +329,15 @@ class APIMetrics:
 
         for api_name, api_metrics in metrics.items():
             logger.info(f"\n🔹 {api_name.upper()}")
-            logger.info(f"  Success Rate: {api_metrics['success_rate']:.1f}%")
+            if api_metrics['success_rate'] is not None:
+                logger.info(f"  Success Rate: {api_metrics['success_rate']:.1f}%")
             if api_metrics['avg_latency_ms']:
                 logger.info(f"  Avg Latency: {api_metrics['avg_latency_ms']:.0f}ms")
+            if api_metrics['p50_latency_ms']:
+                logger.info(
+                    f"  Latency p50/p95/p99: {api_metrics['p50_latency_ms']:.0f}/"
+                    f"{api_metrics['p95_latency_ms']:.0f}/{api_metrics['p99_latency_ms']:.0f}ms"
+                )
             if api_metrics['error_summary']:
                 logger.info(f"  Errors: {api_metrics['error_summary']}")
             if api_metrics['rate_limit_hits'] > 0:
@@ -176,14 +347,99 @@ class APIMetrics:
 
     def reset(self):
         """Clear all recorded metrics."""
-        self._calls.clear()
-        self._errors.clear()
-        self._rate_limits.clear()
+        with self._lock:
+            self._buckets.clear()
+            self._totals.clear()
+            self._rate_limits.clear()
         logger.info("🔄 Metrics reset")
 
 
+class PipelineMetrics:
+    """Thread-safe counters for document pipelines and their steps (fed by ProgressTracker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Counter = Counter()  # (pipeline, outcome) -> count
+        self._in_flight: Counter = Counter()  # pipeline -> running now
+        self._step_durations: Dict[tuple, LatencyHistogram] = {}  # (pipeline, step) -> ms
+        self._step_outcomes: Counter = Counter()  # (pipeline, step, outcome) -> count
+
+    def pipeline_started(self, pipeline: str):
+        with self._lock:
+            self._in_flight[pipeline] += 1
+
+    def pipeline_finished(self, pipeline: str, success: bool):
+        with self._lock:
+            self._in_flight[pipeline] -= 1
+            self._runs[(pipeline, 'success' if success else 'failure')] += 1
+
+    def record_step(self, pipeline: str, step: str, seconds: Optional[float], success: bool):
+        """
+        Records the outcome (and duration, if known) of one pipeline step.
+
+        Args:
+            pipeline: Pipeline name (document type)
+            step: Step name
+            seconds: Step duration, or None if the step never started
+            success: Whether the step completed
+        """
+        with self._lock:
+            self._step_outcomes[(pipeline, step, 'success' if success else 'failure')] += 1
+            if seconds is not None:
+                histogram = self._step_durations.setdefault((pipeline, step), LatencyHistogram())
+                histogram.record(seconds * 1000)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                'runs': dict(self._runs),
+                'in_flight': dict(self._in_flight),
+                'step_durations': {key: h.copy() for key, h in self._step_durations.items()},
+                'step_outcomes': dict(self._step_outcomes),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._runs.clear()
+            self._in_flight.clear()
+            self._step_durations.clear()
+            self._step_outcomes.clear()
+
+
+class JSONRepairMetrics:
+    """
+    Thread-safe counters for JSON responses requested from the LLMs.
+
+    Outcomes: 'valid' (parsed as is), 'local' (fixed by src/utils/json_repair.py),
+    'model' (fixed by REPAIR_MODEL), 'failed' (still invalid after the model),
+    'regenerate' (the caller discarded the response and asked again).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes: Counter = Counter()  # outcome -> count
+        self._fixes: Counter = Counter()  # local fix kind -> count
+
+    def record(self, outcome: str, fixes: Sequence[str] = ()):
+        with self._lock:
+            self._outcomes[outcome] += 1
+            for fix in fixes:
+                self._fixes[fix] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {'outcomes': dict(self._outcomes), 'fixes': dict(self._fixes)}
+
+    def reset(self):
+        with self._lock:
+            self._outcomes.clear()
+            self._fixes.clear()
+
+
 # Global metrics instance
 api_metrics = APIMetrics()
+pipeline_metrics = PipelineMetrics()
+json_repair_metrics = JSONRepairMetrics()
 
 
 def track_api_call(api_name: str):
@@ -199,13 +455,15 @@ def track_api_call(api_name: str):
         api_name: Name of the API being called
     """
     def decorator(func):
+        @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
             start_time = time.time()
             success = False
             error_type = None
 
             try:
-                result = await func(*args, **kwargs)
+                with span(f"{api_name}.{func.__name__}", api=api_name, attempt=current_attempt()):
+                    result = await func(*args, **kwargs)
                 success = result is not None
                 return result
             except Exception as e:
@@ -215,13 +473,15 @@ def track_api_call(api_name: str):
                 latency_ms = (time.time() - start_time) * 1000
                 api_metrics.record_call(api_name, success, latency_ms, error_type)
 
+        @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
             start_time = time.time()
             success = False
             error_type = None
 
             try:
-                result = func(*args, **kwargs)
+                with span(f"{api_name}.{func.__name__}", api=api_name, attempt=current_attempt()):
+                    result = func(*args, **kwargs)
                 success = result is not None
                 return result
             except Exception as e:
@@ -240,4 +500,13 @@ def track_api_call(api_name: str):
     return decorator
 
 
-__all__ = ['APIMetrics', 'api_metrics', 'track_api_call']
+__all__ = [
+    'APIMetrics',
+    'PipelineMetrics',
+    'JSONRepairMetrics',
+    'LatencyHistogram',
+    'api_metrics',
+    'pipeline_metrics',
+    'json_repair_metrics',
+    'track_api_call',
+]
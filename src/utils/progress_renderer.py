@@ -0,0 +1,258 @@
+"""
+Coalescing, rate-limited renderer for progress messages.
+
+The pipeline used to edit its progress message on every state change (twice
+per step, plus live draft previews). Telegram limits message edits per chat
+(~20/minute in groups) and per bot, so several pipelines running in the same
+union group hit flood control and PTB slept the whole handler. ProgressRenderer
+sits between ProgressTracker and edit_message_text:
+
+- Coalescing: state changes within PROGRESS_COALESCE_WINDOW seconds become one edit
+- Dedup: text identical to the last delivered text is never sent
+- Budgets: one token bucket per chat (shared by every renderer in that chat)
+  and one global bucket for the bot; RetryAfter blocks the chat bucket
+- Latest state wins: intermediate states may be dropped, but the most recent
+  one is always delivered; flush() waits for it (use before the final reply)
+
+Usage:
+    renderer = ProgressRenderer(context.bot, chat_id, message_id)
+    tracker.attach_renderer(renderer)
+    ...
+    await renderer.flush()
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from telegram.error import BadRequest, RetryAfter
+
+from src.config import (
+    PROGRESS_COALESCE_WINDOW,
+    PROGRESS_CHAT_EDITS_PER_MINUTE,
+    PROGRESS_CHAT_EDIT_BURST,
+    PROGRESS_GLOBAL_EDITS_PER_SECOND
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for a single event loop (no locking needed).
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        blocked = max(0.0, self._blocked_until - self._clock())
+        if self._tokens >= 1:
+            return blocked
+        return max(blocked, (1 - self._tokens) / self.rate)
+
+    def consume(self):
+        """Takes one token. Call only after delay() returned 0."""
+        self._refill()
+        self._tokens -= 1
+
+    def block_for(self, seconds: float):
+        """Refuses tokens for the given time (e.g., after a RetryAfter) and empties the bucket."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+        self._tokens = 0
+
+    def idle(self) -> bool:
+        """True when the bucket is full and not blocked (a fresh bucket would behave the same)."""
+        self._refill()
+        return self._tokens >= self.capacity and self._blocked_until <= self._clock()
+
+
+_chat_buckets: Dict[int, TokenBucket] = {}
+_global_bucket: Optional[TokenBucket] = None
+
+
+def get_chat_bucket(chat_id: int) -> TokenBucket:
+    """
+    Returns the edit budget shared by all progress messages in a chat.
+
+    Idle buckets of other chats are evicted when a new one is created, so the
+    table only holds chats with edits in the last few minutes.
+    """
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        for idle_chat in [c for c, b in _chat_buckets.items() if b.idle()]:
+            del _chat_buckets[idle_chat]
+        bucket = TokenBucket(PROGRESS_CHAT_EDITS_PER_MINUTE / 60, PROGRESS_CHAT_EDIT_BURST)
+        _chat_buckets[chat_id] = bucket
+    return bucket
+
+
+def get_global_bucket() -> TokenBucket:
+    """Returns the bot-wide edit budget."""
+    global _global_bucket
+    if _global_bucket is None:
+        _global_bucket = TokenBucket(PROGRESS_GLOBAL_EDITS_PER_SECOND, PROGRESS_GLOBAL_EDITS_PER_SECOND)
+    return _global_bucket
+
+
+class ProgressRenderer:
+    """
+    Delivers the latest progress text to one Telegram message within the edit budgets.
+    """
+
+    def __init__(self, bot, chat_id: int, message_id: int, initial_text: Optional[str] = None,
+                 coalesce_window: float = PROGRESS_COALESCE_WINDOW):
+        """
+        Args:
+            bot: telegram.Bot used to edit the message
+            chat_id: Chat of the progress message
+            message_id: Progress message to edit
+            initial_text: Text the message was sent with (never re-sent)
+            coalesce_window: Seconds to collect state changes before editing
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.coalesce_window = coalesce_window
+        self.edits_sent = 0
+        self._last_sent = initial_text
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_event = asyncio.Event()
+        self._flush_text: Optional[str] = None
+
+    def request_render(self, steps_status: list):
+        """
+        Records a new state. Never blocks; the edit is scheduled in the background.
+
+        Args:
+            steps_status: ProgressTracker.get_steps_status() output
+        """
+        from src.utils import format_progress_text
+
+        self.request_text(format_progress_text(steps_status))
+
+    def request_text(self, text: str):
+        """
+        Records new message text directly (e.g., upload progress).
+
+        Same delivery rules as request_render(); the text is sent as Markdown.
+        """
+        self._pending = text
+        if self._pending == self._last_sent:
+            return
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                # No running loop (sync caller): flush() will deliver it
+                pass
+
+    async def flush(self, timeout: Optional[float] = None):
+        """
+        Delivers the latest state now (still within the edit budgets) and waits for it.
+
+        Args:
+            timeout: Maximum seconds to wait; on timeout the edit is still
+                     delivered in the background once the budget allows it
+        """
+        self._flush_text = self._pending
+        self._flush_event.set()
+        if self._task is None or self._task.done():
+            if self._pending is None or self._pending == self._last_sent:
+                return
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Progress message in chat {self.chat_id} still waiting for edit budget")
+
+    async def _run(self):
+        try:
+            await self._deliver()
+        finally:
+            # Nothing left to flush: later states are coalesced again
+            self._flush_event.clear()
+            self._flush_text = None
+
+    async def _deliver(self):
+        while True:
+            if not self._flush_event.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), self.coalesce_window)
+                except asyncio.TimeoutError:
+                    pass
+
+            if self._pending is None or self._pending == self._last_sent:
+                return
+            await self._acquire()
+
+            # Read after acquiring: changes made while waiting for budget ride along
+            text = self._pending
+            if text is None or text == self._last_sent:
+                return
+
+            try:
+                await self.bot.edit_message_text(
+                    chat_id=self.chat_id,
+                    message_id=self.message_id,
+                    text=text,
+                    parse_mode='Markdown'
+                )
+                self._last_sent = text
+                self.edits_sent += 1
+                if text == self._flush_text:
+                    self._flush_event.clear()
+                    self._flush_text = None
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+                logger.warning(f"Progress edit flood-limited in chat {self.chat_id}, retrying in {seconds}s")
+                get_chat_bucket(self.chat_id).block_for(seconds)
+                continue
+            except BadRequest as e:
+                if str(e).startswith("Message is not modified"):
+                    self._last_sent = text
+                else:
+                    logger.error(f"Error updating progress message: {e}")
+                    return
+            except Exception as e:
+                logger.error(f"Error updating progress message: {e}")
+                return
+
+            if self._pending == self._last_sent:
+                return
+
+    async def _acquire(self):
+        """Waits until both the chat and the global budget allow one edit, then consumes it."""
+        chat_bucket = get_chat_bucket(self.chat_id)
+        global_bucket = get_global_bucket()
+        while True:
+            delay = max(chat_bucket.delay(), global_bucket.delay())
+            if delay <= 0:
+                chat_bucket.consume()
+                global_bucket.consume()
+                return
+            await asyncio.sleep(delay)
+
+
+__all__ = ['ProgressRenderer', 'TokenBucket', 'get_chat_bucket', 'get_global_bucket']
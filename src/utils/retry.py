@@ -3,147 +3,398 @@ Utility decorators and functions for retry logic with exponential backoff.
 
 Provides retry decorators for API calls to external services (Notion, Drive, etc.)
 to handle transient failures like rate limits, network issues, and temporary outages.
+
+All decorators share one retry engine:
+- Jittered exponential backoff ("full jitter") so concurrent callers spread out
+- Retry-After headers (429/503) are honoured as the minimum wait
+- Permanent HTTP errors (400, 401, 403, 404...) are not retried
+- A process-wide RetryBudget caps how many retries can be spent per second, so an
+  outage degrades into fast failures instead of a retry storm against Notion/Google
+- Synchronous functions never sleep on the event loop thread: when called from a
+  coroutine they fail fast instead of freezing Telegram polling. Run them through
+  src.utils.executor.run_blocking() to get full retries off the loop.
 """
 
 import asyncio
 import functools
+import inspect
 import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Type, Tuple, Optional, Callable
 
+from src.utils.tracing import span, retry_attempt
+from src.config import (
+    RETRY_BUDGET_CAPACITY,
+    RETRY_BUDGET_REFILL_PER_SECOND,
+    RETRY_MAX_DELAY,
+    RETRY_MAX_RETRY_AFTER
+)
+
 logger = logging.getLogger(__name__)
 
+# HTTP status codes worth retrying; any other status is treated as permanent
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
 
-def async_retry(
+
+class RetryBudget:
+    """
+    Thread-safe token bucket shared by every retry decorator in the process.
+
+    Each retry (not the first attempt) consumes one token. Tokens refill at a
+    fixed rate up to `capacity`. When the bucket is empty, callers stop retrying
+    and surface the original error immediately.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+
+    def try_acquire(self) -> bool:
+        """
+        Consumes one retry token.
+
+        Returns:
+            True if the retry may proceed, False if the budget is exhausted
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def available(self) -> float:
+        """Number of retry tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def reset(self):
+        """Refills the bucket completely."""
+        with self._lock:
+            self._tokens = self.capacity
+            self._updated_at = time.monotonic()
+
+
+# Global budget shared by all integrations
+retry_budget = RetryBudget(RETRY_BUDGET_CAPACITY, RETRY_BUDGET_REFILL_PER_SECOND)
+
+
+def _get_status_code(exc: Exception) -> Optional[int]:
+    """Extracts an HTTP status code from googleapiclient/notion/httpx/aiohttp errors."""
+    resp = getattr(exc, 'resp', None)  # googleapiclient HttpError
+    if resp is not None and getattr(resp, 'status', None) is not None:
+        return int(resp.status)
+
+    status = getattr(exc, 'status', None)  # notion APIResponseError, aiohttp
+    if isinstance(status, int):
+        return status
+
+    response = getattr(exc, 'response', None)  # httpx.HTTPStatusError
+    status_code = getattr(response, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code
+    return None
+
+
+def get_retry_after(exc: Exception) -> Optional[float]:
+    """
+    Returns the server-requested wait in seconds from a Retry-After header.
+
+    Supports both delta-seconds and HTTP-date values.
+
+    Args:
+        exc: Exception raised by an API client
+
+    Returns:
+        Seconds to wait, or None if the error carries no Retry-After header
+    """
+    candidates = (
+        getattr(exc, 'headers', None),
+        getattr(getattr(exc, 'response', None), 'headers', None),
+        getattr(exc, 'resp', None),
+    )
+
+    value = None
+    for headers in candidates:
+        if not headers or not hasattr(headers, 'get'):
+            continue
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        if value:
+            break
+
+    if not value:
+        return None
+
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """
+    Default retry predicate: retry network errors and retryable HTTP statuses.
+
+    Args:
+        exc: Exception raised by the decorated function
+
+    Returns:
+        False for permanent HTTP errors (e.g., 400, 401, 404), True otherwise
+    """
+    status = _get_status_code(exc)
+    if status is None:
+        return True
+    return status in RETRYABLE_STATUS_CODES
+
+
+def compute_backoff(attempt: int, initial_delay: float, backoff_factor: float,
+                    max_delay: float = RETRY_MAX_DELAY) -> float:
+    """
+    Computes a "full jitter" exponential backoff delay.
+
+    Args:
+        attempt: Zero-based index of the failed attempt
+        initial_delay: Base delay in seconds
+        backoff_factor: Multiplier applied per attempt
+        max_delay: Upper bound for the exponential ceiling
+
+    Returns:
+        A random delay between 0 and min(max_delay, initial_delay * factor^attempt)
+    """
+    ceiling = min(max_delay, initial_delay * (backoff_factor ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def _plan_retry(func_name: str, attempt: int, max_retries: int, exc: Exception,
+                initial_delay: float, backoff_factor: float, max_delay: float,
+                retry_if: Callable, budget: Optional[RetryBudget]) -> Optional[float]:
+    """
+    Decides whether a failed attempt should be retried.
+
+    Returns:
+        The delay in seconds before the next attempt, or None to give up
+    """
+    if attempt == max_retries - 1:
+        logger.error(
+            f"{func_name} failed after {max_retries} attempts. "
+            f"Final error: {type(exc).__name__}: {exc}"
+        )
+        return None
+
+    if not retry_if(exc):
+        logger.error(f"{func_name} failed with non-retryable error: {type(exc).__name__}: {exc}")
+        return None
+
+    retry_after = get_retry_after(exc)
+    if retry_after is not None and retry_after > RETRY_MAX_RETRY_AFTER:
+        logger.error(
+            f"{func_name} asked to retry after {retry_after:.0f}s "
+            f"(limit {RETRY_MAX_RETRY_AFTER:.0f}s). Giving up."
+        )
+        return None
+
+    if budget is not None and not budget.try_acquire():
+        logger.error(f"{func_name} retry budget exhausted. Failing fast: {type(exc).__name__}: {exc}")
+        return None
+
+    delay = compute_backoff(attempt, initial_delay, backoff_factor, max_delay)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+
+    logger.warning(
+        f"{func_name} attempt {attempt + 1}/{max_retries} failed. "
+        f"Error: {type(exc).__name__}: {exc}. Retrying in {delay:.1f}s..."
+    )
+    return delay
+
+
+def _on_event_loop_thread() -> bool:
+    """True when the current thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def retry(
     max_retries: int = 3,
     initial_delay: float = 1.0,
     backoff_factor: float = 2.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    max_delay: float = RETRY_MAX_DELAY,
+    retry_if: Callable[[Exception], bool] = is_transient_error,
+    budget: Optional[RetryBudget] = retry_budget
 ):
     """
-    Async retry decorator with exponential backoff.
+    Retry decorator for both sync and async functions.
+
+    Coroutine functions back off with asyncio.sleep. Plain functions back off
+    with time.sleep only when running off the event loop (e.g., inside
+    run_blocking); on the event loop thread they make a single attempt.
 
     Args:
-        max_retries: Maximum number of retry attempts (default: 3)
-        initial_delay: Initial delay in seconds before first retry (default: 1.0)
-        backoff_factor: Multiplier for delay after each retry (default: 2.0)
+        max_retries: Maximum number of attempts (default: 3)
+        initial_delay: Base delay in seconds for the backoff (default: 1.0)
+        backoff_factor: Multiplier for the backoff ceiling after each retry (default: 2.0)
         exceptions: Tuple of exception types to catch and retry (default: all Exceptions)
-        on_retry: Optional callback function called on each retry attempt
+        on_retry: Optional callback called as on_retry(attempt, error); may be async
+                  when decorating a coroutine function
+        max_delay: Maximum backoff ceiling in seconds
+        retry_if: Predicate deciding whether an exception is retryable
+        budget: Shared RetryBudget (default: process-wide budget; None disables it)
 
     Example:
-        @async_retry(max_retries=3, exceptions=(ConnectionError, TimeoutError))
-        async def api_call():
-            # Make API request
-            pass
+        @retry(max_retries=3, exceptions=(HttpError, ConnectionError))
+        def create_folder(...):
+            ...
     """
     def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_retries):
+                    try:
+                        with retry_attempt(attempt + 1):
+                            return await func(*args, **kwargs)
+                    except exceptions as e:
+                        delay = _plan_retry(
+                            func.__name__, attempt, max_retries, e,
+                            initial_delay, backoff_factor, max_delay, retry_if, budget
+                        )
+                        if delay is None:
+                            raise
+
+                        if on_retry:
+                            try:
+                                result = on_retry(attempt + 1, e)
+                                if inspect.isawaitable(result):
+                                    await result
+                            except Exception as callback_error:
+                                logger.error(f"on_retry callback failed: {callback_error}")
+
+                        with span(f"{func.__name__} backoff", kind="backoff", attempt=attempt + 1, delay=round(delay, 2)):
+                            await asyncio.sleep(delay)
+
+            return async_wrapper
+
         @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            delay = initial_delay
-            last_exception = None
+        def sync_wrapper(*args, **kwargs):
+            attempts = max_retries
+            if _on_event_loop_thread():
+                # Sleeping here would freeze every handler; fail fast instead.
+                attempts = 1
 
-            for attempt in range(max_retries):
+            for attempt in range(attempts):
                 try:
-                    return await func(*args, **kwargs)
+                    with retry_attempt(attempt + 1):
+                        return func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-
-                    if attempt == max_retries - 1:
-                        # Last attempt failed, log and raise
-                        logger.error(
-                            f"{func.__name__} failed after {max_retries} attempts. "
-                            f"Final error: {type(e).__name__}: {e}"
+                    if attempts == 1 and max_retries > 1:
+                        logger.warning(
+                            f"{func.__name__} failed on the event loop thread; not retrying "
+                            f"to avoid blocking. Use run_blocking() for retries. "
+                            f"Error: {type(e).__name__}: {e}"
                         )
-                        raise e
+                        raise
 
-                    # Log retry attempt
-                    logger.warning(
-                        f"{func.__name__} attempt {attempt + 1}/{max_retries} failed. "
-                        f"Error: {type(e).__name__}: {e}. Retrying in {delay:.1f}s..."
+                    delay = _plan_retry(
+                        func.__name__, attempt, attempts, e,
+                        initial_delay, backoff_factor, max_delay, retry_if, budget
                     )
+                    if delay is None:
+                        raise
 
-                    # Call on_retry callback if provided
                     if on_retry:
                         try:
-                            await on_retry(attempt + 1, e)
+                            on_retry(attempt + 1, e)
                         except Exception as callback_error:
                             logger.error(f"on_retry callback failed: {callback_error}")
 
-                    # Exponential backoff
-                    await asyncio.sleep(delay)
-                    delay *= backoff_factor
-
-            # Should never reach here, but just in case
-            if last_exception:
-                raise last_exception
+                    with span(f"{func.__name__} backoff", kind="backoff", attempt=attempt + 1, delay=round(delay, 2)):
+                        time.sleep(delay)
 
-        return wrapper
+        return sync_wrapper
     return decorator
 
 
-def sync_retry(
+def async_retry(
     max_retries: int = 3,
     initial_delay: float = 1.0,
     backoff_factor: float = 2.0,
     exceptions: Tuple[Type[Exception], ...] = (Exception,),
-    on_retry: Optional[Callable] = None
+    on_retry: Optional[Callable] = None,
+    **engine_options
 ):
     """
-    Synchronous retry decorator with exponential backoff.
+    Async retry decorator with jittered exponential backoff.
 
-    Args:
-        max_retries: Maximum number of retry attempts (default: 3)
-        initial_delay: Initial delay in seconds before first retry (default: 1.0)
-        backoff_factor: Multiplier for delay after each retry (default: 2.0)
-        exceptions: Tuple of exception types to catch and retry (default: all Exceptions)
-        on_retry: Optional callback function called on each retry attempt
+    Thin alias of retry() kept for existing call sites.
 
     Example:
-        @sync_retry(max_retries=3, exceptions=(ConnectionError, TimeoutError))
-        def api_call():
+        @async_retry(max_retries=3, exceptions=(ConnectionError, TimeoutError))
+        async def api_call():
             # Make API request
             pass
     """
-    def decorator(func: Callable):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            import time
-            delay = initial_delay
-            last_exception = None
-
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exception = e
+    return retry(max_retries, initial_delay, backoff_factor, exceptions, on_retry, **engine_options)
 
-                    if attempt == max_retries - 1:
-                        # Last attempt failed, log and raise
-                        logger.error(
-                            f"{func.__name__} failed after {max_retries} attempts. "
-                            f"Final error: {type(e).__name__}: {e}"
-                        )
-                        raise e
-
-                    # Log retry attempt
-                    logger.warning(
-                        f"{func.__name__} attempt {attempt + 1}/{max_retries} failed. "
-                        f"Error: {type(e).__name__}: {e}. Retrying in {delay:.1f}s..."
-                    )
 
-                    # Call on_retry callback if provided
-                    if on_retry:
-                        try:
-                            on_retry(attempt + 1, e)
-                        except Exception as callback_error:
-                            logger.error(f"on_retry callback failed: {callback_error}")
+def sync_retry(
+    max_retries: int = 3,
+    initial_delay: float = 1.0,
+    backoff_factor: float = 2.0,
+    exceptions: Tuple[Type[Exception], ...] = (Exception,),
+    on_retry: Optional[Callable] = None,
+    **engine_options
+):
+    """
+    Synchronous retry decorator with jittered exponential backoff.
 
-                    # Exponential backoff
-                    time.sleep(delay)
-                    delay *= backoff_factor
+    Thin alias of retry() kept for existing call sites. Never sleeps on the
+    event loop thread (see module docstring).
 
-        return wrapper
-    return decorator
+    Example:
+        @sync_retry(max_retries=3, exceptions=(ConnectionError, TimeoutError))
+        def api_call():
+            # Make API request
+            pass
+    """
+    return retry(max_retries, initial_delay, backoff_factor, exceptions, on_retry, **engine_options)
 
 
-__all__ = ['async_retry', 'sync_retry']
+__all__ = [
+    'retry',
+    'async_retry',
+    'sync_retry',
+    'RetryBudget',
+    'retry_budget',
+    'get_retry_after',
+    'is_transient_error',
+    'compute_backoff',
+]
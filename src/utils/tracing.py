@@ -0,0 +1,312 @@
+"""
+Lightweight per-case tracing.
+
+When a case is slow, the question is where the time went: Perplexity retries,
+an OpenRouter fallback, Drive backoff or Notion. Every document pipeline runs
+inside a trace; spans are recorded for:
+
+- each pipeline step (DAGExecutor)
+- each external call (track_api_call), tagged with the retry attempt and,
+  for LLM calls, the model
+- each retry backoff wait (retry decorators)
+
+The current span lives in a contextvar, so it follows asyncio tasks and, via
+run_blocking, calls made in the integration thread pools. Spans are buffered per
+trace and written together when the trace ends, one JSON object per line, to
+TRACE_FILE (rotated like the bot logs). Every record carries the case ID, so
+/trace <case_id> can render a waterfall from a single ID.
+
+Outside a trace (e.g., background index sync) span() is a no-op.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config import TRACING_ENABLED, TRACE_FILE, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "status", "error")
+
+    def __init__(self, trace: "Trace", name: str, kind: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        """Adds attributes to the span (e.g., the model that answered)."""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "case_id": self.trace.case_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start, 4),
+            "duration_ms": round(((self.end or time.time()) - self.start) * 1000, 1),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans of one pipeline run; thread-safe because calls may end in executor threads."""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.case_id: Optional[str] = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [span.to_record() for span in self.spans]
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_retry_attempt: contextvars.ContextVar[int] = contextvars.ContextVar("retry_attempt", default=1)
+
+_trace_logger: Optional[logging.Logger] = None
+_trace_logger_lock = threading.Lock()
+
+
+def _get_trace_logger() -> logging.Logger:
+    """Dedicated non-propagating logger writing raw JSON lines to TRACE_FILE."""
+    global _trace_logger
+    with _trace_logger_lock:
+        if _trace_logger is None:
+            os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            trace_logger = logging.getLogger("marxnager.traces")
+            trace_logger.setLevel(logging.INFO)
+            trace_logger.propagate = False
+            trace_logger.addHandler(handler)
+            _trace_logger = trace_logger
+        return _trace_logger
+
+
+def export_trace(trace: Trace):
+    """Writes all spans of a finished trace to the JSONL trace file."""
+    try:
+        trace_logger = _get_trace_logger()
+        for record in trace.records():
+            trace_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.error(f"Could not export trace {trace.trace_id}: {e}")
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace() -> Optional[Trace]:
+    span = _current_span.get()
+    return span.trace if span else None
+
+
+def set_case_id(case_id: str):
+    """Binds the running trace to a case ID (known only after Initialization)."""
+    trace = current_trace()
+    if trace is not None:
+        trace.case_id = case_id
+
+
+def tag_span(**attributes):
+    """Adds attributes to the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def current_attempt() -> int:
+    """Attempt number (1-based) of the innermost retry decorator."""
+    return _retry_attempt.get()
+
+
+@contextmanager
+def retry_attempt(attempt: int) -> Iterator[None]:
+    """Marks calls made inside the block as the given retry attempt."""
+    token = _retry_attempt.set(attempt)
+    try:
+        yield
+    finally:
+        _retry_attempt.reset(token)
+
+
+@contextmanager
+def _enter(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        span.end = time.time()
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Runs the block as the root span of a new trace and exports the trace at the end.
+
+    Yields None when tracing is disabled.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    trace = Trace(name)
+    root = Span(trace, name, "pipeline", None, attributes)
+    trace.add(root)
+    try:
+        with _enter(root):
+            yield root
+    finally:
+        export_trace(trace)
+
+
+@contextmanager
+def span(name: str, kind: str = "call", **attributes) -> Iterator[Optional[Span]]:
+    """
+    Records a child span of the current span. No-op (yields None) outside a trace.
+
+    Works in coroutines and plain functions alike.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, kind, parent.span_id, attributes)
+    parent.trace.add(child)
+    with _enter(child):
+        yield child
+
+
+def _trace_files() -> List[str]:
+    """TRACE_FILE and its rotated backups, newest first."""
+    files = [TRACE_FILE] + [f"{TRACE_FILE}.{i}" for i in range(1, TRACE_BACKUP_COUNT + 1)]
+    return [path for path in files if os.path.exists(path)]
+
+
+def load_trace(case_id: str) -> List[Dict[str, Any]]:
+    """
+    Returns the span records of the most recent trace of a case.
+
+    Args:
+        case_id: Case ID (e.g., 'D-2026-001')
+
+    Returns:
+        Span records ordered by start time (empty if the case has no trace on disk)
+    """
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for path in _trace_files():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if case_id not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("case_id") == case_id:
+                    traces.setdefault(record["trace_id"], []).append(record)
+        if traces:
+            # Newer files are read first; the newest trace of the case lives here
+            break
+
+    if not traces:
+        return []
+    latest = max(traces.values(), key=lambda spans: max(s["start"] for s in spans))
+    return sorted(latest, key=lambda s: s["start"])
+
+
+def render_waterfall(records: List[Dict[str, Any]], width: int = 16, max_lines: int = 60) -> str:
+    """
+    Renders span records as a plain-text waterfall (for a monospace block).
+
+    Each line shows a bar placed on the trace timeline, the span name indented
+    by depth, and its duration; failed spans are marked with ✗.
+    """
+    if not records:
+        return ""
+    t0 = min(r["start"] for r in records)
+    t1 = max(r["start"] + r["duration_ms"] / 1000 for r in records)
+    total = max(t1 - t0, 1e-6)
+
+    by_id = {r["span_id"]: r for r in records}
+
+    def depth(record) -> int:
+        level, parent = 0, record.get("parent_id")
+        while parent in by_id and level < 10:
+            level, parent = level + 1, by_id[parent].get("parent_id")
+        return level
+
+    lines = []
+    for record in records[:max_lines]:
+        begin = int((record["start"] - t0) / total * width)
+        length = max(1, round(record["duration_ms"] / 1000 / total * width))
+        bar = (" " * begin + "█" * length)[:width].ljust(width)
+
+        label = record["name"]
+        attrs = record.get("attributes") or {}
+        if attrs.get("model"):
+            label += f" [{attrs['model'].split('/')[-1]}]"
+        if attrs.get("attempt", 1) > 1:
+            label += f" #{attrs['attempt']}"
+        if record["status"] == "error":
+            label += " ✗"
+        lines.append(f"|{bar}| {'  ' * depth(record)}{label} {record['duration_ms'] / 1000:.1f}s")
+
+    if len(records) > max_lines:
+        lines.append(f"… {len(records) - max_lines} spans más")
+    return "\n".join(lines)
+
+
+__all__ = [
+    'Span',
+    'Trace',
+    'start_trace',
+    'span',
+    'tag_span',
+    'set_case_id',
+    'current_span',
+    'current_trace',
+    'current_attempt',
+    'retry_attempt',
+    'load_trace',
+    'render_waterfall',
+    'export_trace',
+]
@@ -0,0 +1,135 @@
+"""
+Concurrent Telegram update processing with per-chat ordering.
+
+By default PTB handles updates one after another, so a /demanda pipeline that
+runs for minutes blocked /status, /history and every other delegate's command.
+ChatOrderedUpdateProcessor (plugged into ApplicationBuilder.concurrent_updates)
+processes updates concurrently with these rules:
+
+- Ordering: updates from the same user in the same chat run one at a time, in
+  arrival order (e.g., the messages of a private editing session)
+- Two lanes: pipeline commands (/denuncia, /demanda, /email) are ordered among
+  themselves and capped at PIPELINE_MAX_CONCURRENT in flight; every other update
+  uses the priority lane and is never queued behind document generation
+- Updates without a chat or user (e.g., poll answers) run unordered
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Hashable, Iterable, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from src.config import UPDATE_MAX_CONCURRENT, UPDATE_MAX_PENDING, PIPELINE_MAX_CONCURRENT
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_LANE = "pipeline"
+PRIORITY_LANE = "priority"
+
+
+def command_name(update: object) -> Optional[str]:
+    """Returns the bot command of a message update (without '/' and '@botname'), or None."""
+    message = getattr(update, "effective_message", None)
+    text = getattr(message, "text", None) if message else None
+    if not text or not text.startswith("/") or len(text) == 1 or text[1].isspace():
+        return None
+    return text[1:].split(maxsplit=1)[0].split("@", 1)[0].lower()
+
+
+def ordering_key(update: object) -> Optional[Tuple[int, int]]:
+    """Returns (chat_id, user_id) for updates that must stay ordered, or None."""
+    if not isinstance(update, Update):
+        return None
+    chat, user = update.effective_chat, update.effective_user
+    if chat is None or user is None:
+        return None
+    return chat.id, user.id
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor with per-(chat, user) ordering, a capped pipeline lane and a priority lane.
+    """
+
+    def __init__(
+        self,
+        pipeline_commands: Iterable[str],
+        max_concurrent_updates: int = UPDATE_MAX_CONCURRENT,
+        max_pipelines: int = PIPELINE_MAX_CONCURRENT,
+        max_pending: int = UPDATE_MAX_PENDING
+    ):
+        """
+        Args:
+            pipeline_commands: Command names routed to the pipeline lane (e.g., 'demanda')
+            max_concurrent_updates: Priority-lane updates processed at the same time
+            max_pipelines: Pipeline commands processed at the same time
+            max_pending: Updates accepted (running or waiting) before PTB stops
+                         handing over new ones
+        """
+        # PTB's own semaphore only bounds pending work; the lanes do the real scheduling
+        super().__init__(max_pending)
+        self.pipeline_commands = frozenset(c.lower() for c in pipeline_commands)
+        self.max_pipelines = max_pipelines
+        self.pipelines_in_flight = 0
+        self.pipelines_queued = 0
+        self._lane_limits = {
+            PIPELINE_LANE: asyncio.Semaphore(max_pipelines),
+            PRIORITY_LANE: asyncio.Semaphore(max_concurrent_updates),
+        }
+        # (lane, ordering key) -> [lock, number of updates holding or waiting for it]
+        self._order_locks: Dict[Tuple[str, Hashable], list] = {}
+
+    def lane_for(self, update: object) -> str:
+        """Returns the lane an update is processed in."""
+        return PIPELINE_LANE if command_name(update) in self.pipeline_commands else PRIORITY_LANE
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        lane = self.lane_for(update)
+        key = ordering_key(update)
+
+        if key is None:
+            await self._run_in_lane(lane, coroutine)
+            return
+
+        entry = self._order_locks.setdefault((lane, key), [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            # Ordered first, then limited: a user's queued update never holds a lane slot
+            async with entry[0]:
+                await self._run_in_lane(lane, coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._order_locks[(lane, key)]
+
+    async def _run_in_lane(self, lane: str, coroutine: Awaitable[Any]):
+        limit = self._lane_limits[lane]
+        if lane != PIPELINE_LANE:
+            async with limit:
+                await coroutine
+            return
+
+        if limit.locked():
+            logger.info(f"Pipeline cap ({self.max_pipelines}) reached, queuing pipeline command")
+        self.pipelines_queued += 1
+        try:
+            await limit.acquire()
+        finally:
+            self.pipelines_queued -= 1
+        try:
+            self.pipelines_in_flight += 1
+            await coroutine
+        finally:
+            self.pipelines_in_flight -= 1
+            limit.release()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+__all__ = ['ChatOrderedUpdateProcessor', 'command_name', 'ordering_key', 'PIPELINE_LANE', 'PRIORITY_LANE']
@@ -0,0 +1,161 @@
+"""
+Streaming evidence uploads from Telegram to Drive.
+
+Attachments used to be downloaded with download_as_bytearray() and uploaded
+from an in-memory BytesIO, so every concurrent video or voice note cost a full
+copy in RAM. Now:
+
+- spool_telegram_file() streams the file from the Bot API to a temp file in
+  UPLOAD_SPOOL_DIR, in UPLOAD_DOWNLOAD_CHUNK_SIZE pieces, refusing files over
+  UPLOAD_MAX_BYTES
+- DelegadoDriveClient.upload_file_resumable() sends the temp file as a chunked
+  resumable upload; each chunk is retried on its own and the upload resumes
+  from the last byte Drive acknowledged
+
+Peak memory is one chunk per upload whatever the file size. Both stages report
+progress through a callback (format_upload_progress() renders it for chat).
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+from typing import Callable, Optional
+
+import aiohttp
+
+from src.config import (
+    HTTP_CONNECT_TIMEOUT,
+    UPLOAD_SPOOL_DIR,
+    UPLOAD_MAX_BYTES,
+    UPLOAD_DOWNLOAD_CHUNK_SIZE,
+    UPLOAD_READ_TIMEOUT
+)
+from src.integrations.http_pool import get_aiohttp_session
+
+logger = logging.getLogger(__name__)
+
+# (bytes done, total bytes or None if unknown)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+# Bot API file URLs embed the bot token: https://api.telegram.org/file/bot<TOKEN>/...
+_BOT_TOKEN_RE = re.compile(r"bot\d+:[A-Za-z0-9_-]+")
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an attachment exceeds UPLOAD_MAX_BYTES."""
+
+
+class DownloadError(IOError):
+    """Raised when a Telegram file cannot be downloaded. Never carries the file URL."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def redact_bot_token(text: str) -> str:
+    """Masks bot tokens (e.g., in Bot API file URLs) before text is logged."""
+    return _BOT_TOKEN_RE.sub("bot<redacted>", text)
+
+
+def _check_size(size: Optional[int], max_bytes: int):
+    if size is not None and size > max_bytes:
+        raise UploadTooLargeError(
+            f"El archivo ocupa {size / 1_048_576:.1f} MB (máximo {max_bytes / 1_048_576:.0f} MB)"
+        )
+
+
+async def spool_telegram_file(file_obj, on_progress: Optional[ProgressCallback] = None,
+                              max_bytes: int = UPLOAD_MAX_BYTES,
+                              chunk_size: int = UPLOAD_DOWNLOAD_CHUNK_SIZE) -> str:
+    """
+    Streams a Telegram file to a temp file without holding it in memory.
+
+    Args:
+        file_obj: telegram.File from attachment.get_file()
+        on_progress: Called with (bytes written, file size) after each chunk
+        max_bytes: Size limit; larger files are rejected before/while downloading
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        Path of the temp file (the caller deletes it)
+
+    Raises:
+        UploadTooLargeError: The file exceeds max_bytes
+        DownloadError / asyncio.TimeoutError: Download failed
+    """
+    total = getattr(file_obj, "file_size", None)
+    _check_size(total, max_bytes)
+
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=UPLOAD_SPOOL_DIR, suffix=".upload")
+    try:
+        file_path = file_obj.file_path or ""
+        if not file_path.startswith(("http://", "https://")):
+            # Local Bot API server: the file is already on disk
+            os.close(fd)
+            fd = None
+            await asyncio.get_running_loop().run_in_executor(None, shutil.copyfile, file_path, path)
+            _check_size(os.path.getsize(path), max_bytes)
+            if on_progress:
+                on_progress(os.path.getsize(path), total)
+            return path
+
+        timeout = aiohttp.ClientTimeout(total=None, connect=HTTP_CONNECT_TIMEOUT, sock_read=UPLOAD_READ_TIMEOUT)
+        loop = asyncio.get_running_loop()
+        written = 0
+        with os.fdopen(fd, "wb") as f:
+            fd = None
+            try:
+                async with get_aiohttp_session().get(file_path, timeout=timeout) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        written += len(chunk)
+                        _check_size(written, max_bytes)
+                        # Disk writes can stall (slow or busy volume): keep them off the event loop
+                        await loop.run_in_executor(None, f.write, chunk)
+                        if on_progress:
+                            on_progress(written, total)
+            except aiohttp.ClientResponseError as e:
+                # str(e) includes the file URL, and with it the bot token
+                raise DownloadError(f"Telegram file download failed (HTTP {e.status})", e.status) from None
+            except aiohttp.ClientError as e:
+                raise DownloadError(f"Telegram file download failed ({type(e).__name__})") from None
+        return path
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+
+
+def threadsafe_progress(callback: ProgressCallback) -> ProgressCallback:
+    """Wraps a progress callback so it can be called from a worker thread (e.g., the Drive pool)."""
+    loop = asyncio.get_running_loop()
+
+    def report(done: int, total: Optional[int]):
+        loop.call_soon_threadsafe(callback, done, total)
+
+    return report
+
+
+def format_upload_progress(stage: str, done: int, total: Optional[int]) -> str:
+    """'⏳ Subiendo a Drive... 45% (12.3/27.0 MB)'"""
+    if total:
+        return f"⏳ {stage}... {min(100, done * 100 // total)}% ({done / 1_048_576:.1f}/{total / 1_048_576:.1f} MB)"
+    return f"⏳ {stage}... {done / 1_048_576:.1f} MB"
+
+
+__all__ = [
+    'UploadTooLargeError',
+    'DownloadError',
+    'redact_bot_token',
+    'spool_telegram_file',
+    'threadsafe_progress',
+    'format_upload_progress',
+]
@@ -0,0 +1,163 @@
+"""
+Webhook ingress for the Telegram application (BOT_MODE=webhook).
+
+run_polling() keeps one long-poll getUpdates loop per process, so only a single
+bot process can receive updates and each update waits for the next poll round
+trip. In webhook mode Telegram pushes updates to an aiohttp server instead:
+
+- POST WEBHOOK_PATH: validates the X-Telegram-Bot-Api-Secret-Token header and
+  hands the update to the Application's update queue
+- GET /healthz: 200 while accepting updates, 503 while starting or draining
+  (point the reverse proxy's health check here)
+- Graceful drain on SIGTERM/SIGINT: new updates get 503 (Telegram redelivers
+  them), in-flight pipelines get up to WEBHOOK_DRAIN_TIMEOUT seconds to finish
+
+Several workers can run behind a reverse proxy; set WEBHOOK_SET_ON_STARTUP=False
+on all but one so they don't race on setWebhook. Per-chat ordering
+(src/utils/update_processor.py) holds within a worker only.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from typing import Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from src.config import (
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_SET_ON_STARTUP,
+    WEBHOOK_DRAIN_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    aiohttp server feeding Telegram webhook updates into a PTB Application.
+    """
+
+    def __init__(self, application: Application, secret_token: str, path: str = WEBHOOK_PATH):
+        """
+        Args:
+            application: Initialized PTB Application the updates are dispatched to
+            secret_token: Expected value of the X-Telegram-Bot-Api-Secret-Token header
+            path: URL path Telegram posts updates to
+        """
+        self.application = application
+        self.secret_token = secret_token
+        self.path = path
+        self.accepting = False
+        self.updates_received = 0
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        received = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+            logger.warning(f"Rejected webhook call with invalid secret token from {request.remote}")
+            return web.Response(status=403)
+
+        if not self.accepting:
+            # Telegram retries non-2xx responses, so the update is not lost
+            return web.Response(status=503)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except (json.JSONDecodeError, ValueError, TypeError, KeyError) as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return web.Response(status=400)
+
+        self.updates_received += 1
+        await self.application.update_queue.put(update)
+        return web.Response(status=200)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        status = 200 if self.accepting else 503
+        return web.json_response({
+            "status": "ok" if self.accepting else "unavailable",
+            "pending_updates": self.application.update_queue.qsize(),
+            "updates_received": self.updates_received,
+        }, status=status)
+
+
+async def run_webhook(application: Application, stop_event: Optional[asyncio.Event] = None):
+    """
+    Runs the bot in webhook mode until SIGTERM/SIGINT (or stop_event), then drains.
+
+    Mirrors run_polling's lifecycle: post_init runs after initialize(),
+    post_stop after stop() and post_shutdown after shutdown().
+
+    Args:
+        application: Built (not yet initialized) PTB Application
+        stop_event: Optional event that stops the server when set (signals are used otherwise)
+    """
+    if not WEBHOOK_SECRET_TOKEN:
+        raise ValueError("WEBHOOK_SECRET_TOKEN is required in webhook mode")
+
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    server = WebhookServer(application, WEBHOOK_SECRET_TOKEN)
+    runner = web.AppRunner(server.build_app())
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+
+        if WEBHOOK_SET_ON_STARTUP:
+            if not WEBHOOK_URL:
+                raise ValueError("WEBHOOK_URL is required when WEBHOOK_SET_ON_STARTUP is enabled")
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET_TOKEN,
+                allowed_updates=Update.ALL_TYPES
+            )
+
+        await application.start()
+        await runner.setup()
+        await web.TCPSite(runner, WEBHOOK_LISTEN, WEBHOOK_PORT).start()
+        server.accepting = True
+        logger.info(f"🌐 Webhook server listening on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+        await stop_event.wait()
+    finally:
+        # Drain: refuse new updates, let queued and running ones finish
+        server.accepting = False
+        logger.info("🛑 Webhook server draining...")
+        if application.running:
+            try:
+                await asyncio.wait_for(application.stop(), WEBHOOK_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Drain timed out after {WEBHOOK_DRAIN_TIMEOUT}s; pending updates are abandoned")
+        if application.post_stop:
+            await application.post_stop(application)
+        await runner.cleanup()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+__all__ = ['WebhookServer', 'run_webhook', 'SECRET_HEADER']
@@ -43,6 +43,18 @@ class TestAgentRetry(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result["summary"], "Good")
         self.assertEqual(self.agent.llm_client.completion.call_count, 2)
         
+    async def test_retry_on_truncated_json(self):
+        truncated = '{"summary": "Despido", "content": "HECHOS\\nPrimero. La empresa comunic'
+        self.agent.llm_client.completion = AsyncMock(side_effect=[
+            truncated,
+            '{"summary": "Good", "content": "This content is definitely longer than fifty characters to pass the validation check."}'
+        ])
+
+        result = await self.agent.generate_structured_draft_with_retry("test context")
+
+        self.assertEqual(result["summary"], "Good")
+        self.assertEqual(self.agent.llm_client.completion.call_count, 2)
+
     async def test_fail_after_max_retries(self):
         # Mock responses: 3 failures
         self.agent.llm_client.completion = AsyncMock(side_effect=[
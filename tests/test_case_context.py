@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from src.case_context import CaseContextCache, folder_id_from_url
+
+
+class TestCaseContextCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.notion = MagicMock()
+        self.notion.get_case_links.return_value = {
+            "page_id": "page-1",
+            "drive_url": "https://drive.google.com/drive/folders/folder-1",
+            "doc_url": None,
+        }
+        self.drive = MagicMock()
+        self.drive.find_doc_in_folder.return_value = "doc-1"
+        self.cache = CaseContextCache(self.notion, self.drive, ttl=600)
+
+    async def test_follow_up_messages_hit_the_cache(self):
+        self.cache.prefetch("J-2026-004")
+        first = await self.cache.resolve("J-2026-004")
+        second = await self.cache.resolve("J-2026-004")
+
+        self.assertIs(first, second)
+        self.assertEqual((first.page_id, first.folder_id, first.doc_id), ("page-1", "folder-1", "doc-1"))
+        self.assertEqual(first.command, "/demanda")
+        self.notion.get_case_links.assert_called_once_with("J-2026-004")
+        self.drive.find_doc_in_folder.assert_called_once_with("folder-1")
+
+    async def test_stale_entry_served_while_refreshing(self):
+        context = await self.cache.resolve("D-2026-001")
+        context.loaded_at -= 601
+        self.drive.find_doc_in_folder.return_value = "doc-2"
+
+        self.assertEqual((await self.cache.resolve("D-2026-001")).doc_id, "doc-1")
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.cache.get("D-2026-001").doc_id, "doc-2")
+
+    async def test_invalidate_and_missing_doc_resolve_again(self):
+        self.drive.find_doc_in_folder.return_value = None
+        self.assertIsNone((await self.cache.resolve("D-2026-001")).doc_id)
+
+        self.drive.find_doc_in_folder.return_value = "doc-1"
+        self.assertEqual((await self.cache.resolve("D-2026-001")).doc_id, "doc-1")
+
+        self.cache.invalidate("D-2026-001")
+        await self.cache.resolve("D-2026-001")
+        self.assertEqual(self.notion.get_case_links.call_count, 3)
+
+    async def test_case_without_folder(self):
+        self.notion.get_case_links.return_value = {}
+        self.assertIsNone(await self.cache.resolve("E-2026-002"))
+        self.assertIsNone(folder_id_from_url("https://drive.google.com/file/d/abc"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from src.utils import case_ids
+from src.utils.case_ids import CaseIdAllocator, parse_case_id
+
+
+class TestCaseIdAllocator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "case_ids.sqlite3")
+        self.allocator = CaseIdAllocator(self.db_path)
+
+    def test_sequences_are_per_prefix_and_year(self):
+        self.assertEqual(self.allocator.allocate("D", 2026), "D-2026-001")
+        self.assertEqual(self.allocator.allocate("D", 2026), "D-2026-002")
+        self.assertEqual(self.allocator.allocate("J", 2026), "J-2026-001")
+        self.assertEqual(self.allocator.allocate("D", 2027), "D-2027-001")
+
+    def test_concurrent_allocations_are_unique(self):
+        # Two allocators on the same file behave like two worker processes
+        other = CaseIdAllocator(self.db_path)
+        allocators = [self.allocator, other] * 50
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda a: a.allocate("D", 2026), allocators))
+
+        self.assertEqual(len(set(ids)), 100)
+        self.assertEqual(self.allocator.peek("D", 2026), "D-2026-100")
+
+    def test_seed_never_moves_backwards(self):
+        self.assertTrue(self.allocator.seed("D-2026-015"))
+        self.assertTrue(self.allocator.seed("D-2026-003"))
+        self.assertFalse(self.allocator.seed("garbage"))
+        self.assertEqual(self.allocator.allocate("D", 2026), "D-2026-016")
+
+    def test_parse_case_id(self):
+        self.assertEqual(parse_case_id("E-2026-042"), ("E", 2026, 42))
+        self.assertIsNone(parse_case_id("E-2026"))
+        self.assertIsNone(parse_case_id(None))
+
+    def test_reconcile_from_notion(self):
+        notion = MagicMock()
+        notion.get_last_case_id.side_effect = lambda prefix: {"D": "D-2026-007"}.get(prefix)
+
+        with patch.object(case_ids, "get_case_id_allocator", return_value=self.allocator):
+            seeded = case_ids.reconcile_from_notion(notion, ["D", "J"])
+
+        self.assertEqual(seeded, 1)
+        self.assertEqual(self.allocator.allocate("D", 2026), "D-2026-008")
+        self.assertEqual(self.allocator.allocate("J", 2026), "J-2026-001")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.integrations.case_index import CaseIndex
+from src.integrations.notion_client import DelegadoNotionClient
+
+
+def make_page(page_id, title, status="Pendiente de hacer", edited="2026-01-10T10:00:00.000Z", **extra):
+    return {
+        "id": page_id,
+        "last_edited_time": edited,
+        "properties": {
+            "Name": {"title": [{"text": {"content": title}}]},
+            "Estado": {"status": {"name": status}},
+            "Gdrive folder": {"url": extra.get("drive_url")},
+            "Perplexity": {"url": extra.get("doc_url")},
+        },
+        "archived": extra.get("archived", False),
+    }
+
+
+class TestCaseIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CaseIndex(":memory:", max_staleness=60)
+
+    def test_upsert_and_lookup(self):
+        cursor = self.index.upsert_pages([
+            make_page("p1", "D-2026-001 - Falta de EPIs", drive_url="https://drive/1"),
+            make_page("p2", "D-2026-002 - Turnos", status="Presentada", edited="2026-01-11T09:00:00.000Z"),
+        ])
+
+        self.assertEqual(cursor, "2026-01-11T09:00:00.000Z")
+        self.assertEqual(self.index.get_by_case_id("D-2026-001")["drive_url"], "https://drive/1")
+        self.assertEqual(self.index.get_last_case_id("D-2026"), "D-2026-002")
+        self.assertEqual([r["case_id"] for r in self.index.get_by_statuses(["Pendiente de hacer"])], ["D-2026-001"])
+
+    def test_archived_pages_are_removed(self):
+        self.index.upsert_pages([make_page("p1", "D-2026-001 - A")])
+        self.index.upsert_pages([make_page("p1", "D-2026-001 - A", archived=True)])
+        self.assertIsNone(self.index.get_by_case_id("D-2026-001"))
+
+    def test_replace_all_drops_missing_pages(self):
+        self.index.upsert_pages([make_page("p1", "D-2026-001 - A"), make_page("p2", "D-2026-002 - B")])
+        self.index.replace_all([make_page("p2", "D-2026-002 - B")])
+        self.assertEqual(self.index.count(), 1)
+
+    def test_like_wildcards_are_escaped(self):
+        self.index.upsert_pages([make_page("p1", "DX2026-001 - A")])
+        self.assertIsNone(self.index.get_last_case_id("D_2026"))
+
+    def test_staleness(self):
+        self.assertFalse(self.index.is_fresh())
+        self.index.mark_synced("2026-01-10T10:00:00.000Z", full=True)
+        self.assertTrue(self.index.is_fresh())
+        self.index.invalidate()
+        self.assertFalse(self.index.is_fresh())
+
+
+class TestNotionClientIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = patch.dict(os.environ, {"NOTION_TOKEN": "secret", "NOTION_DATABASE_ID": "db"})
+        cache_dir = patch("src.integrations.notion_client.CACHE_DIR", self.tmp.name)
+        client_cls = patch("src.integrations.notion_client.Client")
+        for p in (env, cache_dir):
+            p.start()
+            self.addCleanup(p.stop)
+        self.mock_notion = client_cls.start().return_value
+        self.addCleanup(client_cls.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+        self.mock_notion.databases.query.return_value = {
+            "results": [
+                make_page("p1", "D-2026-001 - A", doc_url="https://docs/1"),
+                make_page("p2", "D-2026-003 - B", status="En progreso"),
+            ],
+            "has_more": False,
+        }
+        self.client = DelegadoNotionClient()
+
+    def test_reads_are_served_from_index_after_one_sync(self):
+        self.assertEqual(self.client.get_case_links("D-2026-001")["doc_url"], "https://docs/1")
+        self.assertEqual(len(self.client.get_active_cases()), 2)
+        self.assertEqual(self.client._get_page_id_by_case_id("D-2026-003"), "p2")
+
+        self.assertEqual(self.mock_notion.databases.query.call_count, 1)
+
+    def test_incremental_sync_uses_cursor(self):
+        self.client.sync_case_index()
+        self.mock_notion.databases.query.return_value = {"results": [], "has_more": False}
+        self.client.sync_case_index()
+
+        query_filter = self.mock_notion.databases.query.call_args.kwargs["filter"]
+        self.assertEqual(query_filter["timestamp"], "last_edited_time")
+        self.assertEqual(query_filter["last_edited_time"]["on_or_after"], "2026-01-10T10:00:00.000Z")
+
+    def test_writes_go_through_to_index(self):
+        self.client.sync_case_index()
+        self.mock_notion.pages.create.return_value = {"id": "p3"}
+
+        self.client.create_case_page({"id": "D-2026-004", "title": "D-2026-004 - C", "status": "Borrador"})
+        self.client.update_case_status("D-2026-004", "En progreso")
+
+        row = self.client.index.get_by_case_id("D-2026-004")
+        self.assertEqual(row["status"], "En progreso")
+        self.assertEqual(self.mock_notion.databases.query.call_count, 1)
+
+    def test_falls_back_to_live_query_when_sync_fails(self):
+        self.mock_notion.databases.query.side_effect = [
+            Exception("rate limited"),
+            {"results": [make_page("p9", "D-2026-009 - Z")], "has_more": False},
+        ]
+        self.assertEqual(self.client._get_page_id_by_case_id("D-2026-009"), "p9")
+
+
+if __name__ == '__main__':
+    unittest.main()
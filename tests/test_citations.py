@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.agents.base import AgentBase
+from src.legal import LegalRetriever
+from src.legal import retrieval
+from src.legal.citations import extract_citations, verify_citations
+
+CONVENIO_XML_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "data", "convenio_colectivo_ingenierias.xml")
+
+VERIFIABLE_DRAFT = (
+    "La empresa vulnera el art. 34 ET y los artículos 22 a 23 del Convenio colectivo, "
+    "así como el artículo 18 bis del convenio y el artículo 7.5 de la LISOS."
+)
+CONVENIO_ONLY_DRAFT = "La empresa vulnera los artículos 22 a 23 del Convenio colectivo y el artículo 18 bis del convenio."
+
+
+class DraftAgent(AgentBase):
+    def get_system_prompt(self):
+        return "You are a test agent."
+
+
+class TestCitationVerifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.retriever = LegalRetriever.open([CONVENIO_XML_PATH], os.path.join(cls.tmp.name, "legal_index.bin"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.retriever.index.close()
+        cls.tmp.cleanup()
+
+    def test_extracts_laws_ranges_and_back_references(self):
+        citations = extract_citations(
+            "Arts. 22 a 24 del convenio; artículo 34.3 del Estatuto de los Trabajadores "
+            "y el artículo 4 de la citada norma. Art. 14 CE."
+        )
+        self.assertEqual(
+            [(c.article, c.law) for c in citations],
+            [("22", "CONVENIO"), ("23", "CONVENIO"), ("24", "CONVENIO"), ("34", "ET"), ("4", "ET"), ("14", "CE")]
+        )
+
+    def test_local_report(self):
+        report = verify_citations(CONVENIO_ONLY_DRAFT, index=self.retriever.index)
+
+        self.assertFalse(report.needs_remote)
+        self.assertEqual({c.status for c in report.citations}, {"verified"})
+        self.assertIn("3/3 resueltas", report.to_markdown())
+
+    def test_statute_ranges_still_need_remote(self):
+        mixed = verify_citations(VERIFIABLE_DRAFT, index=self.retriever.index)
+        self.assertEqual({c.status for c in mixed.citations}, {"verified", "in_range"})
+        self.assertTrue(mixed.needs_remote)
+
+        et_only = verify_citations("art. 34 ET y el artículo 41 del Estatuto de los Trabajadores", index=self.retriever.index)
+        self.assertEqual([(c.article, c.status) for c in et_only.citations], [("34", "in_range"), ("41", "in_range")])
+        self.assertTrue(et_only.needs_remote)
+
+    def test_suspicious_citations_need_remote(self):
+        report = verify_citations(
+            "Según el art. 140 ET, el artículo 96 del convenio, el artículo 5 de la Ley 10/2021 y el artículo 3.",
+            index=self.retriever.index
+        )
+        statuses = {c.article: c.status for c in report.citations}
+
+        self.assertTrue(report.needs_remote)
+        self.assertEqual(statuses, {"140": "not_found", "96": "not_found", "5": "unknown_law", "3": "ambiguous"})
+
+    def test_no_citations_need_remote(self):
+        self.assertTrue(verify_citations("Sin referencias normativas.").needs_remote)
+
+
+class TestAgentLocalVerification(unittest.IsolatedAsyncioTestCase):
+    @patch("src.agents.base.PerplexityClient")
+    @patch("src.agents.base.OpenRouterClient")
+    @patch("src.agents.base.DelegadoNotionClient")
+    async def test_skips_remote_round_trip(self, mock_notion_cls, mock_router_cls, mock_pplx_cls):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        local = LegalRetriever.open([CONVENIO_XML_PATH], os.path.join(tmp.name, "legal_index.bin"))
+        self.addCleanup(local.index.close)
+        patcher = patch.object(retrieval, "_retriever", local)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        mock_router = mock_router_cls.return_value
+        mock_router.completion = AsyncMock(
+            return_value='{"summary": "Jornada", "content": "%s", "thesis": "", "specific_point": "", "area": ""}'
+            % CONVENIO_ONLY_DRAFT
+        )
+        mock_pplx = mock_pplx_cls.return_value
+        mock_pplx.verify_draft = AsyncMock(return_value="Grounding Feedback")
+        mock_notion = MagicMock()
+        mock_notion_cls.return_value = mock_notion
+
+        result = await DraftAgent().generate_structured_draft_verified("Context", notion_page_id="page-123")
+
+        self.assertEqual(result["verification_status"], "Verified (Local)")
+        self.assertEqual(result["content"], CONVENIO_ONLY_DRAFT)
+        mock_pplx.verify_draft.assert_not_called()
+        self.assertEqual(mock_router.completion.call_count, 1)
+        self.assertIn("resueltas", mock_notion.append_verification_report.call_args[0][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import time
+import unittest
+
+from src.utils import ProgressTracker, RollbackManager
+from src.utils.dag import DAGExecutor, PipelineStep, validate_step_graph
+
+
+def make_executor(steps):
+    tracker = ProgressTracker([step.name for step in steps])
+    rollback = RollbackManager()
+    return DAGExecutor(steps, tracker, rollback), tracker, rollback
+
+
+class TestStepGraph(unittest.TestCase):
+    def test_valid_graph_accepted(self):
+        validate_step_graph({"A": [], "B": ["A"], "C": ["A", "B"]})
+
+    def test_unknown_dependency_rejected(self):
+        with self.assertRaises(ValueError):
+            validate_step_graph({"A": ["B"]})
+
+    def test_cycle_rejected(self):
+        with self.assertRaises(ValueError):
+            validate_step_graph({"A": ["B"], "B": ["A"]})
+
+
+class TestDAGExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_independent_steps_overlap_and_respect_dependencies(self):
+        order = []
+
+        def sleeper(name):
+            async def run():
+                order.append(f"start:{name}")
+                await asyncio.sleep(0.1)
+                order.append(f"end:{name}")
+            return run
+
+        executor, tracker, _ = make_executor([
+            PipelineStep("A", sleeper("A")),
+            PipelineStep("B", sleeper("B")),
+            PipelineStep("C", sleeper("C"), depends_on=["A", "B"]),
+        ])
+
+        start = time.monotonic()
+        await executor.run()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.28)
+        self.assertGreater(order.index("start:C"), order.index("end:A"))
+        self.assertGreater(order.index("start:C"), order.index("end:B"))
+        self.assertEqual(set(tracker.status.values()), {"completed"})
+
+    async def test_non_critical_failure_lets_dependents_run(self):
+        ran = []
+
+        async def fails():
+            raise ValueError("drive down")
+
+        async def dependent():
+            ran.append("dependent")
+
+        executor, tracker, rollback = make_executor([
+            PipelineStep("Drive", fails, critical=False),
+            PipelineStep("Docs", dependent, depends_on=["Drive"]),
+        ])
+        await executor.run()
+
+        self.assertEqual(ran, ["dependent"])
+        self.assertEqual(tracker.status["Drive"], "failed")
+        self.assertEqual(tracker.status["Docs"], "completed")
+        self.assertEqual(rollback.failed_step, "Drive")
+
+    async def test_soft_skip_keeps_failed_status(self):
+        tracker = ProgressTracker(["Drive"])
+
+        async def skip():
+            tracker.fail_step("Drive")
+
+        executor = DAGExecutor([PipelineStep("Drive", skip, critical=False)], tracker, RollbackManager())
+        await executor.run()
+        self.assertEqual(tracker.status["Drive"], "failed")
+
+    async def test_critical_failure_cancels_llm_steps_and_waits_for_side_effects(self):
+        created = []
+        cancelled = []
+
+        async def fails():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("notion down")
+
+        async def llm():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append("llm")
+                raise
+
+        async def provisioning():
+            await asyncio.sleep(0.05)
+            created.append("folder")
+
+        never_ran = []
+
+        async def after():
+            never_ran.append(True)
+
+        executor, tracker, rollback = make_executor([
+            PipelineStep("Notion", fails),
+            PipelineStep("LLM", llm, cancellable=True),
+            PipelineStep("Drive", provisioning),
+            PipelineStep("Final", after, depends_on=["Notion", "LLM", "Drive"]),
+        ])
+
+        with self.assertRaises(RuntimeError):
+            await executor.run()
+
+        self.assertEqual(cancelled, ["llm"])
+        self.assertEqual(created, ["folder"])
+        self.assertEqual(never_ran, [])
+        self.assertEqual(tracker.status["Notion"], "failed")
+        self.assertEqual(tracker.status["LLM"], "failed")
+        self.assertEqual(tracker.status["Drive"], "completed")
+        self.assertEqual(tracker.status["Final"], "pending")
+        self.assertEqual(rollback.failed_step, "Notion")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+
+from src.agents.base import AgentBase
+from src.utils.doc_edits import DocParagraph, EditError, build_batch_requests, parse_edits
+
+
+def make_doc(texts):
+    """Paragraphs laid out like the Docs API: body starts at index 1, each paragraph ends with a newline."""
+    paragraphs, index = [], 1
+    for number, text in enumerate(texts, start=1):
+        paragraphs.append(DocParagraph(number, index, index + len(text) + 1, text))
+        index += len(text) + 1
+    return paragraphs
+
+
+def apply_requests(texts, requests):
+    """Applies batchUpdate requests to the body text the way the Docs API does."""
+    body = "".join(t + "\n" for t in texts)
+    for request in requests:
+        if 'insertText' in request:
+            i = request['insertText']['location']['index'] - 1
+            assert 0 <= i < len(body), "insert outside the body"
+            body = body[:i] + request['insertText']['text'] + body[i:]
+        else:
+            r = request['deleteContentRange']['range']
+            assert r['endIndex'] - 1 < len(body), "cannot delete the final newline"
+            body = body[:r['startIndex'] - 1] + body[r['endIndex'] - 1:]
+    return body.split("\n")[:-1]
+
+
+class ConcreteAgent(AgentBase):
+    def get_system_prompt(self):
+        return "Test Prompt"
+
+
+class TestDocEdits(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.texts = ["HECHOS", "Primero: el trabajador.", "Segundo: la empresa.", "Tercero: el despido.", "SOLICITA"]
+        self.doc = make_doc(self.texts)
+
+    def apply(self, data):
+        edits = parse_edits(data, len(self.doc))
+        return apply_requests(self.texts, build_batch_requests(self.doc, edits))
+
+    def test_replace_range_and_insert(self):
+        result = self.apply({"edits": [
+            {"action": "replace", "paragraph": 2, "end_paragraph": 3, "text": "Primero: nuevo hecho."},
+            {"action": "insert_after", "paragraph": 4, "text": "Cuarto: la carta.\nQuinto: el juicio."},
+        ]})
+        self.assertEqual(result, ["HECHOS", "Primero: nuevo hecho.", "Tercero: el despido.",
+                                  "Cuarto: la carta.", "Quinto: el juicio.", "SOLICITA"])
+
+    def test_edits_at_document_boundaries(self):
+        result = self.apply([
+            {"action": "insert_after", "paragraph": 0, "text": "AL JUZGADO"},
+            {"action": "delete", "paragraph": 5},
+            {"action": "insert_after", "paragraph": 5, "text": "FIRMA"},
+        ])
+        self.assertEqual(result, ["AL JUZGADO", "HECHOS", "Primero: el trabajador.", "Segundo: la empresa.",
+                                  "Tercero: el despido.", "FIRMA"])
+
+    def test_delete_range(self):
+        result = self.apply({"edits": [{"action": "delete", "paragraph": 3, "end_paragraph": 5}]})
+        self.assertEqual(result, ["HECHOS", "Primero: el trabajador."])
+
+    def test_requests_are_only_for_the_change(self):
+        edits = parse_edits({"edits": [{"action": "replace", "paragraph": 4, "text": "Tercero: otro."}]}, 5)
+        requests = build_batch_requests(self.doc, edits)
+        self.assertEqual([list(r) for r in requests], [['deleteContentRange'], ['insertText']])
+        self.assertEqual(requests[0]['deleteContentRange']['range']['startIndex'], self.doc[3].start_index)
+
+    def test_invalid_edits_rejected(self):
+        for data in (
+            {"edits": [{"action": "rewrite", "paragraph": 1, "text": "x"}]},
+            {"edits": [{"action": "replace", "paragraph": 9, "text": "x"}]},
+            {"edits": [{"action": "replace", "paragraph": 2, "text": ""}]},
+            {"edits": [{"action": "replace", "paragraph": 2, "end_paragraph": 4, "text": "x"},
+                       {"action": "delete", "paragraph": 3}]},
+            {"summary": "sin cambios"},
+        ):
+            with self.assertRaises(EditError, msg=data):
+                parse_edits(data, 5)
+        self.assertEqual(parse_edits({"edits": []}, 5), [])
+
+    async def test_agent_falls_back_on_unusable_response(self):
+        agent = ConcreteAgent()
+        agent.llm_client = MagicMock()
+        agent.llm_client.completion = AsyncMock(return_value=json.dumps(
+            {"edits": [{"action": "replace", "paragraph": 2, "text": "Primero: corregido."}]}
+        ))
+        edits = await agent.propose_draft_edits(self.doc, "El trabajador es fijo")
+        self.assertEqual([(e.action, e.paragraph) for e in edits], [("replace", 2)])
+        prompt = agent.llm_client.completion.call_args[0][0][1]["content"]
+        self.assertIn("[2] Primero: el trabajador.", prompt)
+
+        agent.llm_client.completion = AsyncMock(return_value="Aquí tienes el documento completo...")
+        self.assertIsNone(await agent.propose_draft_edits(self.doc, "El trabajador es fijo"))
+
+        # Cut off mid-edit: must not become "replace paragraphs 2-4 with 'Uno'"
+        agent.llm_client.completion = AsyncMock(
+            return_value='{"edits":[{"action":"replace","paragraph":2,"end_paragraph":4,"text":"Uno'
+        )
+        self.assertIsNone(await agent.propose_draft_edits(self.doc, "El trabajador es fijo"))
+        self.assertIs(agent.llm_client.completion.call_args.kwargs["allow_truncated"], False)
+
+
+if __name__ == '__main__':
+    unittest.main()
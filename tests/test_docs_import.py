@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.integrations.docs_client import DelegadoDocsClient, GOOGLE_DOC_MIME_TYPE
+from src.utils.markdown_html import markdown_to_html
+
+DRAFT = """# DEMANDA
+
+**AL JUZGADO DE LO SOCIAL** de Madrid
+Segunda línea con *énfasis* y `{{CAMPO}}` <sin html>
+
+## HECHOS
+
+* Punto **uno**
+* Punto dos
+
+1. Primero
+2. Segundo
+
+---
+"""
+
+
+class TestMarkdownToHtml(unittest.TestCase):
+    def test_template_markdown(self):
+        body = markdown_to_html(DRAFT, "D-2026-001")
+        self.assertIn("<h1>DEMANDA</h1>", body)
+        self.assertIn("<h2>HECHOS</h2>", body)
+        self.assertIn("<p><b>AL JUZGADO DE LO SOCIAL</b> de Madrid<br>Segunda línea con <i>énfasis</i> y "
+                      "<code>{{CAMPO}}</code> &lt;sin html&gt;</p>", body)
+        self.assertIn("<ul>\n<li>Punto <b>uno</b></li>\n<li>Punto dos</li>\n</ul>", body)
+        self.assertIn("<ol>\n<li>Primero</li>\n<li>Segundo</li>\n</ol>", body)
+        self.assertIn("<hr>", body)
+        self.assertIn("<title>D-2026-001</title>", body)
+
+
+class TestDocsImport(unittest.TestCase):
+    def setUp(self):
+        self.client = DelegadoDocsClient.__new__(DelegadoDocsClient)
+        self.client.service = MagicMock()
+        self.client.drive_service = MagicMock()
+        self.create = self.client.drive_service.files.return_value.create
+
+    def test_single_call_import_into_case_folder(self):
+        self.create.return_value.execute.return_value = {"id": "doc-1", "mimeType": GOOGLE_DOC_MIME_TYPE}
+
+        link = self.client.create_draft_document("D-2026-001 - Caso", DRAFT, "folder-1")
+
+        self.assertEqual(link, "https://docs.google.com/document/d/doc-1/edit")
+        body = self.create.call_args.kwargs["body"]
+        self.assertEqual(body, {"name": "D-2026-001 - Caso", "mimeType": GOOGLE_DOC_MIME_TYPE,
+                                "parents": ["folder-1"]})
+        media = self.create.call_args.kwargs["media_body"]
+        self.assertEqual(media.mimetype(), "text/html")
+        self.assertIn(b"<h2>HECHOS</h2>", media.getbytes(0, media.size()))
+        self.client.service.documents.assert_not_called()
+        self.client.drive_service.files.return_value.update.assert_not_called()
+
+    def test_falls_back_when_not_converted(self):
+        self.create.return_value.execute.return_value = {"id": "file-1", "mimeType": "text/html"}
+        self.client.service.documents.return_value.create.return_value.execute.return_value = {"documentId": "doc-2"}
+        self.client.drive_service.files.return_value.get.return_value.execute.return_value = {"parents": ["root"]}
+
+        link = self.client.create_draft_document("D-2026-001 - Caso", DRAFT, "folder-1")
+
+        self.assertEqual(link, "https://docs.google.com/document/d/doc-2/edit")
+        self.client.drive_service.files.return_value.delete.assert_called_once_with(fileId="file-1")
+        self.client.service.documents.return_value.batchUpdate.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from src.integrations.drive_batch import execute_batch
+from src.integrations.drive_client import DelegadoDriveClient
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeBatchService:
+    """Records batch round trips; outcomes[key] lists the result of each attempt."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.round_trips = []
+
+    def new_batch_http_request(self, callback):
+        service = self
+        added = []
+
+        class Batch:
+            def add(self, request, request_id):
+                added.append(request_id)
+
+            def execute(self):
+                service.round_trips.append(list(added))
+                for key in added:
+                    outcome = service.outcomes[key].pop(0)
+                    if isinstance(outcome, Exception):
+                        callback(key, None, outcome)
+                    else:
+                        callback(key, outcome, None)
+
+        return Batch()
+
+
+@patch("src.integrations.drive_batch.time.sleep")
+class TestExecuteBatch(unittest.TestCase):
+    def test_only_transient_failures_are_retried(self, mock_sleep):
+        service = FakeBatchService({
+            "a": [{"id": "1"}],
+            "b": [http_error(503), {"id": "2"}],
+            "c": [http_error(404)],
+        })
+        results = execute_batch(service, {key: MagicMock() for key in "abc"})
+
+        self.assertEqual(service.round_trips, [["a", "b", "c"], ["b"]])
+        self.assertEqual(results["b"].response, {"id": "2"})
+        self.assertEqual(results["b"].attempts, 2)
+        self.assertFalse(results["c"].ok)
+        mock_sleep.assert_called_once()
+
+    def test_chunks_and_whole_batch_failure(self, mock_sleep):
+        service = FakeBatchService({key: [{"id": key}] for key in "abcde"})
+        results = execute_batch(service, {key: MagicMock() for key in "abcde"}, max_size=2)
+        self.assertEqual(service.round_trips, [["a", "b"], ["c", "d"], ["e"]])
+        self.assertTrue(all(r.ok for r in results.values()))
+
+        failing = MagicMock()
+        failing.new_batch_http_request.return_value.execute.side_effect = ConnectionError("reset")
+        results = execute_batch(failing, {"a": MagicMock()}, max_retries=3)
+        self.assertEqual(results["a"].attempts, 3)
+        self.assertIsInstance(results["a"].error, ConnectionError)
+
+
+class TestDriveBatchOperations(unittest.TestCase):
+    def setUp(self):
+        self.client = DelegadoDriveClient.__new__(DelegadoDriveClient)
+        self.client.service = MagicMock()
+
+    def test_subfolders_in_one_round_trip(self):
+        service = FakeBatchService({"Pruebas": [{"id": "f1"}], "Respuestas": [{"id": "f2"}]})
+        self.client.service.new_batch_http_request = service.new_batch_http_request
+
+        folders = self.client.create_subfolders("case-folder", ["Pruebas", "Respuestas"])
+
+        self.assertEqual(folders, {"Pruebas": "f1", "Respuestas": "f2"})
+        self.assertEqual(len(service.round_trips), 1)
+        bodies = [c.kwargs["body"] for c in self.client.service.files.return_value.create.call_args_list]
+        self.assertEqual([b["parents"] for b in bodies], [["case-folder"], ["case-folder"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
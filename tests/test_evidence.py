@@ -0,0 +1,124 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.handlers import private
+from src.utils.evidence import EvidenceItem, EvidenceLedger, MediaGroupCollector
+
+
+def make_item(unique_id, name):
+    return EvidenceItem(SimpleNamespace(file_unique_id=unique_id), name, "image/jpeg")
+
+
+class TestEvidenceLedger(unittest.TestCase):
+    def test_dedupe_is_per_case(self):
+        ledger = EvidenceLedger(":memory:")
+        ledger.record("D-2026-001", "uniq-1", "foto.jpg", "https://drive/1")
+        self.assertEqual(ledger.get("D-2026-001", "uniq-1"), "https://drive/1")
+        self.assertIsNone(ledger.get("J-2026-002", "uniq-1"))
+        self.assertIsNone(ledger.get("D-2026-001", None))
+
+    def test_reservation_blocks_concurrent_and_recorded_uploads(self):
+        ledger = EvidenceLedger(":memory:")
+        self.assertTrue(ledger.reserve("D-2026-001", "uniq-1"))
+        self.assertFalse(ledger.reserve("D-2026-001", "uniq-1"))
+        self.assertTrue(ledger.reserve("J-2026-002", "uniq-1"))
+
+        ledger.record("D-2026-001", "uniq-1", "foto.jpg", "https://drive/1")
+        ledger.release("D-2026-001", "uniq-1")
+        self.assertFalse(ledger.reserve("D-2026-001", "uniq-1"))
+
+        ledger.release("J-2026-002", "uniq-1")  # failed upload: can be retried
+        self.assertTrue(ledger.reserve("J-2026-002", "uniq-1"))
+
+
+class TestMediaGroupCollector(unittest.IsolatedAsyncioTestCase):
+    async def test_album_flushed_once_after_quiet_period(self):
+        collector = MediaGroupCollector(wait=0.05)
+        received = []
+        callback = AsyncMock(side_effect=lambda items: received.append(items))
+
+        for i in range(3):
+            collector.add((1, "album"), i, callback)
+            await asyncio.sleep(0.01)
+        collector.add((1, "other"), "x", callback)
+        self.assertEqual(collector.pending((1, "album")), 3)
+
+        await asyncio.sleep(0.1)
+        await collector.drain()
+        self.assertEqual(sorted(received, key=len), [["x"], [0, 1, 2]])
+
+
+class TestMediaGroupIngestion(unittest.IsolatedAsyncioTestCase):
+    async def test_album_uploaded_concurrently_with_one_summary(self):
+        ledger = EvidenceLedger(":memory:")
+        ledger.record("D-2026-001", "seen", "old.jpg", "https://drive/old")
+        items = [make_item(f"uniq-{i}", f"foto{i}.jpg") for i in range(6)]
+        items += [make_item("seen", "resent.jpg"), make_item("uniq-0", "dup.jpg")]
+
+        in_flight, peak = 0, 0
+
+        async def fake_upload(item, folder_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return None if item.file_name == "foto5.jpg" else f"https://drive/{item.unique_id}"
+
+        update = MagicMock()
+        update.message.reply_text = AsyncMock(return_value=SimpleNamespace(chat_id=1, message_id=2, text="⏳"))
+        context = MagicMock()
+        context.bot.edit_message_text = AsyncMock()
+
+        with patch.object(private, "get_evidence_ledger", return_value=ledger), \
+                patch.object(private, "_upload_evidence", side_effect=fake_upload) as upload, \
+                patch.object(private, "MEDIA_GROUP_MAX_CONCURRENT", 3), \
+                patch.object(private, "case_contexts") as contexts:
+            await private._ingest_media_group(update, context, "D-2026-001", "folder-1", items)
+
+        self.assertEqual(upload.call_count, 6)
+        self.assertEqual(peak, 3)
+        contexts.invalidate.assert_called_once_with("D-2026-001")
+        self.assertEqual(ledger.get("D-2026-001", "uniq-3"), "https://drive/uniq-3")
+
+        summary = update.message.reply_text.call_args_list[-1][0][0]
+        self.assertEqual(update.message.reply_text.call_count, 2)
+        self.assertIn("5 archivo(s) guardado(s)", summary)
+        self.assertIn("♻️ 1 ya", summary)
+        self.assertIn("foto5.jpg", summary)
+        # Reservations are released: the failed item can be sent again
+        self.assertTrue(ledger.reserve("D-2026-001", "uniq-5"))
+
+    async def test_same_file_sent_twice_at_once_is_uploaded_once(self):
+        ledger = EvidenceLedger(":memory:")
+        started = asyncio.Event()
+
+        async def slow_upload(item, folder_id):
+            started.set()
+            await asyncio.sleep(0.05)
+            return "https://drive/uniq-1"
+
+        def make_update():
+            update = MagicMock()
+            update.message.reply_text = AsyncMock(return_value=SimpleNamespace(chat_id=1, message_id=2, text="⏳"))
+            return update
+
+        context = MagicMock()
+        context.bot.edit_message_text = AsyncMock()
+        first, second = make_update(), make_update()
+        with patch.object(private, "get_evidence_ledger", return_value=ledger), \
+                patch.object(private, "_upload_evidence", side_effect=slow_upload) as upload:
+            task = asyncio.create_task(private._ingest_media_group(
+                first, context, "D-2026-001", "folder-1", [make_item("uniq-1", "a.jpg")]))
+            await started.wait()
+            await private._ingest_media_group(second, context, "D-2026-001", "folder-1", [make_item("uniq-1", "b.jpg")])
+            await task
+
+        self.assertEqual(upload.call_count, 1)
+        self.assertIn("♻️ 1 ya", second.message.reply_text.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.utils import executor
+from src.integrations.auth_helper import thread_safe_request_builder
+
+
+class TestIntegrationExecutor(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        executor.shutdown_executors()
+
+    async def test_run_blocking_returns_result_and_kwargs(self):
+        def blocking(a, b=0):
+            return a + b
+
+        result = await executor.run_blocking('notion', blocking, 1, b=2)
+        self.assertEqual(result, 3)
+
+    async def test_run_blocking_propagates_exceptions(self):
+        def blocking():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await executor.run_blocking('drive', blocking)
+
+    async def test_blocking_calls_overlap(self):
+        def slow():
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        start = time.monotonic()
+        names = await asyncio.gather(
+            executor.run_blocking('drive', slow),
+            executor.run_blocking('docs', slow),
+            executor.run_blocking('notion', slow),
+        )
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(names[0].startswith("drive-io"))
+        self.assertTrue(names[1].startswith("docs-io"))
+
+    @patch.dict("src.utils.executor.INTEGRATION_POOL_SIZES", {"notion": 1})
+    async def test_pool_size_bounds_concurrency(self):
+        def slow():
+            time.sleep(0.1)
+
+        start = time.monotonic()
+        await asyncio.gather(*(executor.run_blocking('notion', slow) for _ in range(3)))
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+
+class TestThreadSafeRequestBuilder(unittest.TestCase):
+    @patch("src.integrations.auth_helper.google_auth_httplib2.AuthorizedHttp")
+    def test_each_thread_gets_its_own_http(self, mock_authorized_http):
+        mock_authorized_http.side_effect = lambda creds, http: MagicMock()
+        build_request = thread_safe_request_builder(MagicMock())
+
+        same_thread = [build_request(None, None, "https://x").http for _ in range(2)]
+        other_thread = []
+        worker = threading.Thread(
+            target=lambda: other_thread.append(build_request(None, None, "https://x").http)
+        )
+        worker.start()
+        worker.join()
+
+        self.assertIs(same_thread[0], same_thread[1])
+        self.assertIsNot(same_thread[0], other_thread[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from src.integrations import http_pool
+
+
+class TestHttpPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await http_pool.close_http_sessions()
+
+    async def test_aiohttp_session_is_reused(self):
+        first = http_pool.get_aiohttp_session()
+        second = http_pool.get_aiohttp_session()
+        self.assertIs(first, second)
+        self.assertFalse(first.closed)
+
+    async def test_httpx_client_is_reused(self):
+        first = http_pool.get_httpx_client()
+        self.assertIs(first, http_pool.get_httpx_client())
+        self.assertFalse(first.is_closed)
+
+    async def test_close_and_recreate(self):
+        session = http_pool.get_aiohttp_session()
+        client = http_pool.get_httpx_client()
+
+        await http_pool.close_http_sessions()
+
+        self.assertTrue(session.closed)
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(http_pool.get_aiohttp_session(), session)
+        self.assertIsNot(http_pool.get_httpx_client(), client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.integrations.openrouter_client import OpenRouterClient
+from src.utils.json_repair import JSONRepairError, TolerantJSONParser, repair_json
+from src.utils.monitoring import json_repair_metrics
+
+
+class TestRepairJSON(unittest.TestCase):
+    def assertRepaired(self, text, expected, fix):
+        result = repair_json(text)
+        self.assertEqual(result.value, expected)
+        self.assertIn(fix, result.fixes)
+        self.assertEqual(json.loads(result.text), expected)
+
+    def test_valid_json_fast_path(self):
+        result = repair_json('{"a": [1, 2]}')
+        self.assertEqual(result.value, {"a": [1, 2]})
+        self.assertFalse(result.repaired)
+
+    def test_mechanical_failures(self):
+        self.assertRepaired('```json\n{"summary": "EPIs"}\n```', {"summary": "EPIs"}, "code_fence")
+        self.assertRepaired('{"content": "HECHOS\nPRIMERO.\tTexto"}', {"content": "HECHOS\nPRIMERO.\tTexto"}, "control_character")
+        self.assertRepaired('{"a": [1, 2,], "b": {"c": 1,},}', {"a": [1, 2], "b": {"c": 1}}, "trailing_comma")
+        self.assertRepaired('{"ruta": "C:\\docs"}', {"ruta": "C:\\docs"}, "invalid_escape")
+        self.assertRepaired('Aquí tienes:\n{"a": 1}\nEspero que sirva.', {"a": 1}, "preamble")
+
+    def test_think_reasoning(self):
+        self.assertRepaired('<think>Debo devolver {"x"}</think>\n{"a": 1}', {"a": 1}, "think_block")
+        # OpenRouter may strip the opening tag
+        self.assertRepaired('razonando sobre {llaves}\n</think>\n{"a": 1}', {"a": 1}, "think_block")
+        with self.assertRaises(JSONRepairError):
+            repair_json('<think>sin terminar {"a": 1}')
+
+    def test_truncation(self):
+        self.assertRepaired('{"summary": "Jornada", "content": "Texto cort', {"summary": "Jornada", "content": "Texto cort"}, "truncated")
+        self.assertRepaired('{"a": 1, "b"', {"a": 1}, "truncated")
+        self.assertRepaired('{"a": [1, {"b": tr', {"a": [1, {"b": True}]}, "truncated")
+
+    def test_unrepairable(self):
+        with self.assertRaises(JSONRepairError):
+            repair_json("Lo siento, no puedo ayudar con eso.")
+
+    def test_streaming_partial_values(self):
+        parser = TolerantJSONParser()
+        snapshots = []
+        for chunk in ('<think>ok</th', 'ink>{"summary": "Vaca', 'ciones", "content": "línea 1\n', 'línea 2"}'):
+            parser.feed(chunk)
+            snapshots.append(parser.partial())
+
+        self.assertEqual(snapshots[:2], [None, {"summary": "Vaca"}])
+        self.assertEqual(parser.close().value, {"summary": "Vacaciones", "content": "línea 1\nlínea 2"})
+
+
+class TestCompletionJSONOutcomes(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        json_repair_metrics.reset()
+        self.addCleanup(json_repair_metrics.reset)
+        self.client = OpenRouterClient()
+        self.client.api_key = "test-key"
+
+    async def complete(self, *responses, task_type=None):
+        with patch.object(self.client, "_make_request", new=AsyncMock(side_effect=list(responses))) as request:
+            content = await self.client.completion(
+                [{"role": "user", "content": "hola"}], response_format={"type": "json_object"}, task_type=task_type
+            )
+        return content, request.call_count
+
+    async def test_local_repair_skips_repair_model(self):
+        content, calls = await self.complete('```json\n{"summary": "EPIs", "content": "a\nb",}\n```')
+
+        self.assertEqual(json.loads(content), {"summary": "EPIs", "content": "a\nb"})
+        self.assertEqual(calls, 1)
+        snapshot = json_repair_metrics.snapshot()
+        self.assertEqual(snapshot["outcomes"], {"local": 1})
+        self.assertEqual(snapshot["fixes"]["trailing_comma"], 1)
+
+    async def test_repair_model_when_local_repair_fails(self):
+        content, calls = await self.complete("summary: EPIs", '{"summary": "EPIs"}')
+
+        self.assertEqual(json.loads(content), {"summary": "EPIs"})
+        self.assertEqual(calls, 2)
+        self.assertEqual(json_repair_metrics.snapshot()["outcomes"], {"model": 1})
+
+    async def test_truncated_draft_is_not_closed(self):
+        truncated = '{"summary": "Despido", "content": "HECHOS\\nPrimero. La empresa comunic'
+        content, calls = await self.complete(truncated, task_type="DRAFT")
+
+        self.assertEqual(content, truncated)
+        self.assertEqual(calls, 1)
+        self.assertEqual(json_repair_metrics.snapshot()["outcomes"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
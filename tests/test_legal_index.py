@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.legal import (
+    BM25Index,
+    LegalRetriever,
+    ensure_index_file,
+    format_legal_context,
+    parse_convenio,
+    tokenize
+)
+from src.legal.bm25 import BM25Search, stem
+from src.legal.index_file import section_terms
+
+CONVENIO_XML_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "data", "convenio_colectivo_ingenierias.xml")
+
+
+class TestConvenioIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.index_path = os.path.join(cls.tmp.name, "legal_index.bin")
+        cls.retriever = LegalRetriever.open([CONVENIO_XML_PATH], cls.index_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.retriever.index.close()
+        cls.tmp.cleanup()
+
+    def test_parses_articles_and_annexes(self):
+        document = parse_convenio(CONVENIO_XML_PATH)
+        ids = [section.section_id for section in document.sections]
+
+        self.assertEqual(document.identifier, "BOE-A-2023-6346")
+        self.assertGreater(len(ids), 60)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertIn("art-18-bis", ids)
+        self.assertEqual(document.get("art-23").heading, "Artículo 23. Vacaciones")
+        # Salary tables are flattened into rows
+        self.assertTrue(any(" | " in row for row in document.get("anexo-ii").paragraphs))
+
+    def test_top_hits_for_facts(self):
+        start = time.perf_counter()
+        hits = self.retriever.search("Me han denegado las vacaciones de verano que solicité en julio")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(hits[0].section.section_id, "art-23")
+        self.assertLess(elapsed, 0.1)
+
+        hits = self.retriever.search("Me obligan a hacer horas extraordinarias y la jornada supera las 40 horas semanales")
+        self.assertIn("art-22", [hit.section.section_id for hit in hits])
+
+        hits = self.retriever.search("Quiero teletrabajar y la empresa no me compensa los gastos")
+        self.assertEqual(hits[0].section.section_id, "art-39")
+
+    def test_excerpt_is_verbatim_and_bounded(self):
+        hit = self.retriever.search("dietas y desplazamientos kilometraje", max_excerpt_chars=600)[0]
+        self.assertEqual(hit.section.section_id, "art-37")
+        for part in hit.excerpt.split("\n"):
+            if part != "[…]" and not part.endswith(" […]"):
+                self.assertIn(part, hit.section.paragraphs)
+
+    def test_no_hits_without_meaningful_terms(self):
+        self.assertEqual(self.retriever.search("hola, que tal"), [])
+        self.assertEqual(tokenize("de la y el"), [])
+
+    def test_stemming_groups_verb_and_noun_forms(self):
+        self.assertEqual({stem(w) for w in ("despido", "despidos", "despidieron", "despedido", "despedir")}, {"despid"})
+        self.assertEqual(stem("teletrabajar"), stem("teletrabajo"))
+
+    def test_incomplete_search_backend_cannot_be_created(self):
+        class NoPostings(BM25Search):
+            def __len__(self):
+                return 0
+
+        with self.assertRaises(TypeError):
+            NoPostings()
+
+    def test_mapped_index_matches_in_memory_bm25(self):
+        sections = [s for s in parse_convenio(CONVENIO_XML_PATH).sections if s.paragraphs]
+        in_memory = BM25Index([section_terms(section) for section in sections])
+        query = tokenize("despido durante el periodo de prueba y horas extraordinarias")
+
+        expected = in_memory.search(query, k=5)
+        mapped = self.retriever.index.search(query, k=5)
+        self.assertEqual([doc for doc, _ in mapped], [doc for doc, _ in expected])
+        for (_, a), (_, b) in zip(mapped, expected):
+            self.assertAlmostEqual(a, b)
+        self.assertEqual(self.retriever.index.section(expected[0][0]).text, sections[expected[0][0]].text)
+
+    def test_rebuilt_only_when_source_changes(self):
+        source = os.path.join(self.tmp.name, "convenio.xml")
+        path = os.path.join(self.tmp.name, "rebuild.bin")
+        shutil.copy(CONVENIO_XML_PATH, source)
+
+        self.assertTrue(ensure_index_file([source], path))
+        self.assertFalse(ensure_index_file([source], path))
+
+        with open(source, "a", encoding="utf-8") as f:
+            f.write("\n<!-- corrección de errores -->\n")
+        self.assertTrue(ensure_index_file([source], path))
+
+    def test_prompt_formatting(self):
+        hits = self.retriever.search("vacaciones", k=1)
+        text = format_legal_context(hits)
+
+        self.assertTrue(text.startswith("Fuente: Resolución"))
+        self.assertIn("### Artículo 23. Vacaciones", text)
+        self.assertEqual(format_legal_context([]), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from src.utils import ProgressTracker
+from src.utils.metrics_exporter import register_gauge, render_openmetrics, unregister_gauge
+from src.utils.monitoring import APIMetrics, PipelineMetrics, pipeline_metrics
+
+
+class TestOpenMetricsExporter(unittest.TestCase):
+    def setUp(self):
+        self.api = APIMetrics(retention_minutes=10)
+        self.pipelines = PipelineMetrics()
+
+    def render(self):
+        return render_openmetrics(self.api, self.pipelines)
+
+    def test_api_counters_and_histogram(self):
+        self.api.record_call("notion", True, 80)
+        self.api.record_call("notion", True, 2000)
+        self.api.record_call("notion", False, error_type="RateLimitError")
+
+        text = self.render()
+
+        self.assertIn('marxnager_api_calls_total{api="notion",outcome="success"} 2', text)
+        self.assertIn('marxnager_api_calls_total{api="notion",outcome="failure"} 1', text)
+        self.assertIn('marxnager_api_errors_total{api="notion",error_type="RateLimitError"} 1', text)
+        self.assertIn('marxnager_api_rate_limit_hits_total{api="notion"} 1', text)
+        self.assertIn('marxnager_api_latency_seconds_bucket{api="notion",le="0.1"} 1', text)
+        self.assertIn('marxnager_api_latency_seconds_bucket{api="notion",le="+Inf"} 2', text)
+        self.assertIn('marxnager_api_latency_seconds_count{api="notion"} 2', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_pipeline_metrics_and_gauges(self):
+        self.pipelines.pipeline_started("demanda")
+        self.pipelines.record_step("demanda", "Research", 12.0, success=True)
+        self.pipelines.record_step("demanda", "Docs Creation", None, success=False)
+        register_gauge("update_queue_depth", "Updates waiting.", lambda: 3)
+        register_gauge("executor_queue_depth", "Calls waiting.", lambda: {(("integration", "notion"),): 2})
+        self.addCleanup(unregister_gauge, "update_queue_depth")
+        self.addCleanup(unregister_gauge, "executor_queue_depth")
+
+        text = self.render()
+
+        self.assertIn('marxnager_pipelines_in_flight{pipeline="demanda"} 1', text)
+        self.assertIn('marxnager_pipeline_step_duration_seconds_bucket{pipeline="demanda",step="Research",le="30.0"} 1', text)
+        self.assertIn('marxnager_pipeline_steps_total{pipeline="demanda",step="Docs Creation",outcome="failure"} 1', text)
+        self.assertIn("marxnager_update_queue_depth 3", text)
+        self.assertIn('marxnager_executor_queue_depth{integration="notion"} 2', text)
+
+    def test_progress_tracker_records_steps(self):
+        pipeline_metrics.reset()
+        self.addCleanup(pipeline_metrics.reset)
+        tracker = ProgressTracker(["Initialization"], name="email")
+        tracker.start_step("Initialization")
+        tracker.complete_step("Initialization")
+
+        outcomes = pipeline_metrics.snapshot()["step_outcomes"]
+        self.assertEqual(outcomes[("email", "Initialization", "success")], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
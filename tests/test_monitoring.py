@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+from src.utils.monitoring import APIMetrics, LatencyHistogram
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_precision(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        for pct, expected in ((50, 500), (95, 950), (99, 990)):
+            self.assertAlmostEqual(histogram.percentile(pct), expected, delta=expected / LatencyHistogram.SUB_BUCKETS)
+        self.assertAlmostEqual(histogram.mean(), 500.5)
+
+    def test_empty(self):
+        self.assertIsNone(LatencyHistogram().percentile(95))
+
+
+class TestAPIMetrics(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.metrics = APIMetrics(retention_minutes=60, clock=self.clock)
+
+    def test_window_queries(self):
+        self.metrics.record_call("notion", True, 100)
+        self.clock.now += 30 * 60
+        self.metrics.record_call("notion", True, 300)
+        self.metrics.record_call("notion", False, error_type="RateLimitError")
+
+        self.assertAlmostEqual(self.metrics.get_success_rate("notion", minutes=5), 50.0)
+        self.assertAlmostEqual(self.metrics.get_success_rate("notion", minutes=60), 200 / 3)
+        self.assertAlmostEqual(self.metrics.get_average_latency("notion", minutes=60), 200.0)
+        self.assertEqual(self.metrics.get_error_summary("notion"), {"RateLimitError": 1})
+        self.assertEqual(self.metrics.get_all_metrics()["notion"]["rate_limit_hits"], 1)
+
+    def test_memory_is_bounded_and_old_buckets_expire(self):
+        for _ in range(3 * 60):
+            self.metrics.record_call("drive", True, 50)
+            self.clock.now += 60
+
+        self.assertEqual(len(self.metrics._buckets["drive"]), 60)
+        self.assertIsNone(self.metrics.get_success_rate("drive", minutes=1))
+        self.assertEqual(self.metrics.get_latency_percentiles("drive", minutes=10)[50], 52.0)
+
+    def test_thread_safe_recording(self):
+        def worker():
+            for _ in range(1000):
+                self.metrics.record_call("supabase", True, 10)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.metrics._latency_histogram("supabase", 60).count, 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -42,12 +42,12 @@ class TestOpenRouter(unittest.IsolatedAsyncioTestCase):
     @patch('src.integrations.openrouter_client.OpenRouterClient._make_request', new_callable=AsyncMock)
     async def test_qwen_json_fixing_passing_case(self, mock_make_request):
         """
-        Test that invalid JSON is detected, triggers repair, and successfully
-        returns valid JSON after repair.
+        Test that JSON the local repair cannot fix triggers the repair model,
+        and that valid JSON is returned after repair.
         """
         print("\nTesting Qwen JSON fixing (passing case for successful repair)...")
 
-        malformed_json = '{"name": "test", "age": 30,' # Malformed JSON from primary
+        malformed_json = 'name: test, age: 30' # Not locally repairable (no JSON object at all)
         repaired_json = json.dumps({"name": "test", "age": 30, "status": "repaired"}) # Valid JSON from repair
 
         # Configure the mock to return malformed JSON first, then valid JSON for repair
@@ -86,7 +86,7 @@ class TestOpenRouter(unittest.IsolatedAsyncioTestCase):
         """
         print("\nTesting Qwen JSON repair response_format (failing test)...")
 
-        malformed_json = '{"key": "value",' # Malformed JSON to trigger repair
+        malformed_json = 'key: value' # Not locally repairable, so the repair model is called
 
         # Configure the mock. The first call will trigger repair.
         # The second call is what we want to inspect for response_format.
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from src.integrations import openrouter_client
+from src.integrations.openrouter_client import ModelLatencyTracker, OpenRouterClient
+
+
+def fake_requests(behaviour, calls, cancelled):
+    """behaviour: model -> (delay seconds, result or exception)"""
+    async def make_request(messages, model, response_format=None):
+        calls.append(model)
+        delay, outcome = behaviour[model]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return make_request
+
+
+class TestHedgedRequests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = OpenRouterClient()
+        self.calls, self.cancelled = [], []
+        delay_patch = patch.object(openrouter_client.model_latency, "hedge_delay", return_value=0.05)
+        delay_patch.start()
+        self.addCleanup(delay_patch.stop)
+
+    async def hedge(self, behaviour, **kwargs):
+        self.client._make_request = fake_requests(behaviour, self.calls, self.cancelled)
+        return await self.client._hedged_request([], "primary", "fallback", **kwargs)
+
+    async def test_fast_primary_does_not_hedge(self):
+        result = await self.hedge({"primary": (0, "A"), "fallback": (0, "B")})
+        self.assertEqual(result, ("A", "primary"))
+        self.assertEqual(self.calls, ["primary"])
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        result = await self.hedge({"primary": (5, "A"), "fallback": (0.01, "B")})
+        self.assertEqual(result, ("B", "fallback"))
+        self.assertEqual(self.calls, ["primary", "fallback"])
+        await asyncio.sleep(0)
+        self.assertEqual(self.cancelled, ["primary"])
+
+    async def test_primary_failure_starts_fallback_immediately(self):
+        result = await self.hedge({"primary": (0, ValueError("boom")), "fallback": (0, "B")})
+        self.assertEqual(result, ("B", "fallback"))
+
+    async def test_invalid_primary_response_waits_for_fallback(self):
+        result = await self.hedge(
+            {"primary": (0, "short"), "fallback": (0.01, "x" * 60)},
+            is_valid=lambda text: len(text) >= 50
+        )
+        self.assertEqual(result[1], "fallback")
+
+    async def test_both_fail_raises_last_error(self):
+        with self.assertRaises(RuntimeError):
+            await self.hedge({"primary": (0, ValueError("one")), "fallback": (0, RuntimeError("two"))})
+
+
+class TestModelLatencyTracker(unittest.TestCase):
+    def test_hedge_delay_uses_clamped_p95(self):
+        tracker = ModelLatencyTracker()
+        self.assertEqual(tracker.hedge_delay("m"), openrouter_client.HEDGE_DEFAULT_DELAY)
+
+        for seconds in [10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29]:
+            tracker.record("m", seconds)
+        self.assertEqual(tracker.p95("m"), 28)
+
+        for _ in range(50):
+            tracker.record("fast", 0.1)
+        self.assertEqual(tracker.hedge_delay("fast"), openrouter_client.HEDGE_MIN_DELAY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from src.integrations import openrouter_client
+from src.integrations.openrouter_client import (
+    DegenerateOutputDetector,
+    DegenerateOutputError,
+    OpenRouterClient,
+    StreamDelta,
+    is_repetitive
+)
+
+
+def sse(*chunks):
+    lines = [b": OPENROUTER PROCESSING\n", b"\n"]
+    for chunk in chunks:
+        lines.append(f"data: {json.dumps(chunk)}\n".encode())
+        lines.append(b"\n")
+    lines.append(b"data: [DONE]\n")
+    return lines
+
+
+def delta(content="", reasoning=""):
+    return {"choices": [{"delta": {"content": content, "reasoning": reasoning}}]}
+
+
+class FakeResponse:
+    def __init__(self, lines, status=200):
+        self.status = status
+        self.reason = "OK"
+        url = URL("https://openrouter.test/chat/completions")
+        self.request_info = aiohttp.RequestInfo(url, "POST", CIMultiDictProxy(CIMultiDict()), url)
+        self.history = ()
+        self.headers = {}
+        self._lines = lines
+
+    async def text(self):
+        return "error"
+
+    @property
+    def content(self):
+        async def iterate():
+            for line in self._lines:
+                yield line
+        return iterate()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, streams):
+        self.streams = streams  # model -> lines
+        self.payloads = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.payloads.append(json)
+        stream = self.streams[json["model"]]
+        return FakeResponse([], status=stream) if isinstance(stream, int) else FakeResponse(stream)
+
+
+class TestDegenerateDetection(unittest.TestCase):
+    def test_is_repetitive(self):
+        self.assertTrue(is_repetitive("Hecho primero. " * 60))
+        legal_text = " ".join(f"Artículo {i}. El trabajador tendrá derecho a {i * 3} días." for i in range(40))
+        self.assertFalse(is_repetitive(legal_text[-800:]))
+
+    def test_reasoning_only_aborts(self):
+        detector = DegenerateOutputDetector(max_reasoning_chars=100)
+        with self.assertRaises(DegenerateOutputError):
+            for _ in range(20):
+                detector.feed(StreamDelta(reasoning="pensando... "))
+
+    def test_empty_stream_fails_on_finish(self):
+        detector = DegenerateOutputDetector()
+        detector.feed(StreamDelta(reasoning="solo razonamiento"))
+        with self.assertRaises(DegenerateOutputError):
+            detector.finish()
+
+    def test_looping_content_aborts(self):
+        detector = DegenerateOutputDetector()
+        with self.assertRaises(DegenerateOutputError):
+            for _ in range(200):
+                detector.feed(StreamDelta(content="y el trabajador "))
+
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = OpenRouterClient()
+        self.client.api_key = "key"
+
+    async def test_stream_completion_parses_sse(self):
+        session = FakeSession({"m": sse(delta(reasoning="hmm"), delta("Hola "), {"choices": []}, delta("mundo"))})
+        with patch.object(openrouter_client, "get_aiohttp_session", return_value=session):
+            deltas = [d async for d in self.client.stream_completion([], "m")]
+
+        self.assertEqual("".join(d.content for d in deltas), "Hola mundo")
+        self.assertEqual(deltas[0].reasoning, "hmm")
+        self.assertTrue(session.payloads[0]["stream"])
+
+    async def test_generate_from_template_streams_progress(self):
+        text = "Documento completo " * 10
+        session = FakeSession({openrouter_client.MODEL_PRIMARY: sse(delta(text[:50]), delta(text[50:]))})
+        progress = []
+
+        async def on_progress(model, chars, tail):
+            progress.append(chars)
+
+        with patch.object(openrouter_client, "get_aiohttp_session", return_value=session), \
+                patch.object(openrouter_client, "HEDGING_ENABLED", False):
+            result = await self.client.generate_from_template("T", "C", "R", on_progress=on_progress)
+
+        self.assertEqual(result, text)
+        self.assertEqual(progress, [50, len(text)])
+
+    async def test_degenerate_stream_switches_to_fallback(self):
+        primary, fallback = "primary/model", openrouter_client.MODEL_FALLBACK
+        session = FakeSession({
+            primary: sse(*[delta(reasoning="x" * 1000)] * 5),
+            fallback: sse(delta("Documento del modelo de respaldo " * 3)),
+        })
+
+        async def on_progress(model, chars, tail):
+            pass
+
+        with patch.object(openrouter_client, "get_aiohttp_session", return_value=session), \
+                patch.object(openrouter_client, "HEDGING_ENABLED", False):
+            result = await self.client.generate_from_template("T", "C", "R", model=primary, on_progress=on_progress)
+
+        self.assertIn("respaldo", result)
+        # Degenerate output is not retried on the same model
+        self.assertEqual([p["model"] for p in session.payloads], [primary, fallback])
+
+    @patch("src.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+    async def test_client_error_status_is_not_retried(self, mock_sleep):
+        session = FakeSession({"m": 401})
+        with patch.object(openrouter_client, "get_aiohttp_session", return_value=session), \
+                self.assertLogs("src.integrations.openrouter_client", level="ERROR"):
+            with self.assertRaises(aiohttp.ClientResponseError) as cm:
+                await self.client._stream_request([], "m")
+
+        self.assertEqual(cm.exception.status, 401)
+        self.assertEqual(len(session.payloads), 1)
+        mock_sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,11 +8,11 @@ class TestPerplexityRetry(unittest.IsolatedAsyncioTestCase):
         self.client = PerplexityClient()
         self.client.primary_key = "test_key"
 
-    @patch('src.integrations.perplexity_client.httpx.AsyncClient')
-    async def test_make_request_retries_on_failure(self, mock_client_cls):
+    @patch('src.integrations.perplexity_client.get_httpx_client')
+    async def test_make_request_retries_on_failure(self, mock_get_client):
         # Setup mock client
         mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         # Mock responses: 2 failures, 1 success
         fail_response = MagicMock()
@@ -39,11 +39,11 @@ class TestPerplexityRetry(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, "Verified Content")
         self.assertEqual(mock_client.post.call_count, 3)
 
-    @patch('src.integrations.perplexity_client.httpx.AsyncClient')
-    async def test_make_request_fails_after_retries(self, mock_client_cls):
+    @patch('src.integrations.perplexity_client.get_httpx_client')
+    async def test_make_request_fails_after_retries(self, mock_get_client):
          # Setup mock client
         mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         # Mock responses: 3 failures
         fail_response = MagicMock()
@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from telegram.error import RetryAfter
+
+from src.utils import ProgressTracker, format_progress_text
+from src.utils import progress_renderer
+from src.utils.progress_renderer import ProgressRenderer, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+
+        for _ in range(2):
+            self.assertEqual(bucket.delay(), 0)
+            bucket.consume()
+        self.assertAlmostEqual(bucket.delay(), 2.0)
+
+        clock.now += 2.0
+        self.assertEqual(bucket.delay(), 0)
+
+    def test_block_for(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=5, clock=clock)
+        bucket.block_for(3)
+        self.assertAlmostEqual(bucket.delay(), 3.0)
+        clock.now += 3.0
+        self.assertEqual(bucket.delay(), 0)
+
+    def test_idle_buckets_are_evicted(self):
+        with patch.object(progress_renderer, "_chat_buckets", {}):
+            progress_renderer.get_chat_bucket(1)
+            busy = progress_renderer.get_chat_bucket(2)
+            busy.consume()
+            progress_renderer.get_chat_bucket(3)
+
+            self.assertEqual(set(progress_renderer._chat_buckets), {2, 3})
+
+
+class TestProgressRenderer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Generous budgets so tests only exercise coalescing unless they say otherwise
+        buckets = patch.object(progress_renderer, "_chat_buckets", {})
+        global_bucket = patch.object(progress_renderer, "_global_bucket", TokenBucket(1000, 1000))
+        chat_rate = patch.object(progress_renderer, "PROGRESS_CHAT_EDITS_PER_MINUTE", 60000)
+        chat_burst = patch.object(progress_renderer, "PROGRESS_CHAT_EDIT_BURST", 1000)
+        for p in (buckets, global_bucket, chat_rate, chat_burst):
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.bot = MagicMock()
+        self.bot.edit_message_text = AsyncMock()
+        self.tracker = ProgressTracker(["A", "B"])
+        self.renderer = ProgressRenderer(
+            self.bot, chat_id=1, message_id=2,
+            initial_text=format_progress_text(self.tracker.get_steps_status()),
+            coalesce_window=0.05
+        )
+        self.tracker.attach_renderer(self.renderer)
+
+    def sent_texts(self):
+        return [call.kwargs["text"] for call in self.bot.edit_message_text.await_args_list]
+
+    async def test_attaching_does_not_resend_initial_text(self):
+        await self.renderer.flush()
+        self.bot.edit_message_text.assert_not_awaited()
+
+    async def test_changes_within_window_are_coalesced(self):
+        self.tracker.start_step("A")
+        self.tracker.set_detail("A", "100 caracteres")
+        self.tracker.complete_step("A")
+        self.tracker.start_step("B")
+        await asyncio.sleep(0.15)
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 1)
+        self.assertEqual(self.sent_texts()[-1], format_progress_text(self.tracker.get_steps_status()))
+
+    async def test_identical_text_is_not_sent_twice(self):
+        self.tracker.start_step("A")
+        await self.renderer.flush()
+        self.tracker.set_detail("B", "ignored while pending")
+        self.renderer.request_render(self.tracker.get_steps_status())
+        await self.renderer.flush()
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 1)
+
+    async def test_coalescing_resumes_after_flush(self):
+        self.tracker.start_step("A")
+        await self.renderer.flush()
+        self.tracker.complete_step("A")
+        self.tracker.start_step("B")
+        await asyncio.sleep(0.15)
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 2)
+        self.assertFalse(self.renderer._flush_event.is_set())
+
+    async def test_retry_after_delivers_latest_state(self):
+        self.bot.edit_message_text.side_effect = [RetryAfter(0.05), None]
+        self.tracker.start_step("A")
+        await asyncio.sleep(0.06)
+        self.tracker.complete_step("A")
+        await self.renderer.flush()
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 2)
+        self.assertEqual(self.sent_texts()[-1], format_progress_text(self.tracker.get_steps_status()))
+
+    async def test_chat_budget_is_shared_between_renderers(self):
+        progress_renderer._chat_buckets[1] = TokenBucket(rate=0.01, capacity=1)
+        other = ProgressRenderer(self.bot, chat_id=1, message_id=3, coalesce_window=0)
+
+        self.tracker.start_step("A")
+        await self.renderer.flush()
+        other.request_render(self.tracker.get_steps_status())
+        await other.flush(timeout=0.05)
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 1)
+        other._task.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src.integrations import perplexity_client
+from src.integrations.research_cache import ResearchCache, normalize_tokens
+
+
+def make_cache(**overrides):
+    options = dict(ttl_seconds=3600, max_entries=10, similarity_threshold=0.8)
+    options.update(overrides)
+    return ResearchCache(":memory:", **options)
+
+
+class TestResearchCache(unittest.TestCase):
+    def test_normalization_ignores_case_accents_and_stopwords(self):
+        self.assertEqual(
+            normalize_tokens("No nos dan los EPIs en los TURNOS de noche."),
+            normalize_tokens("no: turno noche, epis, dan")
+        )
+        self.assertNotEqual(
+            normalize_tokens("la empresa no pagó las horas extra"),
+            normalize_tokens("la empresa pagó las horas extra")
+        )
+        self.assertIn("descanso", normalize_tokens("Descansos semanales"))
+        self.assertIn("sabado", normalize_tokens("sábado"))
+
+    def test_exact_hit(self):
+        cache = make_cache()
+        cache.store("Falta de EPIs en el turno de noche", "denuncia", "research A")
+
+        hit = cache.lookup("falta EPIS turno noche", "denuncia")
+        self.assertEqual(hit.research, "research A")
+        self.assertTrue(hit.exact)
+        self.assertIsNone(cache.lookup("falta EPIS turno noche", "demanda"))
+
+    def test_near_duplicate_hit(self):
+        cache = make_cache(similarity_threshold=0.7)
+        cache.store("empresa no entrega EPIs turno noche plataforma", "denuncia", "research A")
+
+        hit = cache.lookup("empresa no entrega EPIs turno noche plataforma norte", "denuncia")
+        self.assertIsNotNone(hit)
+        self.assertFalse(hit.exact)
+        self.assertGreaterEqual(hit.similarity, 0.7)
+        self.assertIsNone(cache.lookup("despido improcedente por baja medica larga", "denuncia"))
+
+    def test_near_duplicate_must_agree_on_negations(self):
+        cache = make_cache(similarity_threshold=0.5)
+        cache.store("la empresa pagó las horas extra del turno de noche", "demanda", "research A")
+
+        self.assertIsNone(cache.lookup("la empresa no pagó las horas extra del turno de noche", "demanda"))
+
+    def test_ttl_expiry(self):
+        cache = make_cache(ttl_seconds=-1)
+        cache.store("falta de EPIs", "denuncia", "research A")
+        self.assertIsNone(cache.lookup("falta de EPIs", "denuncia"))
+
+    def test_lru_eviction(self):
+        cache = make_cache(max_entries=2)
+        cache.store("caso uno vacaciones", "denuncia", "A")
+        cache.store("caso dos nominas", "denuncia", "B")
+        cache.lookup("caso uno vacaciones", "denuncia")  # refresh A
+        cache.store("caso tres horas extra", "denuncia", "C")
+
+        self.assertIsNotNone(cache.lookup("caso uno vacaciones", "denuncia"))
+        self.assertIsNone(cache.lookup("caso dos nominas", "denuncia"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_invalidate_by_type(self):
+        cache = make_cache()
+        cache.store("falta de EPIs", "denuncia", "A")
+        cache.store("despido disciplinario", "demanda", "B")
+
+        self.assertEqual(cache.invalidate("denuncia"), 1)
+        self.assertEqual(cache.stats()["per_type"], {"demanda": 1})
+
+
+class TestPerplexityResearchCache(unittest.IsolatedAsyncioTestCase):
+    async def test_second_research_skips_network(self):
+        cache = make_cache()
+        client = perplexity_client.PerplexityClient()
+        client.primary_key = "key"
+
+        with patch.object(perplexity_client, "get_research_cache", return_value=cache), \
+                patch.object(client, "_make_request", new=AsyncMock(return_value="Fundamentos")) as mock_request:
+            first = await client.research_case("No entregan EPIs en el turno de noche", "denuncia")
+            second = await client.research_case("no entregan epis turno noche", "denuncia")
+
+        self.assertEqual(first, "Fundamentos")
+        self.assertEqual(second, "Fundamentos")
+        self.assertEqual(mock_request.await_count, 1)
+        self.assertTrue(client.last_cache_hit.exact)
+
+
+if __name__ == '__main__':
+    unittest.main()
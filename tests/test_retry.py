@@ -0,0 +1,201 @@
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import aiohttp
+import httplib2
+from aiohttp import web
+from googleapiclient.errors import HttpError
+
+from src.integrations.http_pool import close_http_sessions
+from src.integrations.openrouter_client import OpenRouterClient
+
+from src.utils.retry import (
+    retry,
+    sync_retry,
+    async_retry,
+    RetryBudget,
+    get_retry_after,
+    is_transient_error,
+    compute_backoff,
+)
+
+
+def make_http_error(status, headers=None):
+    resp = httplib2.Response({"status": status, **(headers or {})})
+    return HttpError(resp, b"error")
+
+
+class TestRetryHelpers(unittest.TestCase):
+    def test_compute_backoff_is_jittered_within_ceiling(self):
+        delays = [compute_backoff(2, 1.0, 2.0, max_delay=30) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 4.0 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_compute_backoff_respects_max_delay(self):
+        self.assertLessEqual(compute_backoff(10, 1.0, 2.0, max_delay=5), 5)
+
+    def test_retry_after_from_google_http_error(self):
+        self.assertEqual(get_retry_after(make_http_error(429, {"retry-after": "7"})), 7.0)
+
+    def test_retry_after_from_headers_attribute(self):
+        error = Exception("rate limited")
+        error.headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        self.assertEqual(get_retry_after(error), 0.0)  # Date in the past
+
+    def test_retry_after_missing(self):
+        self.assertIsNone(get_retry_after(ConnectionError("reset")))
+
+    def test_transient_error_classification(self):
+        self.assertTrue(is_transient_error(ConnectionError()))
+        self.assertTrue(is_transient_error(make_http_error(503)))
+        self.assertFalse(is_transient_error(make_http_error(404)))
+
+    def test_budget_exhaustion(self):
+        budget = RetryBudget(capacity=2, refill_per_second=0)
+        self.assertTrue(budget.try_acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+
+
+class TestSyncRetry(unittest.TestCase):
+    @patch("src.utils.retry.time.sleep")
+    def test_retries_then_succeeds(self, mock_sleep):
+        calls = MagicMock(side_effect=[ConnectionError("1"), ConnectionError("2"), "ok"])
+
+        @sync_retry(max_retries=3, budget=RetryBudget(10, 0))
+        def flaky():
+            return calls()
+
+        self.assertEqual(flaky(), "ok")
+        self.assertEqual(calls.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @patch("src.utils.retry.time.sleep")
+    def test_honours_retry_after(self, mock_sleep):
+        calls = MagicMock(side_effect=[make_http_error(429, {"retry-after": "3"}), "ok"])
+
+        @sync_retry(max_retries=2, exceptions=(HttpError,), budget=None)
+        def rate_limited():
+            return calls()
+
+        self.assertEqual(rate_limited(), "ok")
+        self.assertGreaterEqual(mock_sleep.call_args[0][0], 3.0)
+
+    @patch("src.utils.retry.time.sleep")
+    def test_permanent_error_not_retried(self, mock_sleep):
+        calls = MagicMock(side_effect=make_http_error(404))
+
+        @sync_retry(max_retries=3, exceptions=(HttpError,), budget=None)
+        def missing():
+            return calls()
+
+        with self.assertRaises(HttpError):
+            missing()
+        self.assertEqual(calls.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("src.utils.retry.time.sleep")
+    def test_budget_exhausted_fails_fast(self, mock_sleep):
+        calls = MagicMock(side_effect=ConnectionError("down"))
+
+        @sync_retry(max_retries=5, budget=RetryBudget(1, 0))
+        def outage():
+            return calls()
+
+        with self.assertRaises(ConnectionError):
+            outage()
+        self.assertEqual(calls.call_count, 2)  # First attempt + one budgeted retry
+
+
+class TestRetryOnEventLoop(unittest.IsolatedAsyncioTestCase):
+    @patch("src.utils.retry.time.sleep")
+    async def test_sync_function_never_sleeps_on_loop_thread(self, mock_sleep):
+        calls = MagicMock(side_effect=ConnectionError("down"))
+
+        @sync_retry(max_retries=3, budget=None)
+        def blocking_call():
+            return calls()
+
+        with self.assertRaises(ConnectionError):
+            blocking_call()
+        self.assertEqual(calls.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("src.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+    async def test_async_retry_uses_asyncio_sleep(self, mock_sleep):
+        calls = MagicMock(side_effect=[asyncio.TimeoutError(), "ok"])
+        on_retry = AsyncMock()
+
+        @async_retry(max_retries=2, on_retry=on_retry, budget=None)
+        async def request():
+            return calls()
+
+        self.assertEqual(await request(), "ok")
+        mock_sleep.assert_awaited_once()
+        on_retry.assert_awaited_once()
+
+    async def test_unified_decorator_detects_coroutines(self):
+        @retry(max_retries=1)
+        async def coro():
+            return 1
+
+        @retry(max_retries=1)
+        def func():
+            return 2
+
+        self.assertEqual(await coro(), 1)
+        self.assertEqual(func(), 2)
+
+
+class TestOpenRouterStatusErrors(unittest.IsolatedAsyncioTestCase):
+    """Non-200 OpenRouter responses keep their status, so only retryable ones are retried."""
+
+    async def asyncSetUp(self):
+        self.statuses = []
+        self.requests = 0
+
+        async def completions(request):
+            self.requests += 1
+            status = self.statuses.pop(0)
+            if status != 200:
+                return web.Response(status=status, text="error", headers={"Retry-After": "0"})
+            return web.json_response({"choices": [{"message": {"content": "ok"}}]})
+
+        app = web.Application()
+        app.router.add_post("/chat/completions", completions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.client = OpenRouterClient()
+        self.client.base_url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+    async def asyncTearDown(self):
+        await close_http_sessions()
+        await self.runner.cleanup()
+
+    @patch("src.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+    async def test_client_errors_are_not_retried(self, mock_sleep):
+        self.statuses = [402]
+        with self.assertLogs("src.integrations.openrouter_client", level="ERROR"):
+            with self.assertRaises(aiohttp.ClientResponseError) as cm:
+                await self.client._make_request([{"role": "user", "content": "hola"}], "test-model")
+
+        self.assertEqual(cm.exception.status, 402)
+        self.assertFalse(is_transient_error(cm.exception))
+        self.assertEqual(self.requests, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("src.utils.retry.asyncio.sleep", new_callable=AsyncMock)
+    async def test_server_errors_are_retried(self, mock_sleep):
+        self.statuses = [503, 200]
+        with self.assertLogs("src.integrations.openrouter_client", level="ERROR"):
+            result = await self.client._make_request([{"role": "user", "content": "hola"}], "test-model")
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(self.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.utils import tracing
+from src.utils.executor import run_blocking
+from src.utils.monitoring import track_api_call
+from src.utils.retry import async_retry
+from src.utils.tracing import load_trace, render_waterfall, set_case_id, span, start_trace, tag_span
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for p in (
+            patch.object(tracing, "TRACE_FILE", os.path.join(self.tmp.name, "traces.jsonl")),
+            patch.object(tracing, "TRACING_ENABLED", True),
+            patch.object(tracing, "_trace_logger", None),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.close_trace_handlers)
+
+    def close_trace_handlers(self):
+        trace_logger = logging.getLogger("marxnager.traces")
+        for handler in list(trace_logger.handlers):
+            handler.close()
+            trace_logger.removeHandler(handler)
+
+    async def test_spans_follow_steps_threads_and_retries(self):
+        calls = {"n": 0}
+
+        @async_retry(max_retries=2, initial_delay=0.01, exceptions=(ConnectionError,), budget=None)
+        @track_api_call("openrouter")
+        async def flaky_llm():
+            tag_span(model="deepseek/deepseek-r1")
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise ConnectionError("reset")
+            return "ok"
+
+        @track_api_call("notion")
+        def create_page():
+            return "page"
+
+        with start_trace("pipeline.demanda"):
+            with span("Initialization", kind="step"):
+                set_case_id("J-2026-007")
+                await run_blocking("notion", create_page)
+            with span("Document Generation", kind="step"):
+                await flaky_llm()
+
+        records = load_trace("J-2026-007")
+        by_name = {}
+        for record in records:
+            by_name.setdefault(record["name"], []).append(record)
+
+        self.assertEqual(records[0]["name"], "pipeline.demanda")
+        self.assertTrue(all(r["case_id"] == "J-2026-007" for r in records))
+        self.assertEqual(by_name["notion.create_page"][0]["parent_id"], by_name["Initialization"][0]["span_id"])
+
+        attempts = by_name["openrouter.flaky_llm"]
+        self.assertEqual([a["attributes"]["attempt"] for a in attempts], [1, 2])
+        self.assertEqual([a["status"] for a in attempts], ["error", "ok"])
+        self.assertEqual(attempts[1]["attributes"]["model"], "deepseek/deepseek-r1")
+        self.assertIn("flaky_llm backoff", by_name)
+
+        waterfall = render_waterfall(records)
+        self.assertIn("openrouter.flaky_llm [deepseek-r1] #2", waterfall)
+        self.assertIn("✗", waterfall)
+
+    async def test_span_outside_trace_is_noop(self):
+        with span("orphan") as orphan:
+            self.assertIsNone(orphan)
+        self.assertEqual(load_trace("D-2026-001"), [])
+
+    async def test_latest_trace_of_case_wins(self):
+        for _ in range(2):
+            with start_trace("pipeline.email"):
+                set_case_id("E-2026-001")
+                await asyncio.sleep(0.01)
+
+        records = load_trace("E-2026-001")
+        self.assertEqual(len(records), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
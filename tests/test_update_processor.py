@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from src.utils.update_processor import ChatOrderedUpdateProcessor, command_name
+
+
+def make_update(update_id, text, chat_id=1, user_id=10):
+    chat = Chat(chat_id, Chat.GROUP)
+    user = User(user_id, "Delegado", False)
+    return Update(update_id, message=Message(update_id, datetime.now(), chat, from_user=user, text=text))
+
+
+class TestCommandName(unittest.TestCase):
+    def test_parses_commands(self):
+        self.assertEqual(command_name(make_update(1, "/demanda@MarxnagerBot despido")), "demanda")
+        self.assertEqual(command_name(make_update(2, "/Status")), "status")
+        self.assertIsNone(command_name(make_update(3, "hola")))
+        self.assertIsNone(command_name(make_update(4, "/")))
+
+
+class TestChatOrderedUpdateProcessor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.processor = ChatOrderedUpdateProcessor(
+            pipeline_commands=["denuncia", "demanda", "email"],
+            max_concurrent_updates=8,
+            max_pipelines=1
+        )
+        self.events = []
+
+    async def handler(self, name, delay=0.0, started=None, release=None):
+        self.events.append(f"start {name}")
+        if started:
+            started.set()
+        if release:
+            await release.wait()
+        await asyncio.sleep(delay)
+        self.events.append(f"end {name}")
+
+    async def test_same_user_updates_stay_ordered(self):
+        await asyncio.gather(
+            self.processor.process_update(make_update(1, "primero"), self.handler("1", delay=0.03)),
+            self.processor.process_update(make_update(2, "segundo"), self.handler("2")),
+        )
+        self.assertEqual(self.events, ["start 1", "end 1", "start 2", "end 2"])
+
+    async def test_different_users_run_in_parallel(self):
+        await asyncio.gather(
+            self.processor.process_update(make_update(1, "a", user_id=10), self.handler("a", delay=0.03)),
+            self.processor.process_update(make_update(2, "b", user_id=11), self.handler("b")),
+        )
+        self.assertEqual(self.events, ["start a", "start b", "end b", "end a"])
+
+    async def test_fast_commands_are_not_queued_behind_pipeline(self):
+        started, release = asyncio.Event(), asyncio.Event()
+        pipeline = asyncio.create_task(self.processor.process_update(
+            make_update(1, "/demanda despido"), self.handler("demanda", started=started, release=release)
+        ))
+        await started.wait()
+
+        await self.processor.process_update(make_update(2, "/status"), self.handler("status"))
+        self.assertEqual(self.events, ["start demanda", "start status", "end status"])
+
+        release.set()
+        await pipeline
+
+    async def test_pipeline_cap(self):
+        started, release = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(self.processor.process_update(
+            make_update(1, "/demanda a", user_id=10), self.handler("a", started=started, release=release)
+        ))
+        await started.wait()
+        second = asyncio.create_task(self.processor.process_update(
+            make_update(2, "/denuncia b", user_id=11), self.handler("b")
+        ))
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(self.processor.pipelines_in_flight, 1)
+        self.assertNotIn("start b", self.events)
+
+        release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(self.events[-1], "end b")
+        self.assertEqual(self.processor._order_locks, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
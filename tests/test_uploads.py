@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from aiohttp import web
+
+from src.integrations.drive_client import DelegadoDriveClient
+from src.integrations.http_pool import close_http_sessions
+from src.utils.uploads import (
+    DownloadError,
+    UploadTooLargeError,
+    format_upload_progress,
+    redact_bot_token,
+    spool_telegram_file
+)
+
+PAYLOAD = os.urandom(700 * 1024)
+
+
+async def serve_payload(request):
+    return web.Response(body=PAYLOAD)
+
+
+class TestSpoolTelegramFile(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        patcher = patch("src.utils.uploads.UPLOAD_SPOOL_DIR", self.spool_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = web.Application()
+        app.router.add_get("/file/bot123/voice.ogg", serve_payload)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}/file/bot123/voice.ogg"
+
+    async def asyncTearDown(self):
+        await close_http_sessions()
+        await self.runner.cleanup()
+
+    async def test_streams_to_temp_file_in_chunks(self):
+        progress = []
+        file_obj = SimpleNamespace(file_path=self.url, file_size=len(PAYLOAD))
+        path = await spool_telegram_file(file_obj, on_progress=lambda done, total: progress.append(done),
+                                         chunk_size=64 * 1024)
+        try:
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), PAYLOAD)
+            self.assertGreater(len(progress), 1)
+            self.assertEqual(progress[-1], len(PAYLOAD))
+        finally:
+            os.unlink(path)
+
+    async def test_size_limit(self):
+        # Declared size over the limit: rejected before downloading
+        with self.assertRaises(UploadTooLargeError):
+            await spool_telegram_file(SimpleNamespace(file_path=self.url, file_size=len(PAYLOAD)), max_bytes=1024)
+        # Unknown size: rejected while streaming, temp file removed
+        with self.assertRaises(UploadTooLargeError):
+            await spool_telegram_file(SimpleNamespace(file_path=self.url, file_size=None), max_bytes=100 * 1024)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    async def test_download_error_hides_bot_token(self):
+        missing = self.url.replace("/file/bot123/", "/file/bot123:SECRET-token_x/")
+        with self.assertRaises(DownloadError) as cm:
+            await spool_telegram_file(SimpleNamespace(file_path=missing, file_size=None))
+
+        self.assertEqual(cm.exception.status, 404)
+        self.assertNotIn("SECRET", str(cm.exception))
+        self.assertIsNone(cm.exception.__cause__)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+        self.assertEqual(redact_bot_token(f"url='{missing}'").count("SECRET"), 0)
+
+    def test_progress_text(self):
+        self.assertEqual(format_upload_progress("Subiendo a Drive", 5 * 1_048_576, 10 * 1_048_576),
+                         "⏳ Subiendo a Drive... 50% (5.0/10.0 MB)")
+
+
+class TestResumableUpload(unittest.TestCase):
+    def test_upload_reports_progress_per_chunk(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(PAYLOAD)
+        self.addCleanup(os.unlink, f.name)
+
+        request = MagicMock()
+        request.next_chunk.side_effect = [
+            (SimpleNamespace(resumable_progress=256 * 1024, total_size=len(PAYLOAD)), None),
+            (SimpleNamespace(resumable_progress=512 * 1024, total_size=len(PAYLOAD)), None),
+            (None, {"id": "file-1", "webViewLink": "https://drive/file-1"}),
+        ]
+        client = DelegadoDriveClient.__new__(DelegadoDriveClient)
+        client.service = MagicMock()
+        client.service.files.return_value.create.return_value = request
+
+        progress = []
+        link = client.upload_file_resumable(f.name, "voice.ogg", "folder-1", "audio/ogg",
+                                            progress=lambda done, total: progress.append(done),
+                                            chunk_size=256 * 1024)
+
+        self.assertEqual(link, "https://drive/file-1")
+        self.assertEqual(progress, [256 * 1024, 512 * 1024, len(PAYLOAD)])
+        media = client.service.files.return_value.create.call_args.kwargs["media_body"]
+        self.assertTrue(media.resumable())
+        self.assertEqual(media.chunksize(), 256 * 1024)
+        request.next_chunk.assert_called_with(num_retries=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.webhook import SECRET_HEADER, WebhookServer
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 5,
+        "date": 1767225600,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "Delegado"},
+        "text": "/status",
+    },
+}
+
+
+class TestWebhookServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.application = MagicMock()
+        self.application.bot = None
+        self.application.update_queue = asyncio.Queue()
+        self.server = WebhookServer(self.application, secret_token="s3cret", path="/telegram")
+        self.server.accepting = True
+        self.client = TestClient(TestServer(self.server.build_app()))
+        await self.client.start_server()
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_valid_update_is_queued(self):
+        response = await self.client.post("/telegram", json=UPDATE, headers={SECRET_HEADER: "s3cret"})
+
+        self.assertEqual(response.status, 200)
+        update = self.application.update_queue.get_nowait()
+        self.assertEqual(update.effective_chat.id, 42)
+        self.assertEqual(update.effective_message.text, "/status")
+
+    async def test_wrong_secret_is_rejected(self):
+        response = await self.client.post("/telegram", json=UPDATE, headers={SECRET_HEADER: "nope"})
+        self.assertEqual(response.status, 403)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_draining_returns_503(self):
+        self.server.accepting = False
+        response = await self.client.post("/telegram", json=UPDATE, headers={SECRET_HEADER: "s3cret"})
+        health = await self.client.get("/healthz")
+
+        self.assertEqual(response.status, 503)
+        self.assertEqual(health.status, 503)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_health(self):
+        response = await self.client.get("/healthz")
+        self.assertEqual(response.status, 200)
+        self.assertEqual((await response.json())["status"], "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()